@@ -0,0 +1,76 @@
+import argparse
+import logging
+import random
+import time
+
+from src.core import University
+from src.application.applications_index import ApplicationsIndex
+from src.application.loader import DataLoader
+from src.application.service import ApplicationService
+from src.utils import deep_sizeof
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--data_dir', type=str, default="./data/", help="Path to directory with applications data files")
+parser.add_argument('--copies', type=int, default=10,
+                    help="Number of copies of loaded students with distinct ids, to benchmark bigger volumes")
+parser.add_argument('--lookups', type=int, default=100000, help="Number of timed lookups of student applications")
+
+args = parser.parse_args()
+logging.disable(logging.INFO)
+
+service = ApplicationService()
+DataLoader(service).load_data(args.data_dir)
+universities_numbers = {university: number for number, university in enumerate(University)}
+profiles_numbers = {}
+applications = []
+for university, profile in service.get_loaded_profiles():
+    profile_number = profiles_numbers.setdefault(university, {}).setdefault(profile, len(profiles_numbers[university]))
+    for student in service.get_profile_students(university, profile):
+        applications.append((student.id.id, university, profile, profile_number, student.score))
+
+# nested dictionaries by student, university and profile, as they were kept by service before
+students = {}
+nested = {}
+index = ApplicationsIndex()
+started_at = time.perf_counter()
+for copy in range(args.copies):
+    for student_id, university, profile, _, score in applications:
+        key = f"{student_id}#{copy}"
+        profiles = nested.setdefault(key, {}).setdefault(university, {})
+        if profile not in profiles:
+            profiles[profile] = score
+nested_build_time = time.perf_counter() - started_at
+
+started_at = time.perf_counter()
+for copy in range(args.copies):
+    for student_id, university, _, profile_number, score in applications:
+        student = students.setdefault(f"{student_id}#{copy}", len(students))
+        index.add(student, universities_numbers[university], profile_number, score)
+index.build()
+index_build_time = time.perf_counter() - started_at
+
+# ids are shared by both structures, so they are not counted
+seen = set()
+deep_sizeof(list(students.keys()), seen)
+print(f"{len(students)} students, {len(index)} applications")
+print(f"Nested dictionaries: {deep_sizeof(nested, set(seen)) / 1024 / 1024:.1f} MiB, "
+      f"built in {nested_build_time:.2f} s")
+print(f"Applications index:  {deep_sizeof(index, set(seen)) / 1024 / 1024:.1f} MiB, "
+      f"built in {index_build_time:.2f} s (with interning of ids)")
+
+keys = random.Random(0).choices(list(students.keys()), k=args.lookups)
+started_at = time.perf_counter()
+for key in keys:
+    for university, profiles in nested[key].items():
+        for profile, score in profiles.items():
+            pass
+nested_lookup_time = time.perf_counter() - started_at
+
+started_at = time.perf_counter()
+for key in keys:
+    for university, profile, score in index.get(students[key]):
+        pass
+index_lookup_time = time.perf_counter() - started_at
+
+print(f"Nested dictionaries: {nested_lookup_time / args.lookups * 1000000:.2f} us per student lookup")
+print(f"Applications index:  {index_lookup_time / args.lookups * 1000000:.2f} us per student lookup")
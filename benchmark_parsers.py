@@ -0,0 +1,45 @@
+import argparse
+
+from src.parsers.benchmark import ParsersBenchmark
+from src.application.formats import FormatCostModel
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--data_dir', type=str, default="./data/", help="Path to directory with sample data files")
+parser.add_argument('--baseline', type=str, default="./parsers_baseline.json",
+                    help="Path to baseline results: written by default, read in compare mode")
+parser.add_argument('--compare', action='store_true', help="Compare results with baseline instead of saving them")
+parser.add_argument('--threshold', type=float, default=0.2,
+                    help="Relative slowdown reported as regression in compare mode")
+parser.add_argument('--scales', type=str, default="1,4",
+                    help="Comma separated scales of synthetic variants, 1 is the sample file itself")
+parser.add_argument('--repeats', type=int, default=ParsersBenchmark.DEFAULT_REPEATS,
+                    help="Number of timed runs of each benchmark, the best one is taken")
+parser.add_argument('--format_costs', type=str, default=None,
+                    help="If provided, measured formats costs are saved to this file for data loader")
+
+args = parser.parse_args()
+
+benchmark = ParsersBenchmark(args.data_dir, [int(scale) for scale in args.scales.split(',')], args.repeats)
+print(f"Running parsers benchmarks on '{args.data_dir}'...")
+results = benchmark.run()
+for name, result in sorted(results.items()):
+    print(f"{name}: {result['rows']} rows, {result['rows_per_second']} rows/s, "
+          f"peak memory {result['peak_memory'] // 1024} KiB")
+
+if args.format_costs:
+    cost_model = FormatCostModel.load(args.format_costs)
+    for extension, cost in ParsersBenchmark.get_format_costs(results).items():
+        cost_model.update(extension, round(cost, 4))
+    cost_model.save(args.format_costs)
+    print(f"Formats costs saved to '{args.format_costs}'.")
+
+if args.compare:
+    regressions = ParsersBenchmark.compare(ParsersBenchmark.load(args.baseline), results, args.threshold)
+    for name, baseline_speed, speed in regressions:
+        print(f"REGRESSION {name}: {baseline_speed} -> {speed} rows/s")
+    if regressions:
+        exit(1)
+    print(f"No regressions beyond {args.threshold:.0%} found.")
+else:
+    ParsersBenchmark.save(results, args.baseline)
+    print(f"Baseline saved to '{args.baseline}'.")
@@ -0,0 +1,116 @@
+import argparse
+import logging
+import time
+
+from src.core import Profile, Student, StudentId, University
+from src.application.columns import ColumnarTables
+from src.application.loader import DataLoader
+from src.application.query import ApplicationsFilter, ApplicationsQuery
+from src.application.service import ApplicationService
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--data_dir', type=str, default="./data/", help="Path to directory with applications data files")
+parser.add_argument('--copies', type=int, default=10,
+                    help="Number of copies of sample profiles with distinct students, to benchmark bigger volumes")
+parser.add_argument('--score', type=int, default=250, help="Minimal score of compared per-profile queries")
+parser.add_argument('--top', type=int, default=100, help="Number of applications selected by compared top query")
+parser.add_argument('--universities', type=str, default="MIREA,MTUCI",
+                    help="Comma separated universities students applied to in compared analyst query")
+
+args = parser.parse_args()
+logging.disable(logging.CRITICAL)
+universities = frozenset(University[name] for name in args.universities.split(','))
+
+sample = ApplicationService()
+DataLoader(sample).load_data(args.data_dir)
+
+# each copy of sample profile is a separate profile of the same university with its own students,
+# so agreements and positions within a copy are the same as in sample data
+service = ApplicationService()
+for copy in range(args.copies):
+    for university, profile in sample.get_loaded_profiles():
+        service.add_profile_students_data(
+            university, Profile(profile.id, f"{profile.sub_field or ''}#{copy}"),
+            [Student(StudentId(f"{student.id.id}#{copy}"), student.score, student.agreement_submitted,
+                     student.dormitory_requirement)
+             for student in sample.get_profile_students(university, profile)]
+        )
+service.build_indexes()
+profiles = service.get_loaded_profiles()
+print(f"{len(profiles)} profiles, {sum(len(service.get_profile_students(u, p)) for u, p in profiles)} applications")
+
+started_at = time.perf_counter()
+query = ApplicationsQuery(ColumnarTables(service))
+print(f"Query tables built in {time.perf_counter() - started_at:.2f} s")
+
+
+def measure(name: str, service_query, compiled_query):
+    """Times service filters and compiled query, rows selected by the compiled query are compared after timing"""
+    started_at = time.perf_counter()
+    expected = service_query()
+    service_time = time.perf_counter() - started_at
+    started_at = time.perf_counter()
+    selected = compiled_query()
+    compiled_time = time.perf_counter() - started_at
+    found = list(selected.itertuples(index=False, name=None))
+    if found != expected:
+        print(f"MISMATCH {name}: {len(expected)} applications by service filters, {len(found)} by compiled query")
+        exit(1)
+    print(f"{name}: {len(found)} applications, service filters {service_time * 1000:.1f} ms, "
+          f"compiled query {compiled_time * 1000:.1f} ms ({service_time / compiled_time:.1f}x)")
+
+
+def admission_possible(university: University, profile: Profile):
+    return [(student_id.id, score) for student_id, score, _ in
+            service.get_all_students_with_chosen_profile_where_score_ge_and_admission_possible(
+                university, profile, args.score
+            )]
+
+
+measure(
+    f"score >= {args.score} and admission possible, all profiles",
+    lambda: [row for university, profile in profiles for row in admission_possible(university, profile)],
+    lambda: query.select(ApplicationsFilter(min_score=args.score, applicable=True), ['student_id', 'score'])
+)
+
+# each compiled query scans all applications, so a query of one profile is slower than a service filter over it
+largest_university, largest_profile = max(profiles, key=lambda key: len(service.get_profile_students(*key)))
+measure(
+    f"score >= {args.score} and admission possible, {largest_profile} in {largest_university}",
+    lambda: admission_possible(largest_university, largest_profile),
+    lambda: query.select(ApplicationsFilter(frozenset([largest_university]), frozenset([largest_profile]),
+                                            min_score=args.score, applicable=True), ['student_id', 'score'])
+)
+
+measure(
+    f"top {args.top} applications by score where admission possible",
+    lambda: sorted((row for university, profile in profiles for row in admission_possible(university, profile)),
+                   key=lambda row: -row[1])[:args.top],
+    lambda: query.select(ApplicationsFilter(min_score=args.score, applicable=True), ['student_id', 'score'],
+                         order_by='score', limit=args.top)
+)
+
+
+def applied_to_all_without_agreement():
+    # the same query written as a loop over public service API
+    agreements = service.get_agreements()
+    applied_universities = {}
+    for university, profile in profiles:
+        for student in service.get_profile_students(university, profile):
+            applied_universities.setdefault(student.id, set()).add(university)
+    return [
+        (student.id.id, university.name, str(profile), student.score)
+        for university, profile in profiles for student in service.get_profile_students(university, profile)
+        if 250 <= student.score <= 280 and student.id not in agreements
+        and universities <= applied_universities[student.id]
+    ]
+
+
+measure(
+    f"score in [250, 280], applied to {args.universities}, no agreement",
+    applied_to_all_without_agreement,
+    lambda: query.select(
+        ApplicationsFilter(min_score=250, max_score=280, has_agreement=False, applied_to_all=universities),
+        ['student_id', 'university', 'profile', 'score']
+    )
+)
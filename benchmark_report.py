@@ -0,0 +1,83 @@
+import argparse
+import logging
+import shutil
+import tempfile
+import time
+
+from src.core import StudentId
+from src.application.loader import DataLoader
+from src.application.service import ApplicationService
+from src.application.visualizer import DataVisualizer, ReportType
+from src.utils import MemoryTracker
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--data_dir', type=str, default="./data/", help="Path to directory with applications data files")
+parser.add_argument('--student_id', type=str, default=None,
+                    help="Student to generate report for, by default the one counted in the most profiles")
+parser.add_argument('--min_applications', type=int, default=20,
+                    help="Minimal number of applications where student is counted")
+parser.add_argument('--type', type=str, default="FULL", help="Type of report: 'BRIEF' or 'FULL'")
+parser.add_argument('--students_window', type=int, default=None,
+                    help="If provided, students lists of FULL report keep only this number of students "
+                         "around the student")
+parser.add_argument('--competitors_overlaps', action='store_true',
+                    help="Add competitors shared by each pair of applications to FULL report")
+parser.add_argument('--repeats', type=int, default=3, help="Number of timed runs of each mode, the best one is taken")
+
+args = parser.parse_args()
+logging.disable(logging.CRITICAL)
+report_type = ReportType[args.type]
+
+service = ApplicationService()
+DataLoader(service).load_data(args.data_dir)
+if args.student_id is not None:
+    student_id = StudentId(args.student_id)
+else:
+    student_ids = {student.id for university, profile in service.get_loaded_profiles()
+                   for student in service.get_profile_students(university, profile)}
+    student_id = max(sorted(student_ids, key=lambda i: i.id),
+                     key=lambda i: len(service.get_applications_details_for(i)))
+number_of_applications = len(service.get_applications_details_for(student_id))
+print(f"Student [id={student_id}] is counted in {number_of_applications} profiles")
+if number_of_applications < args.min_applications:
+    print(f"FAILED: student should be counted in at least {args.min_applications} profiles")
+    exit(1)
+
+# without converter pdfkit fails before starting conversion, stages up to rendering are still measured
+conversion_measured = shutil.which('wkhtmltopdf') is not None
+if not conversion_measured:
+    print("wkhtmltopdf not found: PDF conversion is not measured, times cover data collection and rendering")
+
+
+def generate(visualizer: DataVisualizer, output_dir: str, streaming: bool):
+    try:
+        visualizer.get_report_for(student_id, report_type, output_dir=output_dir, streaming=streaming,
+                                  students_window=args.students_window,
+                                  competitors_overlaps=args.competitors_overlaps)
+    except OSError:
+        if conversion_measured:
+            raise
+
+
+output_dir = tempfile.mkdtemp()
+try:
+    for streaming in [False, True]:
+        # memory is traced in a separate run, as tracing slows rendering down
+        visualizer = DataVisualizer(service)
+        best_time = float('inf')
+        for _ in range(args.repeats):
+            started_at = time.perf_counter()
+            generate(visualizer, output_dir, streaming)
+            best_time = min(best_time, time.perf_counter() - started_at)
+
+        memory_tracker = MemoryTracker()
+        generate(DataVisualizer(service, memory_tracker=memory_tracker), output_dir, streaming)
+        memory_tracker.close()
+
+        print(f"{'streaming' if streaming else 'whole page'}: {best_time * 1000:.1f} ms")
+        for stage, memory in memory_tracker.get_stages().items():
+            if stage == 'pdf conversion' and not conversion_measured:
+                continue
+            print(f"  {stage}: peak {memory['peak'] / 1024 / 1024:.2f} MiB")
+finally:
+    shutil.rmtree(output_dir)
@@ -0,0 +1,53 @@
+import argparse
+import random
+import time
+
+from src.core import StudentId
+from src.application.id_index import StudentIdIndex
+from src.utils import deep_sizeof
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--size', type=int, default=1000000, help="Number of synthetic student ids in index")
+parser.add_argument('--queries', type=int, default=10000, help="Number of timed prefix lookups")
+parser.add_argument('--limit', type=int, default=10, help="Number of completions returned by each lookup")
+parser.add_argument('--seed', type=int, default=0, help="Seed of random generator of ids and prefixes")
+
+args = parser.parse_args()
+generator = random.Random(args.seed)
+
+
+def random_student_id() -> str:
+    # SNILS and university-specific ids as they are produced by parsers
+    kind = generator.random()
+    if kind < 0.6:
+        digits = f"{generator.randrange(10 ** 11):011d}"
+        return f"{digits[0:3]}-{digits[3:6]}-{digits[6:9]} {digits[9:11]}"
+    prefix = "MIREA №" if kind < 0.8 else "MPEI №"
+    return f"{prefix} {generator.randrange(10 ** 7)}"
+
+
+student_ids = list(dict.fromkeys(random_student_id() for _ in range(args.size)))
+print(f"Indexing {len(student_ids)} synthetic student ids...")
+
+student_ids = [StudentId(student_id) for student_id in student_ids]
+# ids themselves are shared with service structures, so only memory of index structures is reported
+seen = set()
+deep_sizeof(student_ids, seen)
+
+index = StudentIdIndex()
+started_at = time.perf_counter()
+for student_id in student_ids:
+    index.add(student_id)
+index.build()
+print(f"Index built in {time.perf_counter() - started_at:.2f} s, size {deep_sizeof(index, seen) / 1024 / 1024:.1f} MiB")
+
+prefixes = []
+for _ in range(args.queries):
+    student_id = generator.choice(student_ids).id
+    prefixes.append(student_id[:generator.randint(3, len(student_id))])
+
+started_at = time.perf_counter()
+found = sum(len(index.complete(prefix, args.limit)) for prefix in prefixes)
+elapsed = time.perf_counter() - started_at
+print(f"{args.queries} lookups: {elapsed / args.queries * 1000000:.1f} us per lookup, "
+      f"{found / args.queries:.1f} completions on average")
@@ -0,0 +1,99 @@
+import argparse
+import logging
+import os
+from os.path import join
+import re
+import shutil
+import tempfile
+
+from src.application.loader import DataLoader
+from src.application.service import ApplicationService
+from src.utils import MemoryTracker
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--csv_template', type=str, default="./data/MTUCI_09.03.01.csv",
+                    help="Sample MTUCI CSV file, its rows are repeated with distinct SNILS to build synthetic files")
+parser.add_argument('--html_template', type=str, default="./data/MTUCI_09.03.01.html",
+                    help="Sample MTUCI HTML page, its table rows are repeated with distinct SNILS")
+parser.add_argument('--rows', type=int, default=10000, help="Number of rows of the smallest synthetic file")
+parser.add_argument('--scales', type=str, default="1,10,100",
+                    help="Comma separated sizes of synthetic files in numbers of the smallest file")
+parser.add_argument('--chunk_size', type=int, default=10000, help="Number of students in chunk of incremental parsing")
+parser.add_argument('--ceiling', type=float, default=8.0,
+                    help="Maximal memory in MiB allocated by chunked loading on top of memory retained by service")
+parser.add_argument('--row_bytes', type=int, default=512,
+                    help="Maximal memory in bytes retained by service per loaded application")
+
+args = parser.parse_args()
+logging.disable(logging.CRITICAL)
+
+SNILS_PATTERN = re.compile(r'[0-9]{3}-[0-9]{3}-[0-9]{3} [0-9]{2}')
+
+
+def synthetic_snils(i: int) -> str:
+    # numbers are distinct so that every row is a new student
+    number = f"{100000000 + i:09d}"
+    return f"{number[0:3]}-{number[3:6]}-{number[6:9]} {i % 100:02d}"
+
+
+def write_synthetic_csv(file_path: str, number_of_rows: int):
+    with open(args.csv_template, encoding='utf-8-sig') as file:
+        header, *rows = file.read().splitlines()
+    with open(file_path, 'w', encoding='utf-8') as file:
+        file.write(header + '\n')
+        for i in range(number_of_rows):
+            values = rows[i % len(rows)].split(';')
+            # SNILS column of MTUCI lists
+            values[2] = synthetic_snils(i)
+            file.write(';'.join(values) + '\n')
+
+
+def write_synthetic_html(file_path: str, number_of_rows: int):
+    with open(args.html_template, encoding='utf-8') as file:
+        page = file.read()
+    # rows of applications table follow the label, the page has a single table body
+    start = page.index('<tbody>', page.index('showFullTable')) + len('<tbody>')
+    end = page.index('</tbody>', start)
+    rows = [row + '</tr>' for row in page[start: end].split('</tr>') if row.strip()]
+    with open(file_path, 'w', encoding='utf-8') as file:
+        file.write(page[:start])
+        for i in range(number_of_rows):
+            file.write(SNILS_PATTERN.sub(synthetic_snils(i), rows[i % len(rows)], count=1))
+        file.write(page[end:])
+
+
+def load(dir_path: str, stage: str):
+    memory_tracker = MemoryTracker()
+    service = ApplicationService()
+    DataLoader(service, memory_tracker=memory_tracker).load_data(dir_path, chunk_size=args.chunk_size)
+    memory_tracker.close()
+    memory = memory_tracker.get_stages()[stage]
+    number_of_rows = sum(len(service.get_profile_students(*key)) for key in service.get_loaded_profiles())
+    return number_of_rows, memory['retained'], memory['peak'] - memory['retained']
+
+
+failed = False
+for extension, write_synthetic_file in [('csv', write_synthetic_csv), ('html', write_synthetic_html)]:
+    for scale in [int(scale) for scale in args.scales.split(',')]:
+        dir_path = tempfile.mkdtemp()
+        try:
+            file_path = join(dir_path, f"MTUCI_09.03.01.{extension}")
+            write_synthetic_file(file_path, args.rows * scale)
+            size = os.path.getsize(file_path) / 1024 / 1024
+            number_of_rows, retained, overhead = load(dir_path, f"{extension} profiles loading")
+            print(f"{extension} x{scale}, {number_of_rows} rows ({size:.1f} MiB): "
+                  f"retained by service {retained / number_of_rows:.0f} bytes per row, "
+                  f"peak {overhead / 1024 / 1024:.1f} MiB on top of retained")
+            if overhead / 1024 / 1024 > args.ceiling:
+                print(f"FAILED: chunked loading exceeds ceiling of {args.ceiling} MiB")
+                failed = True
+            if retained / number_of_rows > args.row_bytes:
+                print(f"FAILED: service retains more than {args.row_bytes} bytes per row")
+                failed = True
+        finally:
+            shutil.rmtree(dir_path)
+
+if failed:
+    exit(1)
+print(f"OK: chunked loading stays within {args.ceiling} MiB on top of memory retained by service, "
+      f"which is at most {args.row_bytes} bytes per row")
@@ -0,0 +1,127 @@
+import argparse
+from collections import Counter
+import functools
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import logging
+import os
+from os.path import isfile, join
+import shutil
+import tempfile
+import threading
+import time
+
+from src.core import Profile, University
+from src.application.fetcher import FetchSource, ListsFetcher
+from src.application.loader import DataLoader
+from src.application.service import ApplicationService
+from src.parsers.parser import FileExtension
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--data_dir', type=str, default="./data/", help="Path to directory with sample data files to serve")
+parser.add_argument('--connections_per_host', type=int, default=4,
+                    help="Maximal number of simultaneous requests to stand-in server")
+
+args = parser.parse_args()
+logging.disable(logging.CRITICAL)
+
+
+class StandInHandler(SimpleHTTPRequestHandler):
+    """Keep-alive static files server answering conditional requests by ETag or Last-Modified"""
+
+    protocol_version = 'HTTP/1.1'
+    statuses = Counter()
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        self.etag = None
+        if isfile(path):
+            stat = os.stat(path)
+            self.etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+            if self.headers.get('If-None-Match') == self.etag:
+                self.send_response(304)
+                self.end_headers()
+                return None
+        return super().send_head()
+
+    def send_response(self, code, message=None):
+        StandInHandler.statuses[int(code)] += 1
+        super().send_response(code, message)
+
+    def end_headers(self):
+        if getattr(self, 'etag', None):
+            self.send_header('ETag', self.etag)
+        super().end_headers()
+
+
+def check(condition: bool, message: str):
+    if not condition:
+        print(f"FAILED: {message}")
+        exit(1)
+    print(f"OK: {message}")
+
+
+def fetch(fetcher: ListsFetcher, sources):
+    StandInHandler.statuses.clear()
+    started_at = time.perf_counter()
+    changed = fetcher.fetch(sources)
+    print(f"  fetched in {time.perf_counter() - started_at:.2f} s, responses {dict(StandInHandler.statuses)}")
+    return changed
+
+
+def read(file_path: str) -> bytes:
+    with open(file_path, 'rb') as file:
+        return file.read()
+
+
+def statistics(dir_path: str):
+    service = ApplicationService()
+    DataLoader(service).load_data(dir_path)
+    return service.get_universities_statistics(), service.get_profiles_statistics()
+
+
+work_dir = tempfile.mkdtemp()
+served_dir, output_dir = join(work_dir, 'served'), join(work_dir, 'fetched')
+shutil.copytree(args.data_dir, served_dir)
+server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(StandInHandler, directory=served_dir))
+threading.Thread(target=server.serve_forever, daemon=True).start()
+base_url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+# sample files follow '<UNIVERSITY>_<profile>[_<sub field>].<extension>' convention, other files are not lists
+sources = []
+for file in sorted(os.listdir(served_dir)):
+    name, _, extension = file.rpartition('.')
+    parts = name.split('_')
+    if parts[0] in University.__members__ and extension in [e.value for e in FileExtension]:
+        sources.append(FetchSource(base_url + file, University[parts[0]],
+                                   Profile(parts[1], parts[2] if len(parts) > 2 else None), FileExtension(extension)))
+print(f"Serving {len(sources)} lists from '{args.data_dir}' at {base_url}")
+
+try:
+    fetcher = ListsFetcher(output_dir, args.connections_per_host)
+    changed = fetch(fetcher, sources)
+    check(len(changed) == len(sources), "all lists are fetched by the first fetch")
+    check(all(read(join(served_dir, source.file_name)) == read(join(output_dir, source.file_name))
+              for source in sources), "fetched files are identical to served ones")
+
+    changed = fetch(fetcher, sources)
+    check(not changed and StandInHandler.statuses[304] == len(sources),
+          "nothing is downloaded again when lists are not modified")
+
+    modified = next(source for source in sources if source.file_extension == FileExtension.CSV)
+    modified_path = join(served_dir, modified.file_name)
+    content = read(modified_path)
+    with open(modified_path, 'wb') as file:
+        file.write(content.rstrip(b'\n').rsplit(b'\n', 1)[0] + b'\n')
+    changed = fetch(fetcher, sources)
+    check(changed == [modified.file_name], f"only modified list {modified.file_name} is reported as changed")
+
+    for file in os.listdir(served_dir):
+        if not isfile(join(output_dir, file)):
+            shutil.copy(join(served_dir, file), join(output_dir, file))
+    check(statistics(output_dir) == statistics(served_dir), "data loaded from fetched directory is the same as served")
+finally:
+    server.shutdown()
+    shutil.rmtree(work_dir)
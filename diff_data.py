@@ -0,0 +1,28 @@
+import argparse
+import sys
+
+from src.application.service import ApplicationService
+from src.application.loader import DataLoader
+from src.application.diff import SnapshotDiff
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--before_dir', type=str, required=True, help="Path to directory with previous applications data")
+parser.add_argument('--after_dir', type=str, required=True, help="Path to directory with current applications data")
+parser.add_argument('--output', type=str, default=None, help="JSON Lines file to write changes, stdout if not provided")
+
+args = parser.parse_args()
+
+services = []
+for dir_path in [args.before_dir, args.after_dir]:
+    print(f"Loading data from '{dir_path}'...", file=sys.stderr)
+    service = ApplicationService()
+    DataLoader(service).load_data(dir_path)
+    services.append(service)
+
+diff = SnapshotDiff(services[0], services[1])
+if args.output is None:
+    number_of_changes = diff.write_json_lines(sys.stdout)
+else:
+    with open(args.output, 'w', encoding='utf-8') as output:
+        number_of_changes = diff.write_json_lines(output)
+print(f"{number_of_changes} changes found.", file=sys.stderr)
@@ -0,0 +1,30 @@
+import argparse
+import sys
+from datetime import datetime, timedelta
+
+from src.application.trajectory import CutoffTrajectories
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--data_dirs', type=str, nargs='+', required=True,
+                    help="Paths to directories with applications data in order of drops")
+parser.add_argument('--timestamps', type=str, nargs='+', default=None,
+                    help="ISO time of each drop, if not provided drops are taken one day apart")
+parser.add_argument('--final_date', type=str, default=None,
+                    help="ISO time to project cut-offs to, the last drop is used if not provided")
+parser.add_argument('--horizon_days', type=float, default=0,
+                    help="Days after the last drop to project cut-offs to, if final date is not provided")
+
+args = parser.parse_args()
+
+timestamps = [datetime.fromisoformat(timestamp) for timestamp in args.timestamps] if args.timestamps else None
+print(f"Loading {len(args.data_dirs)} data drops...", file=sys.stderr)
+trajectories = CutoffTrajectories.load(args.data_dirs, timestamps)
+
+final_date = datetime.fromisoformat(args.final_date) if args.final_date \
+    else trajectories.get_timestamps()[-1] + timedelta(days=args.horizon_days)
+print(f"Cut-offs projected to {final_date}:", file=sys.stderr)
+for projection in trajectories.get_projections(final_date):
+    print(f"{projection.university.name} {projection.profile}: places {projection.places}, "
+          f"cut-off {projection.min_score} ({projection.min_score_slope:+} per day) -> "
+          f"{projection.projected_min_score}, agreements {projection.agreements} "
+          f"({projection.agreements_slope:+} per day) -> {projection.projected_agreements}")
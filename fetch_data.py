@@ -0,0 +1,30 @@
+import argparse
+
+from src.application.fetcher import ListsFetcher
+from src.application.loader import DataLoader
+from src.application.service import ApplicationService
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--sources', type=str, required=True,
+                    help="JSON file with list of sources: url, university, profile, optional sub_field and format")
+parser.add_argument('--data_dir', type=str, default="./data/", help="Directory to save fetched applications lists")
+parser.add_argument('--connections_per_host', type=int, default=4,
+                    help="Maximal number of simultaneous requests to one host")
+parser.add_argument('--timeout', type=float, default=30.0, help="Timeout of each request in seconds")
+
+args = parser.parse_args()
+
+fetcher = ListsFetcher(args.data_dir, args.connections_per_host, args.timeout)
+sources = ListsFetcher.load_sources(args.sources)
+print(f"Fetching {len(sources)} lists to '{args.data_dir}'...")
+changed_files = fetcher.fetch(sources)
+for file in changed_files:
+    print(f"Changed: {file}")
+print(f"{len(changed_files)} of {len(sources)} lists changed.")
+
+if changed_files:
+    # students of changed profiles can't be replaced in a loaded service, so the whole directory is reloaded
+    print(f"Reloading data from '{args.data_dir}'...")
+    service = ApplicationService()
+    DataLoader(service).load_data(args.data_dir)
+    print(f"{len(service.get_loaded_profiles())} profiles loaded.")
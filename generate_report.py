@@ -3,28 +3,71 @@ import argparse
 from src.core import StudentId
 from src.application.service import ApplicationService
 from src.application.loader import DataLoader
+from src.application.formats import FormatCostModel
 from src.application.visualizer import DataVisualizer, ReportType
+from src.application.report_cache import ReportCache
+from src.application.jobs import ReportJobQueue
+from src.utils import MemoryTracker
 
 parser = argparse.ArgumentParser()
 parser.add_argument('--student_id', type=str, required=True, help="Student Id to generate report with statistics")
 parser.add_argument('--data_dir', type=str, default="./data/", help="Path to directory with applications data files")
 parser.add_argument('--type', type=str, default="BRIEF", help="Type of report: 'BRIEF' or 'FULL'")
 parser.add_argument('--output_dir', type=str, default="./", help="Directory to save generated report")
+parser.add_argument('--chunk_size', type=int, default=None,
+                    help="If provided, data files are parsed incrementally by chunks of this number of students")
+parser.add_argument('--format_costs', type=str, default=None,
+                    help="If provided, profiles given both as CSV and HTML files are loaded from the format "
+                         "that is the cheapest to parse by this cost model")
+parser.add_argument('--cache_dir', type=str, default=None,
+                    help="Directory to cache generated reports, reports with unchanged content are reused")
+parser.add_argument('--max_resident_students', type=int, default=None,
+                    help="If provided, students lists beyond this number of students are spilled to disk")
+parser.add_argument('--streaming', action='store_true',
+                    help="Render report HTML chunk by chunk to a temporary file to reduce peak memory")
+parser.add_argument('--students_window', type=int, default=None,
+                    help="If provided, students lists of FULL report keep only this number of students "
+                         "around the student")
+parser.add_argument('--competitors_overlaps', action='store_true',
+                    help="Add competitors shared by each pair of applications to FULL report")
+parser.add_argument('--memory_report', action='store_true',
+                    help="Print memory retained by service structures and peak memory of loading and rendering stages")
+parser.add_argument('--queue', type=str, default=None,
+                    help="Path to report jobs queue: if provided, report job is submitted to workers instead")
 
 args = parser.parse_args()
 
+if args.queue:
+    job_id = ReportJobQueue(args.queue).submit(StudentId(args.student_id), ReportType[args.type], args.output_dir,
+                                               competitors_overlaps=args.competitors_overlaps)
+    print(f"Report job {job_id} submitted for student [id={args.student_id}].")
+    exit(0)
+
 print("Preparing system for report generation...")
-service = ApplicationService()
-visualizer = DataVisualizer(service)
+service = ApplicationService(max_resident_students=args.max_resident_students)
+memory_tracker = MemoryTracker() if args.memory_report else None
+visualizer = DataVisualizer(service, ReportCache(args.cache_dir) if args.cache_dir else None, memory_tracker)
 
 print(f"Loading data from '{args.data_dir}'...")
-loader = DataLoader(service)
-loader.load_data(args.data_dir)
+loader = DataLoader(service, FormatCostModel.load(args.format_costs) if args.format_costs else None,
+                    memory_tracker=memory_tracker)
+loader.load_data(args.data_dir, chunk_size=args.chunk_size)
 
 report_type = ReportType[args.type]
 print(f"Generating report for student [id={args.student_id}]...")
 
-if visualizer.get_report_for(StudentId(args.student_id), report_type, output_dir=args.output_dir):
+if visualizer.get_report_for(StudentId(args.student_id), report_type, output_dir=args.output_dir,
+                             streaming=args.streaming, students_window=args.students_window,
+                             competitors_overlaps=args.competitors_overlaps):
     print(f"Report successfully generated for student [id={args.student_id}].")
 else:
     print(f"Report was not generated for student [id={args.student_id}].")
+
+if memory_tracker is not None:
+    memory_tracker.close()
+    print("Memory retained by service structures:")
+    for structure, size in service.get_memory_usage().items():
+        print(f"  {structure}: {size / 1024 / 1024:.1f} MiB")
+    print("Memory by stages (retained / peak):")
+    for stage, memory in memory_tracker.get_stages().items():
+        print(f"  {stage}: {memory['retained'] / 1024 / 1024:.1f} MiB / {memory['peak'] / 1024 / 1024:.1f} MiB")
@@ -0,0 +1,32 @@
+import argparse
+
+from src.application.jobs import JobStatus, ReportJobQueue, ReportWorkerPool
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--queue', type=str, required=True, help="Path to report jobs queue database")
+parser.add_argument('--data_dir', type=str, default="./data/", help="Path to directory with applications data files")
+parser.add_argument('--workers', type=int, default=2, help="Number of worker processes")
+parser.add_argument('--cache_dir', type=str, default=None, help="Directory to cache generated reports")
+parser.add_argument('--stale_timeout', type=float, default=600,
+                    help="Seconds after which running jobs of dead workers are returned to queue")
+parser.add_argument('--retry_delay', type=float, default=ReportJobQueue.DEFAULT_RETRY_DELAY,
+                    help="Seconds before the first retry of a failed job, each next retry waits twice as long")
+parser.add_argument('--stop_when_idle', action='store_true', help="Stop workers when queue is empty")
+
+args = parser.parse_args()
+
+queue = ReportJobQueue(args.queue, args.retry_delay)
+requeued = queue.requeue_stale(args.stale_timeout)
+if requeued:
+    print(f"{requeued} stale jobs returned to queue.")
+
+print(f"Starting {args.workers} workers for queue '{args.queue}'...")
+pool = ReportWorkerPool(args.queue, args.data_dir, args.workers, args.cache_dir, args.retry_delay)
+pool.start(stop_when_idle=args.stop_when_idle)
+try:
+    pool.join()
+except KeyboardInterrupt:
+    pool.stop()
+
+counts = queue.count_by_status()
+print(", ".join(f"{status.value}: {counts[status]}" for status in JobStatus))
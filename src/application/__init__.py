@@ -1,3 +1,17 @@
 from src.application.service import ApplicationService
+from src.application.formats import FormatCostModel
 from src.application.loader import DataLoader
+from src.application.history import HistoryStore
+from src.application.diff import SnapshotDiff
+from src.application.report_cache import ReportCache
 from src.application.visualizer import DataVisualizer, ReportType
+from src.application.jobs import JobStatus, ReportJob, ReportJobQueue, ReportWorkerPool
+from src.application.shared_store import SharedServiceStore, SharedServiceView
+from src.application.columns import ColumnarTables, ExportFormat
+from src.application.query import ApplicationsFilter, ApplicationsQuery
+from src.application.overlap import CompetitorOverlap
+from src.application.sensitivity import PlacesSensitivity
+from src.application.id_index import StudentIdIndex
+from src.application.trajectory import CutoffProjection, CutoffTrajectories
+from src.application.fetcher import FetchSource, ListsFetcher
+from src.application.applications_index import ApplicationsIndex
@@ -0,0 +1,106 @@
+from array import array
+from typing import Dict, Iterator, List, NoReturn, Optional, Tuple
+
+
+class ApplicationsIndex:
+    """
+    Applications of all students in compressed sparse row layout: applications of student with interned index i
+    are entries offsets[i]..offsets[i + 1] of flat arrays of university, profile and score numbers.
+    Entries of student are grouped by university in order of first application to it, then ordered by profile
+    in order of application; if student applied to the same profile twice, the first score is kept.
+    Applications are collected in flat arrays too and arranged into rows in bulk by build(), which keeps
+    rows built before and is called by lookups if needed.
+    """
+
+    def __init__(self):
+        self.__offsets: array = array('q', [0])
+        self.__universities: array = array('b')
+        self.__profiles: array = array('i')
+        self.__scores: array = array('i')
+        # applications added since the last build, in order of addition
+        self.__pending_students: array = array('i')
+        self.__pending_universities: array = array('b')
+        self.__pending_profiles: array = array('i')
+        self.__pending_scores: array = array('i')
+
+    def add(self, student: int, university: int, profile: int, score: int) -> NoReturn:
+        self.__pending_students.append(student)
+        self.__pending_universities.append(university)
+        self.__pending_profiles.append(profile)
+        self.__pending_scores.append(score)
+
+    def build(self) -> int:
+        """Arranges applications added since the last build into rows, returns number of ignored repeated ones"""
+        if not self.__pending_students:
+            return 0
+        number_of_rows: int = len(self.__offsets) - 1
+        number_of_students: int = max(number_of_rows, max(self.__pending_students) + 1)
+        # stable sort keeps order of addition of applications of each student
+        order: List[int] = sorted(range(len(self.__pending_students)), key=self.__pending_students.__getitem__)
+
+        offsets: array = array('q', [0])
+        universities: array = array('b')
+        profiles: array = array('i')
+        scores: array = array('i')
+        repeated: int = 0
+        position: int = 0
+        for student in range(number_of_students):
+            entries: List[Tuple[int, int, int]] = []
+            if student < number_of_rows:
+                start, end = self.__offsets[student], self.__offsets[student + 1]
+                entries.extend(zip(self.__universities[start: end], self.__profiles[start: end],
+                                   self.__scores[start: end]))
+            while position < len(order) and self.__pending_students[order[position]] == student:
+                i: int = order[position]
+                entries.append((self.__pending_universities[i], self.__pending_profiles[i], self.__pending_scores[i]))
+                position += 1
+
+            if len(entries) > 1:
+                # rows built before are already grouped, so regrouping them with new entries keeps their order
+                grouped: Dict[int, Dict[int, int]] = {}
+                for university, profile, score in entries:
+                    university_profiles: Dict[int, int] = grouped.setdefault(university, {})
+                    if profile in university_profiles:
+                        repeated += 1
+                    else:
+                        university_profiles[profile] = score
+                entries = [(university, profile, score) for university, university_profiles in grouped.items()
+                           for profile, score in university_profiles.items()]
+            for university, profile, score in entries:
+                universities.append(university)
+                profiles.append(profile)
+                scores.append(score)
+            offsets.append(len(scores))
+
+        self.__offsets, self.__universities, self.__profiles, self.__scores = offsets, universities, profiles, scores
+        self.__pending_students = array('i')
+        self.__pending_universities = array('b')
+        self.__pending_profiles = array('i')
+        self.__pending_scores = array('i')
+        return repeated
+
+    def get(self, student: int) -> Iterator[Tuple[int, int, int]]:
+        """University, profile and score numbers of all applications of student"""
+        self.build()
+        if student + 1 >= len(self.__offsets):
+            return iter([])
+        start, end = self.__offsets[student], self.__offsets[student + 1]
+        return zip(self.__universities[start: end], self.__profiles[start: end], self.__scores[start: end])
+
+    def get_score(self, student: int, university: int, profile: int) -> Optional[int]:
+        """Score of application of student to profile, None if student didn't apply"""
+        self.build()
+        if student + 1 >= len(self.__offsets):
+            return None
+        for i in range(self.__offsets[student], self.__offsets[student + 1]):
+            if self.__universities[i] == university and self.__profiles[i] == profile:
+                return self.__scores[i]
+        return None
+
+    def has_applications(self, student: int) -> bool:
+        self.build()
+        return student + 1 < len(self.__offsets) and self.__offsets[student + 1] > self.__offsets[student]
+
+    def __len__(self) -> int:
+        """Number of applications, not counting repeated ones after build"""
+        return len(self.__scores) + len(self.__pending_scores)
@@ -0,0 +1,202 @@
+from enum import Enum
+
+from src.core import Profile, StudentId, University
+from src.application.service import ApplicationService
+from src.utils.logger import CustomLogger
+
+from array import array
+from os import makedirs
+from os.path import join
+from typing import Dict, Iterable, Iterator, List, NoReturn, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class ExportFormat(Enum):
+    ARROW = "arrow"
+    PARQUET = "parquet"
+
+
+class ColumnarTables:
+    """
+    Normalized service dataset (applications, agreements, listed students and profiles) kept as typed columns.
+    Numeric columns are packed into arrays once, DataFrames and Arrow batches are views over these buffers,
+    universities and profiles are dictionary encoded. Export requires 'pyarrow' package.
+    """
+
+    APPLICATIONS: str = 'applications'
+    AGREEMENTS: str = 'agreements'
+    LISTED: str = 'listed'
+    PROFILES: str = 'profiles'
+
+    __logger: CustomLogger = CustomLogger('ColumnarTables')
+
+    def __init__(self, service: ApplicationService):
+        self.__universities: List[str] = [university.name for university in University]
+        self.__profiles: List[str] = []
+        profile_codes: Dict[str, int] = {}
+
+        def profile_code(profile: Profile) -> int:
+            return profile_codes.setdefault(str(profile), len(profile_codes))
+
+        places: Dict[University, Dict[Profile, int]] = service.get_places_details()
+        min_scores: Dict[University, Dict[Profile, int]] = service.get_min_scores()
+        positions: Dict[University, Dict[Profile, Dict[StudentId, int]]] = service.get_all_current_positions()
+
+        # applications of each profile form a contiguous slice, which is written as a separate batch
+        self.__applications_bounds: List[int] = [0]
+        self.__applications_ids: List[str] = []
+        self.__applications_columns: Dict[str, array] = {
+            'university': array('i'), 'profile': array('i'), 'position': array('i'),
+            'score': array('i'), 'agreement_submitted': array('B'), 'applicable': array('B')
+        }
+        self.__profiles_columns: Dict[str, array] = {
+            'university': array('i'), 'profile': array('i'), 'places': array('i'), 'min_score': array('i'),
+            'applications': array('i'), 'agreements': array('i')
+        }
+        for university, profile in service.get_loaded_profiles():
+            university_code: int = self.__universities.index(university.name)
+            code: int = profile_code(profile)
+            columns: Dict[str, array] = self.__applications_columns
+            profile_positions: Dict[StudentId, int] = positions[university][profile]
+            # student is counted in university if it has no agreement or agreement is submitted to it
+            applicable, _ = service.get_profile_flags(university, profile)
+            columns['applicable'].extend(applicable)
+            number_of_agreements: int = 0
+            for student in service.get_profile_students(university, profile):
+                self.__applications_ids.append(student.id.id)
+                columns['university'].append(university_code)
+                columns['profile'].append(code)
+                # current position as shown in reports, 0 if student is not counted in university
+                columns['position'].append(profile_positions.get(student.id, 0))
+                columns['score'].append(student.score)
+                columns['agreement_submitted'].append(student.agreement_submitted)
+                number_of_agreements += student.agreement_submitted
+            self.__applications_bounds.append(len(self.__applications_ids))
+
+            self.__profiles_columns['university'].append(university_code)
+            self.__profiles_columns['profile'].append(code)
+            self.__profiles_columns['places'].append(places[university][profile])
+            self.__profiles_columns['min_score'].append(min_scores[university][profile])
+            self.__profiles_columns['applications'].append(self.__applications_bounds[-1] -
+                                                           self.__applications_bounds[-2])
+            self.__profiles_columns['agreements'].append(number_of_agreements)
+
+        self.__agreements_ids: List[str] = []
+        self.__agreements_columns: Dict[str, array] = {'university': array('i'), 'profile': array('i')}
+        for student_id, agreement in service.get_agreements().items():
+            self.__agreements_ids.append(student_id.id)
+            self.__agreements_columns['university'].append(self.__universities.index(agreement.university.name))
+            self.__agreements_columns['profile'].append(profile_code(agreement.profile))
+
+        self.__listed_ids: List[str] = []
+        self.__listed_reasons: List[str] = []
+        self.__listed_columns: Dict[str, array] = {'university': array('i')}
+        for student_id, (university, reason) in service.get_listed_students().items():
+            self.__listed_ids.append(student_id.id)
+            self.__listed_reasons.append(reason)
+            self.__listed_columns['university'].append(self.__universities.index(university.name))
+
+        self.__profiles = list(profile_codes.keys())
+
+    def get_applications_frame(self) -> pd.DataFrame:
+        return self.__frame(self.__applications_ids, self.__applications_columns, 0, len(self.__applications_ids))
+
+    def get_agreements_frame(self) -> pd.DataFrame:
+        return self.__frame(self.__agreements_ids, self.__agreements_columns, 0, len(self.__agreements_ids))
+
+    def get_listed_frame(self) -> pd.DataFrame:
+        frame: pd.DataFrame = self.__frame(self.__listed_ids, self.__listed_columns, 0, len(self.__listed_ids))
+        frame['reason'] = self.__listed_reasons
+        return frame
+
+    def get_profiles_frame(self) -> pd.DataFrame:
+        return self.__frame(None, self.__profiles_columns, 0, len(self.__profiles_columns['profile']))
+
+    def export(self, dir_path: str, file_format: ExportFormat = ExportFormat.PARQUET) -> List[str]:
+        """
+        Writes all tables to dir_path, one file per table. Applications are streamed batch by batch
+        (one batch per profile), so no copy of the whole table is built. Returns paths of written files.
+        """
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise Exception(f"Package 'pyarrow' should be installed to export data in {file_format.value} format")
+
+        makedirs(dir_path, exist_ok=True)
+        tables: List[Tuple[str, Iterable]] = [
+            (ColumnarTables.APPLICATIONS, (
+                self.__batch(pa, self.__applications_ids, self.__applications_columns, start, end)
+                for start, end in zip(self.__applications_bounds, self.__applications_bounds[1:])
+            )),
+            (ColumnarTables.AGREEMENTS, [
+                self.__batch(pa, self.__agreements_ids, self.__agreements_columns, 0, len(self.__agreements_ids))
+            ]),
+            (ColumnarTables.LISTED, [
+                self.__batch(pa, self.__listed_ids, self.__listed_columns, 0, len(self.__listed_ids),
+                             {'reason': pa.array(self.__listed_reasons, type=pa.string())})
+            ]),
+            (ColumnarTables.PROFILES, [
+                self.__batch(pa, None, self.__profiles_columns, 0, len(self.__profiles_columns['profile']))
+            ])
+        ]
+
+        paths: List[str] = []
+        for table_name, batches in tables:
+            path: str = join(dir_path, f"{table_name}.{file_format.value}")
+            ColumnarTables.__write(pa, path, file_format, batches)
+            paths.append(path)
+        ColumnarTables.__logger.info("%s applications exported to %s.", len(self.__applications_ids), dir_path)
+        return paths
+
+    def __frame(self, ids: Optional[List[str]], columns: Dict[str, array], start: int, end: int) -> pd.DataFrame:
+        data: Dict = {}
+        if ids is not None:
+            data['student_id'] = ids[start: end]
+        for name, column in columns.items():
+            values: np.ndarray = ColumnarTables.__view(column)[start: end]
+            if name == 'university':
+                data[name] = pd.Categorical.from_codes(values, categories=self.__universities)
+            elif name == 'profile':
+                data[name] = pd.Categorical.from_codes(values, categories=self.__profiles)
+            else:
+                data[name] = values
+        return pd.DataFrame(data, copy=False)
+
+    def __batch(self, pa, ids: Optional[List[str]], columns: Dict[str, array], start: int, end: int,
+                extra_columns: Optional[Dict] = None):
+        arrays: Dict = {}
+        if ids is not None:
+            arrays['student_id'] = pa.array(ids[start: end], type=pa.string())
+        for name, column in columns.items():
+            values = pa.array(ColumnarTables.__view(column)[start: end])
+            if name == 'university':
+                values = pa.DictionaryArray.from_arrays(values, pa.array(self.__universities, type=pa.string()))
+            elif name == 'profile':
+                values = pa.DictionaryArray.from_arrays(values, pa.array(self.__profiles, type=pa.string()))
+            arrays[name] = values
+        arrays.update(extra_columns or {})
+        return pa.RecordBatch.from_pydict(arrays)
+
+    @staticmethod
+    def __view(column: array) -> np.ndarray:
+        """Numpy view sharing memory with column, flags are viewed as booleans"""
+        return np.frombuffer(column, dtype=np.bool_ if column.typecode == 'B' else np.int32)
+
+    @staticmethod
+    def __write(pa, path: str, file_format: ExportFormat, batches: Iterable) -> NoReturn:
+        # batches are built lazily, so schema is taken from the first one
+        batches: Iterator = iter(batches)
+        first_batch = next(batches, None)
+        schema = first_batch.schema if first_batch is not None else pa.schema([])
+        if file_format == ExportFormat.PARQUET:
+            import pyarrow.parquet as pq
+            writer = pq.ParquetWriter(path, schema)
+        else:
+            writer = pa.ipc.new_file(path, schema)
+        with writer:
+            if first_batch is not None:
+                writer.write_batch(first_batch)
+            for batch in batches:
+                writer.write_batch(batch)
@@ -0,0 +1,46 @@
+from src.core import StudentId, Student
+
+from array import array
+from collections.abc import Sequence
+from typing import List, NoReturn, Union
+
+
+class CompactStudents(Sequence):
+    """
+    Students list of profile kept as columns instead of Student objects: ids are looked up by interned indexes
+    and scores are read from arrays shared with service, only agreement and dormitory flags are kept here.
+    Students are built on access, so the list retains a couple of bytes per application.
+    """
+
+    def __init__(self, interned_ids: List[StudentId], indexes: array, scores: array):
+        self.__interned_ids: List[StudentId] = interned_ids
+        self.__indexes: array = indexes
+        self.__scores: array = scores
+        self.__agreements: bytearray = bytearray()
+        # -1 if dormitory requirement is unknown
+        self.__dormitory_requirements: array = array('b')
+
+    def append(self, student: Student) -> NoReturn:
+        """Adds flags of student, its interned index and score should be already added to shared arrays"""
+        self.__agreements.append(student.agreement_submitted)
+        self.__dormitory_requirements.append(
+            -1 if student.dormitory_requirement is None else student.dormitory_requirement
+        )
+
+    def __getitem__(self, position: Union[int, slice]) -> Union[Student, List[Student]]:
+        if isinstance(position, slice):
+            return [self.__build(i) for i in range(*position.indices(len(self)))]
+        return self.__build(position)
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self.__build(position)
+
+    def __len__(self) -> int:
+        return len(self.__agreements)
+
+    def __build(self, position: int) -> Student:
+        dormitory_requirement: int = self.__dormitory_requirements[position]
+        return Student(self.__interned_ids[self.__indexes[position]], self.__scores[position],
+                       bool(self.__agreements[position]),
+                       None if dormitory_requirement < 0 else bool(dormitory_requirement))
@@ -0,0 +1,132 @@
+from src.core import Profile, StudentId, University
+from src.application.history import HistoryStore
+from src.application.service import Agreement, ApplicationService
+from src.utils.logger import CustomLogger
+
+from datetime import datetime
+from heapq import nlargest
+import json
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+
+
+class SnapshotDiff:
+    """
+    Changes between two service states: agreement moves, new and withdrawn applications,
+    position changes and cut-off changes by profile. Both states are indexed once by hash maps
+    and joined by keys, so no per-student scans are made.
+    """
+
+    __logger: CustomLogger = CustomLogger('SnapshotDiff')
+
+    def __init__(self, before: ApplicationService, after: ApplicationService):
+        self.__before: ApplicationService = before
+        self.__after: ApplicationService = after
+
+    @staticmethod
+    def between_drops(history: HistoryStore, before: datetime, after: datetime) -> 'SnapshotDiff':
+        before_service: Optional[ApplicationService] = history.get_service_at(before)
+        after_service: Optional[ApplicationService] = history.get_service_at(after)
+        if before_service is None or after_service is None:
+            raise Exception(f"No data drops found for {before} and {after}")
+        return SnapshotDiff(before_service, after_service)
+
+    def iterate_changes(self) -> Iterator[Dict]:
+        """Yields changes one by one as JSON-ready records, each has 'type' field"""
+        yield from self.__min_scores_changes()
+        yield from self.__agreements_changes()
+        yield from self.__applications_changes()
+        yield from self.__positions_changes()
+
+    def get_top_position_movers(self, n: int) -> List[Dict]:
+        """Position changes with the largest absolute shift"""
+        return nlargest(n, self.__positions_changes(), key=lambda change: abs(change['delta']))
+
+    def write_json_lines(self, file: TextIO) -> int:
+        """Streams all changes to file as JSON Lines, returns number of written records"""
+        number_of_records: int = 0
+        for change in self.iterate_changes():
+            file.write(json.dumps(change, ensure_ascii=False))
+            file.write('\n')
+            number_of_records += 1
+        SnapshotDiff.__logger.info("%s changes written.", number_of_records)
+        return number_of_records
+
+    def __min_scores_changes(self) -> Iterator[Dict]:
+        before: Dict[University, Dict[Profile, int]] = self.__before.get_min_scores()
+        after: Dict[University, Dict[Profile, int]] = self.__after.get_min_scores()
+        for university in after.keys():
+            for profile, score in after[university].items():
+                old_score: Optional[int] = before.get(university, {}).get(profile)
+                if old_score != score:
+                    yield {
+                        'type': 'min_score_changed',
+                        'university': university.name, 'profile': str(profile),
+                        'before': old_score, 'after': score,
+                        'delta': score - old_score if old_score is not None else None
+                    }
+
+    def __agreements_changes(self) -> Iterator[Dict]:
+        before: Dict[StudentId, Agreement] = self.__before.get_agreements()
+        after: Dict[StudentId, Agreement] = self.__after.get_agreements()
+        for student_id, agreement in after.items():
+            old_agreement: Optional[Agreement] = before.get(student_id)
+            if old_agreement != agreement:
+                yield SnapshotDiff.__agreement_record(student_id, old_agreement, agreement)
+        for student_id, old_agreement in before.items():
+            if student_id not in after:
+                yield SnapshotDiff.__agreement_record(student_id, old_agreement, None)
+
+    def __applications_changes(self) -> Iterator[Dict]:
+        before: Dict[Tuple[StudentId, University, Profile], int] = SnapshotDiff.__applications_index(self.__before)
+        after: Dict[Tuple[StudentId, University, Profile], int] = SnapshotDiff.__applications_index(self.__after)
+        for key, score in after.items():
+            if key not in before:
+                yield SnapshotDiff.__application_record('application_added', key, score)
+        for key, score in before.items():
+            if key not in after:
+                yield SnapshotDiff.__application_record('application_withdrawn', key, score)
+
+    def __positions_changes(self) -> Iterator[Dict]:
+        before: Dict[University, Dict[Profile, Dict[StudentId, int]]] = self.__before.get_all_current_positions()
+        after: Dict[University, Dict[Profile, Dict[StudentId, int]]] = self.__after.get_all_current_positions()
+        for university in after.keys():
+            for profile, positions in after[university].items():
+                old_positions: Dict[StudentId, int] = before.get(university, {}).get(profile, {})
+                for student_id, position in positions.items():
+                    old_position: Optional[int] = old_positions.get(student_id)
+                    if old_position is not None and old_position != position:
+                        yield {
+                            'type': 'position_changed',
+                            'studentId': student_id.id, 'university': university.name, 'profile': str(profile),
+                            'before': old_position, 'after': position, 'delta': position - old_position
+                        }
+
+    @staticmethod
+    def __applications_index(service: ApplicationService) -> Dict[Tuple[StudentId, University, Profile], int]:
+        index: Dict[Tuple[StudentId, University, Profile], int] = {}
+        for university, profile in service.get_loaded_profiles():
+            for student in service.get_profile_students(university, profile):
+                index.setdefault((student.id, university, profile), student.score)
+        return index
+
+    @staticmethod
+    def __agreement_record(student_id: StudentId, before: Optional[Agreement], after: Optional[Agreement]) -> Dict:
+        return {
+            'type': 'agreement_moved',
+            'studentId': student_id.id,
+            'before': SnapshotDiff.__agreement_details(before),
+            'after': SnapshotDiff.__agreement_details(after)
+        }
+
+    @staticmethod
+    def __agreement_details(agreement: Optional[Agreement]) -> Optional[Dict]:
+        if agreement is None:
+            return None
+        return {'university': agreement.university.name, 'profile': str(agreement.profile)}
+
+    @staticmethod
+    def __application_record(change_type: str, key: Tuple[StudentId, University, Profile], score: int) -> Dict:
+        return {
+            'type': change_type,
+            'studentId': key[0].id, 'university': key[1].name, 'profile': str(key[2]), 'score': score
+        }
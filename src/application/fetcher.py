@@ -0,0 +1,233 @@
+from src.core import Profile, University
+from src.parsers.parser import FileExtension
+from src.utils.logger import CustomLogger
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import gzip
+import http.client
+import json
+import os
+from os.path import isfile, join
+import tempfile
+import threading
+from typing import Dict, List, NoReturn, Optional, Tuple
+from urllib.parse import urljoin, urlsplit, SplitResult
+
+
+@dataclass(frozen=True)
+class FetchSource:
+    url: str
+    university: University
+    profile: Profile
+    file_extension: FileExtension
+
+    @property
+    def file_name(self) -> str:
+        """Name following data files convention: '<UNIVERSITY>_<profile>[_<sub field>].<extension>'"""
+        profile: str = self.profile.id if self.profile.sub_field is None \
+            else f"{self.profile.id}_{self.profile.sub_field}"
+        return f"{self.university.name}_{profile}.{self.file_extension.value}"
+
+
+class _ConnectionPool:
+    """Keep-alive HTTP connections by host, shared by executor threads"""
+
+    def __init__(self, timeout: float):
+        self.__timeout: float = timeout
+        self.__idle: Dict[Tuple[str, str], List[http.client.HTTPConnection]] = {}
+        self.__lock: threading.Lock = threading.Lock()
+
+    def acquire(self, url: SplitResult) -> Tuple[http.client.HTTPConnection, bool]:
+        """Idle connection to host of url if there is one, new connection otherwise, and whether it was reused"""
+        with self.__lock:
+            idle: List[http.client.HTTPConnection] = self.__idle.get((url.scheme, url.netloc), [])
+            if idle:
+                return idle.pop(), True
+        return self.connect(url), False
+
+    def connect(self, url: SplitResult) -> http.client.HTTPConnection:
+        if url.scheme == 'https':
+            return http.client.HTTPSConnection(url.netloc, timeout=self.__timeout)
+        return http.client.HTTPConnection(url.netloc, timeout=self.__timeout)
+
+    def release(self, url: SplitResult, connection: http.client.HTTPConnection) -> NoReturn:
+        with self.__lock:
+            self.__idle.setdefault((url.scheme, url.netloc), []).append(connection)
+
+    def close(self) -> NoReturn:
+        with self.__lock:
+            for connections in self.__idle.values():
+                for connection in connections:
+                    connection.close()
+            self.__idle = {}
+
+
+class ListsFetcher:
+    """
+    Concurrent downloader of universities lists to data directory. Requests run in a pool of threads over
+    keep-alive connections, number of simultaneous requests to each host is limited. ETag and Last-Modified
+    of downloaded files are kept in a cache file, so unchanged lists are not downloaded again (conditional
+    requests) and not rewritten. Files are replaced atomically, so loader never sees a partially written file.
+    """
+
+    CACHE_FILE_NAME: str = '.fetch_cache.json'
+    MAX_REDIRECTS: int = 5
+
+    __logger: CustomLogger = CustomLogger('ListsFetcher')
+
+    def __init__(self, output_dir: str, max_connections_per_host: int = 4, timeout: float = 30.0):
+        if max_connections_per_host <= 0:
+            raise Exception(f"Number of connections per host should be positive, but {max_connections_per_host} found")
+        os.makedirs(output_dir, exist_ok=True)
+        self.__output_dir: str = output_dir
+        self.__max_connections_per_host: int = max_connections_per_host
+        self.__timeout: float = timeout
+        self.__cache_path: str = join(output_dir, ListsFetcher.CACHE_FILE_NAME)
+
+    @staticmethod
+    def load_sources(file_path: str) -> List[FetchSource]:
+        """
+        Sources from JSON file with list of objects with fields 'url', 'university' (name, e.g. 'MIREA'),
+        'profile', optional 'sub_field' and 'format' ('csv' or 'html')
+        """
+        with open(file_path, encoding='utf-8') as file:
+            return [
+                FetchSource(source['url'], University[source['university']],
+                            Profile(source['profile'], source.get('sub_field')), FileExtension(source['format']))
+                for source in json.load(file)
+            ]
+
+    def fetch(self, sources: List[FetchSource]) -> List[str]:
+        """Downloads all sources, returns names of files changed since the previous fetch in order of sources"""
+        return asyncio.run(self.fetch_async(sources))
+
+    async def fetch_async(self, sources: List[FetchSource]) -> List[str]:
+        file_names: List[str] = [source.file_name for source in sources]
+        duplicates: List[str] = sorted({name for name in file_names if file_names.count(name) > 1})
+        if duplicates:
+            raise Exception(f"Each file should be fetched from one source, but several sources found for {duplicates}")
+
+        cache: Dict[str, Dict[str, Optional[str]]] = self.__load_cache()
+        pool: _ConnectionPool = _ConnectionPool(self.__timeout)
+        limits: Dict[str, asyncio.Semaphore] = {
+            urlsplit(source.url).netloc: asyncio.Semaphore(self.__max_connections_per_host) for source in sources
+        }
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, min(32, len(sources)))) as executor:
+                changed: List[bool] = await asyncio.gather(*[
+                    self.__fetch_source(source, cache, pool, limits[urlsplit(source.url).netloc], executor)
+                    for source in sources
+                ])
+        finally:
+            pool.close()
+            self.__save_cache(cache)
+
+        changed_files: List[str] = [source.file_name for source, is_changed in zip(sources, changed) if is_changed]
+        ListsFetcher.__logger.info("%s of %s lists changed.", len(changed_files), len(sources))
+        return changed_files
+
+    async def __fetch_source(self, source: FetchSource, cache: Dict[str, Dict[str, Optional[str]]],
+                             pool: _ConnectionPool, limit: asyncio.Semaphore, executor: ThreadPoolExecutor) -> bool:
+        """Downloads source, returns whether its file changed. Failed downloads are logged and keep old file"""
+        file_name: str = source.file_name
+        file_path: str = join(self.__output_dir, file_name)
+        cached: Dict[str, Optional[str]] = cache.get(file_name, {})
+
+        headers: Dict[str, str] = {'Accept-Encoding': 'gzip'}
+        # validators are used only for the file they were received with
+        if isfile(file_path) and cached.get('url') == source.url:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        async with limit:
+            try:
+                status, response_headers, body = await asyncio.get_running_loop().run_in_executor(
+                    executor, ListsFetcher.__request, pool, source.url, headers
+                )
+            except (http.client.HTTPException, OSError) as e:
+                ListsFetcher.__logger.error("List %s was not fetched from %s: %s.", file_name, source.url, e)
+                return False
+
+        if status == 304:
+            ListsFetcher.__logger.debug("List %s is not modified.", file_name)
+            return False
+        if status != 200:
+            ListsFetcher.__logger.error("List %s was not fetched from %s: status %s.", file_name, source.url, status)
+            return False
+
+        cache[file_name] = {
+            'url': source.url,
+            'etag': response_headers.get('etag'),
+            'last_modified': response_headers.get('last-modified')
+        }
+        if isfile(file_path):
+            with open(file_path, 'rb') as file:
+                if file.read() == body:
+                    ListsFetcher.__logger.debug("List %s is downloaded, but not changed.", file_name)
+                    return False
+        self.__replace_file(file_path, body)
+        ListsFetcher.__logger.info("List %s fetched: %s bytes.", file_name, len(body))
+        return True
+
+    @staticmethod
+    def __request(pool: _ConnectionPool, url: str, headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        """GET following redirects, headers of response are lower case"""
+        for _ in range(ListsFetcher.MAX_REDIRECTS + 1):
+            split_url: SplitResult = urlsplit(url)
+            path: str = (split_url.path or '/') + (f"?{split_url.query}" if split_url.query else '')
+            connection, reused = pool.acquire(split_url)
+            try:
+                connection.request('GET', path, headers=headers)
+                response: http.client.HTTPResponse = connection.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionError):
+                connection.close()
+                if not reused:
+                    raise
+                # idle connection was closed by server, the request is repeated on a new one
+                connection = pool.connect(split_url)
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+            try:
+                body: bytes = response.read()
+            except (http.client.HTTPException, OSError):
+                connection.close()
+                raise
+            if response.will_close:
+                connection.close()
+            else:
+                pool.release(split_url, connection)
+
+            response_headers: Dict[str, str] = {name.lower(): value for name, value in response.getheaders()}
+            if response.status in (301, 302, 303, 307, 308) and 'location' in response_headers:
+                url = urljoin(url, response_headers['location'])
+                continue
+            if response_headers.get('content-encoding') == 'gzip':
+                body = gzip.decompress(body)
+            return response.status, response_headers, body
+        raise http.client.HTTPException(f"Too many redirects from {url}")
+
+    def __replace_file(self, file_path: str, content: bytes) -> NoReturn:
+        # temporary file is created in the same directory, so replacement does not cross file systems
+        with tempfile.NamedTemporaryFile('wb', dir=self.__output_dir, prefix='.', suffix='.part',
+                                         delete=False) as file:
+            file.write(content)
+            file.flush()
+            os.fsync(file.fileno())
+        try:
+            os.replace(file.name, file_path)
+        except OSError:
+            os.remove(file.name)
+            raise
+
+    def __load_cache(self) -> Dict[str, Dict[str, Optional[str]]]:
+        if not isfile(self.__cache_path):
+            return {}
+        with open(self.__cache_path, encoding='utf-8') as file:
+            return json.load(file)
+
+    def __save_cache(self, cache: Dict[str, Dict[str, Optional[str]]]) -> NoReturn:
+        self.__replace_file(self.__cache_path, json.dumps(cache, indent=2, sort_keys=True).encode('utf-8'))
@@ -0,0 +1,65 @@
+from src.parsers.parser import FileExtension
+from src.utils.logger import CustomLogger
+
+import json
+from os.path import isfile
+from typing import Dict, List, NoReturn, Optional
+
+
+class FormatCostModel:
+    """
+    Estimated parsing cost of each file format in seconds per megabyte of input.
+    Default values are rough measurements on sample data, benchmarks are expected to refresh them.
+    """
+
+    __logger: CustomLogger = CustomLogger('FormatCostModel')
+
+    DEFAULT_COSTS: Dict[FileExtension, float] = {
+        FileExtension.CSV: 0.05,
+        FileExtension.HTML: 1.5
+    }
+
+    def __init__(self, costs: Optional[Dict[FileExtension, float]] = None):
+        self.__costs: Dict[FileExtension, float] = dict(FormatCostModel.DEFAULT_COSTS)
+        if costs is not None:
+            self.__costs.update(costs)
+
+    def cost_of(self, extension: FileExtension) -> float:
+        return self.__costs.get(extension, max(self.__costs.values()))
+
+    def estimate(self, extension: FileExtension, file_size: int) -> float:
+        """Estimated parsing time in seconds for a file of provided size in bytes"""
+        return self.cost_of(extension) * file_size / (1024 * 1024)
+
+    def cheapest(self, candidates: Dict[FileExtension, int]) -> FileExtension:
+        """Chooses the cheapest format among candidates given as format -> file size in bytes"""
+        if not candidates:
+            raise Exception("At least one file format should be provided")
+        return min(candidates.keys(), key=lambda extension: (self.estimate(extension, candidates[extension]),
+                                                             self.cost_of(extension)))
+
+    def update(self, extension: FileExtension, cost: float) -> NoReturn:
+        self.__costs[extension] = cost
+
+    def save(self, file_path: str) -> NoReturn:
+        with open(file_path, 'w', encoding='utf-8') as file:
+            json.dump({extension.value: cost for extension, cost in self.__costs.items()}, file, indent=2)
+
+    @staticmethod
+    def load(file_path: str) -> 'FormatCostModel':
+        """Loads cost model saved by benchmarks, falls back to default costs if file not found"""
+        if not isfile(file_path):
+            FormatCostModel.__logger.warn("Format cost model %s not found: default costs used.", file_path)
+            return FormatCostModel()
+
+        with open(file_path, encoding='utf-8') as file:
+            raw_costs: Dict[str, float] = json.load(file)
+
+        costs: Dict[FileExtension, float] = {}
+        known_extensions: List[str] = [extension.value for extension in FileExtension]
+        for name, cost in raw_costs.items():
+            if name in known_extensions:
+                costs[FileExtension(name)] = float(cost)
+            else:
+                FormatCostModel.__logger.warn("Unknown file format %s in cost model: skipping.", name)
+        return FormatCostModel(costs)
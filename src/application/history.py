@@ -0,0 +1,219 @@
+from src.core import Profile, StudentId, Student, University
+from src.application.service import ApplicationService
+from src.utils.logger import CustomLogger
+
+from bisect import bisect_right
+from datetime import datetime
+from difflib import SequenceMatcher
+import json
+from os import makedirs
+from os.path import isfile, join
+from typing import Dict, Iterator, List, NoReturn, Optional, Tuple
+
+
+class TimelineState:
+    """State of all profiles at one data drop, in the form it is stored in history"""
+
+    def __init__(self):
+        self.profiles_order: List[Tuple[University, Profile]] = []
+        self.rows: Dict[Tuple[University, Profile], List[Tuple[str, int, bool]]] = {}
+        self.places: Dict[Tuple[University, Profile], int] = {}
+        self.listed: Dict[str, Tuple[University, str]] = {}
+        self.min_scores: Dict[Tuple[University, Profile], int] = {}
+
+    @staticmethod
+    def of(service: ApplicationService) -> 'TimelineState':
+        state: TimelineState = TimelineState()
+        places: Dict[University, Dict[Profile, int]] = service.get_places_details()
+        min_scores: Dict[University, Dict[Profile, int]] = service.get_min_scores()
+        for university, profile in service.get_loaded_profiles():
+            state.profiles_order.append((university, profile))
+            state.rows[(university, profile)] = [
+                (student.id.id, student.score, student.agreement_submitted)
+                for student in service.get_profile_students(university, profile)
+            ]
+            state.places[(university, profile)] = places[university][profile]
+            state.min_scores[(university, profile)] = min_scores[university][profile]
+        state.listed = {student_id.id: details for student_id, details in service.get_listed_students().items()}
+        return state
+
+    def to_service(self) -> ApplicationService:
+        service: ApplicationService = ApplicationService()
+        service.add_listed_students({StudentId(student_id): details for student_id, details in self.listed.items()})
+        places: Dict[University, Dict[Profile, int]] = {}
+        for university, profile in self.profiles_order:
+            service.add_profile_students_data(university, profile, [
+                Student(StudentId(student_id), score, agreement_submitted)
+                for student_id, score, agreement_submitted in self.rows[(university, profile)]
+            ])
+            places.setdefault(university, {})[profile] = self.places[(university, profile)]
+        service.add_places_details(places)
+        return service
+
+    def delta_to(self, other: 'TimelineState') -> Dict:
+        """Changes required to turn this state into other one"""
+        delta: Dict = {}
+        if other.profiles_order != self.profiles_order:
+            delta['order'] = [TimelineState.encode_profile(key) for key in other.profiles_order]
+
+        profiles_edits: List = []
+        for key in other.profiles_order:
+            old_rows: List[Tuple[str, int, bool]] = self.rows.get(key, [])
+            new_rows: List[Tuple[str, int, bool]] = other.rows[key]
+            if old_rows == new_rows:
+                continue
+            edits: List = [
+                [i1, i2, new_rows[j1: j2]]
+                for tag, i1, i2, j1, j2 in SequenceMatcher(None, old_rows, new_rows, autojunk=False).get_opcodes()
+                if tag != 'equal'
+            ]
+            profiles_edits.append([TimelineState.encode_profile(key), edits])
+        if profiles_edits:
+            delta['profiles'] = profiles_edits
+
+        places: List = [[TimelineState.encode_profile(key), n_places] for key, n_places in other.places.items()
+                        if self.places.get(key) != n_places]
+        if places:
+            delta['places'] = places
+
+        min_scores: List = [[TimelineState.encode_profile(key), score] for key, score in other.min_scores.items()
+                            if self.min_scores.get(key) != score]
+        if min_scores:
+            delta['min_scores'] = min_scores
+
+        listed_added: List = [[student_id, university.name, reason]
+                              for student_id, (university, reason) in other.listed.items()
+                              if self.listed.get(student_id) != (university, reason)]
+        listed_removed: List[str] = [student_id for student_id in self.listed.keys() if student_id not in other.listed]
+        if listed_added or listed_removed:
+            delta['listed'] = {'added': listed_added, 'removed': listed_removed}
+        return delta
+
+    def apply(self, delta: Dict) -> NoReturn:
+        if 'order' in delta:
+            self.profiles_order = [TimelineState.decode_profile(key) for key in delta['order']]
+
+        for encoded_key, edits in delta.get('profiles', []):
+            key: Tuple[University, Profile] = TimelineState.decode_profile(encoded_key)
+            old_rows: List[Tuple[str, int, bool]] = self.rows.get(key, [])
+            new_rows: List[Tuple[str, int, bool]] = []
+            position: int = 0
+            for i1, i2, rows in edits:
+                new_rows.extend(old_rows[position: i1])
+                new_rows.extend((row[0], row[1], row[2]) for row in rows)
+                position = i2
+            new_rows.extend(old_rows[position:])
+            self.rows[key] = new_rows
+
+        for encoded_key, n_places in delta.get('places', []):
+            self.places[TimelineState.decode_profile(encoded_key)] = n_places
+        for encoded_key, score in delta.get('min_scores', []):
+            self.min_scores[TimelineState.decode_profile(encoded_key)] = score
+
+        if 'listed' in delta:
+            for student_id, university, reason in delta['listed']['added']:
+                self.listed[student_id] = (University[university], reason)
+            for student_id in delta['listed']['removed']:
+                del self.listed[student_id]
+
+        # profiles missing from the current drop are forgotten
+        current_profiles = set(self.profiles_order)
+        for key in self.profiles_order:
+            self.rows.setdefault(key, [])
+        for data in [self.rows, self.places, self.min_scores]:
+            for key in [key for key in data.keys() if key not in current_profiles]:
+                del data[key]
+
+    @staticmethod
+    def encode_profile(key: Tuple[University, Profile]) -> List[Optional[str]]:
+        return [key[0].name, key[1].id, key[1].sub_field]
+
+    @staticmethod
+    def decode_profile(value: List[Optional[str]]) -> Tuple[University, Profile]:
+        return University[value[0]], Profile(value[1], value[2])
+
+
+class HistoryStore:
+    """
+    History of successive data drops stored on disk as an append-only log of deltas.
+    Each drop writes only changed applications, places, cut-offs and listings, so storage grows with changes.
+    """
+
+    TIMELINE_FILE_NAME: str = 'timeline.jsonl'
+
+    __logger: CustomLogger = CustomLogger('HistoryStore')
+
+    def __init__(self, dir_path: str):
+        makedirs(dir_path, exist_ok=True)
+        self.__timeline_path: str = join(dir_path, HistoryStore.TIMELINE_FILE_NAME)
+        self.__timestamps: List[datetime] = []
+        self.__state: TimelineState = TimelineState()
+        # cut-off values by profile for each drop where profile was present
+        self.__min_scores_trends: Dict[Tuple[University, Profile], List[Tuple[datetime, int]]] = {}
+
+        for timestamp, delta in self.__read_timeline():
+            self.__state.apply(delta)
+            self.__register_drop(timestamp)
+        HistoryStore.__logger.info("%s data drops found in history %s.", len(self.__timestamps), dir_path)
+
+    def ingest(self, service: ApplicationService, timestamp: Optional[datetime] = None) -> int:
+        """Appends current service state as a new drop, returns number of changed profiles"""
+        timestamp = timestamp if timestamp is not None else datetime.now()
+        if self.__timestamps and timestamp <= self.__timestamps[-1]:
+            raise Exception(f"Drop time should be after {self.__timestamps[-1]}, but {timestamp} found")
+
+        new_state: TimelineState = TimelineState.of(service)
+        delta: Dict = self.__state.delta_to(new_state)
+        with open(self.__timeline_path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps({'timestamp': timestamp.isoformat(), 'delta': delta}, ensure_ascii=False,
+                                  separators=(',', ':')))
+            file.write('\n')
+
+        self.__state = new_state
+        self.__register_drop(timestamp)
+        changed_profiles: int = len(delta.get('profiles', []))
+        HistoryStore.__logger.info("Drop %s stored: %s profiles changed.", timestamp, changed_profiles)
+        return changed_profiles
+
+    def get_timestamps(self) -> List[datetime]:
+        return list(self.__timestamps)
+
+    def get_service_at(self, timestamp: datetime) -> Optional[ApplicationService]:
+        """Service restored from the last drop made not later than timestamp"""
+        index: int = bisect_right(self.__timestamps, timestamp) - 1
+        if index < 0:
+            HistoryStore.__logger.warn("No data drops found before %s.", timestamp)
+            return None
+        if index == len(self.__timestamps) - 1:
+            return self.__state.to_service()
+
+        state: TimelineState = TimelineState()
+        for drop_index, (_, delta) in enumerate(self.__read_timeline()):
+            state.apply(delta)
+            if drop_index == index:
+                break
+        return state.to_service()
+
+    def get_applications_details_at(self, student_id: StudentId, timestamp: datetime) -> \
+            List[Tuple[University, Profile, int, int, int, int]]:
+        """Position, places, score and cut-off for all applications of student as they were at timestamp"""
+        service: Optional[ApplicationService] = self.get_service_at(timestamp)
+        return service.get_applications_details_for(student_id) if service is not None else []
+
+    def get_min_score_trend(self, university: University, profile: Profile) -> List[Tuple[datetime, int]]:
+        """Cut-off of profile at each drop where profile was present"""
+        return list(self.__min_scores_trends.get((university, profile), []))
+
+    def __register_drop(self, timestamp: datetime) -> NoReturn:
+        self.__timestamps.append(timestamp)
+        for key, score in self.__state.min_scores.items():
+            self.__min_scores_trends.setdefault(key, []).append((timestamp, score))
+
+    def __read_timeline(self) -> Iterator[Tuple[datetime, Dict]]:
+        if not isfile(self.__timeline_path):
+            return
+        with open(self.__timeline_path, encoding='utf-8') as file:
+            for line in file:
+                if line.strip():
+                    record: Dict = json.loads(line)
+                    yield datetime.fromisoformat(record['timestamp']), record['delta']
@@ -0,0 +1,94 @@
+from src.core import StudentId
+
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+import re
+from typing import List, NoReturn
+
+_SEPARATORS = re.compile(r'[\W_]+')
+_NOT_DIGITS = re.compile(r'\D+')
+
+
+class StudentIdIndex:
+    """
+    Prefix index of student ids for partial lookup and autocomplete. Each id is indexed by two keys:
+    the id without separators (only letters and digits, case folded) and only its digits, so that
+    '123-456', '123 456' and '123456' find SNILS '123-456-789 01' as well as 'MIREA № 123456'.
+    Keys are kept sorted in a single string with offsets, prefix lookup is a binary search.
+    Ids added after the last build are merged into sorted keys on the next lookup.
+    """
+
+    def __init__(self):
+        self.__student_ids: List[StudentId] = []
+        # sorted keys concatenated, key i is keys[offsets[i]: offsets[i + 1]]
+        self.__keys: str = ''
+        self.__offsets: array = array('q', [0])
+        # number of student id in student_ids for each sorted key
+        self.__key_students: array = array('i')
+        # keys added since the last build and numbers of their student ids
+        self.__pending_keys: List[str] = []
+        self.__pending_students: array = array('i')
+
+    def add(self, student_id: StudentId) -> NoReturn:
+        """Adds id of student to index, id should not be added twice"""
+        number: int = len(self.__student_ids)
+        self.__student_ids.append(student_id)
+        for key in StudentIdIndex.__keys_of(student_id.id):
+            self.__pending_keys.append(key)
+            self.__pending_students.append(number)
+
+    def build(self) -> NoReturn:
+        """Merges ids added since the last build into sorted keys, called by lookup if needed"""
+        if not self.__pending_keys:
+            return
+        keys: List[str] = [self.__key(i) for i in range(len(self.__key_students))] + self.__pending_keys
+        key_students: array = self.__key_students + self.__pending_students
+        self.__pending_keys = []
+        self.__pending_students = array('i')
+
+        # keys are already a sorted run followed by new ones, so sorting is close to a single merge
+        order: List[int] = sorted(range(len(keys)), key=keys.__getitem__)
+        sorted_keys: List[str] = [keys[i] for i in order]
+        self.__keys = ''.join(sorted_keys)
+        self.__offsets = array('q', accumulate(map(len, sorted_keys), initial=0))
+        self.__key_students = array('i', map(key_students.__getitem__, order))
+
+    def complete(self, prefix: str, limit: int = 10) -> List[StudentId]:
+        """
+        Up to limit ids having a key starting with prefix, in order of keys. Separators and case in prefix
+        are ignored, empty prefix matches nothing.
+        """
+        query: str = StudentIdIndex.__compact(prefix)
+        if not query or limit <= 0:
+            return []
+        self.build()
+
+        found: List[StudentId] = []
+        found_numbers = set()
+        position: int = bisect_left(range(len(self.__key_students)), query, key=self.__key)
+        while position < len(self.__key_students) and len(found) < limit:
+            if not self.__key(position).startswith(query):
+                break
+            number: int = self.__key_students[position]
+            if number not in found_numbers:
+                found_numbers.add(number)
+                found.append(self.__student_ids[number])
+            position += 1
+        return found
+
+    def __len__(self) -> int:
+        return len(self.__student_ids)
+
+    def __key(self, position: int) -> str:
+        return self.__keys[self.__offsets[position]: self.__offsets[position + 1]]
+
+    @staticmethod
+    def __compact(value: str) -> str:
+        return _SEPARATORS.sub('', value.casefold())
+
+    @staticmethod
+    def __keys_of(student_id: str) -> List[str]:
+        compact: str = StudentIdIndex.__compact(student_id)
+        digits: str = _NOT_DIGITS.sub('', compact)
+        return [compact, digits] if digits and digits != compact else [compact]
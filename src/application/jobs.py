@@ -0,0 +1,258 @@
+from enum import Enum
+
+from src.core import StudentId
+from src.application.loader import DataLoader
+from src.application.report_cache import ReportCache
+from src.application.service import ApplicationService
+from src.application.visualizer import DataVisualizer, ReportType
+from src.utils.logger import CustomLogger
+
+from contextlib import closing
+from dataclasses import dataclass
+from multiprocessing import Process
+import os
+import sqlite3
+import time
+from typing import Dict, List, NoReturn, Optional
+
+
+class JobStatus(Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+@dataclass(frozen=True)
+class ReportJob:
+    id: int
+    student_id: StudentId
+    report_type: ReportType
+    output_dir: str
+    status: JobStatus
+    attempts: int
+    error: Optional[str]
+    competitors_overlaps: bool
+
+
+class ReportJobQueue:
+    """
+    Durable queue of report jobs stored in SQLite database, safe to use from several processes.
+    Failed jobs are retried until the number of attempts is exhausted, each retry is delayed twice as long
+    as the previous one, starting from retry_delay seconds.
+    """
+
+    DEFAULT_MAX_ATTEMPTS: int = 3
+    DEFAULT_RETRY_DELAY: float = 5.0
+
+    # start of the next attempt of a failed job by its start time and retry delay: the delay doubles with attempts
+    __RETRY_TIME: str = "? + ? * (1 << MAX(attempts - 1, 0))"
+
+    def __init__(self, db_path: str, retry_delay: float = DEFAULT_RETRY_DELAY):
+        if retry_delay < 0:
+            raise Exception(f"Retry delay should be non-negative, but {retry_delay} found")
+        self.__db_path: str = db_path
+        self.__retry_delay: float = retry_delay
+        with closing(self.__connect()) as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "student_id TEXT NOT NULL, "
+                "report_type TEXT NOT NULL, "
+                "output_dir TEXT NOT NULL, "
+                "status TEXT NOT NULL, "
+                "attempts INTEGER NOT NULL DEFAULT 0, "
+                "max_attempts INTEGER NOT NULL, "
+                "error TEXT, "
+                "worker TEXT, "
+                "updated_at REAL NOT NULL, "
+                "not_before REAL NOT NULL DEFAULT 0, "
+                "competitors_overlaps INTEGER NOT NULL DEFAULT 0)"
+            )
+            # queues created by earlier versions lack later columns
+            columns: List[str] = [row[1] for row in connection.execute("PRAGMA table_info(jobs)")]
+            for column, definition in [('not_before', 'REAL NOT NULL DEFAULT 0'),
+                                       ('competitors_overlaps', 'INTEGER NOT NULL DEFAULT 0')]:
+                if column not in columns:
+                    connection.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+            connection.execute("CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, report_type, id)")
+
+    def submit(self, student_id: StudentId, report_type: ReportType, output_dir: str,
+               max_attempts: int = DEFAULT_MAX_ATTEMPTS, competitors_overlaps: bool = False) -> int:
+        with closing(self.__connect()) as connection:
+            cursor = connection.execute(
+                "INSERT INTO jobs (student_id, report_type, output_dir, status, max_attempts, updated_at, "
+                "competitors_overlaps) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (student_id.id, report_type.name, output_dir, JobStatus.PENDING.value, max_attempts, time.time(),
+                 competitors_overlaps)
+            )
+            return cursor.lastrowid
+
+    def get_job(self, job_id: int) -> Optional[ReportJob]:
+        with closing(self.__connect()) as connection:
+            row = ReportJobQueue.__select_job(connection, job_id)
+        return ReportJobQueue.__to_job(row) if row is not None else None
+
+    def count_by_status(self) -> Dict[JobStatus, int]:
+        counts: Dict[JobStatus, int] = {status: 0 for status in JobStatus}
+        with closing(self.__connect()) as connection:
+            for status, count in connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"):
+                counts[JobStatus(status)] = count
+        return counts
+
+    def acquire(self, worker: str, preferred_types: List[ReportType]) -> Optional[ReportJob]:
+        """
+        Atomically takes the oldest pending job of the first report type in preferred order that has one
+        ready to run (not delayed for retry). Workers rotate preferred order, so long FULL jobs can't starve
+        BRIEF ones and vice versa. Returned job is already running and counts the new attempt.
+        """
+        connection = self.__connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            now: float = time.time()
+            for report_type in preferred_types:
+                row = connection.execute(
+                    "SELECT id FROM jobs WHERE status = ? AND report_type = ? AND not_before <= ? "
+                    "ORDER BY id LIMIT 1",
+                    (JobStatus.PENDING.value, report_type.name, now)
+                ).fetchone()
+                if row is not None:
+                    connection.execute(
+                        "UPDATE jobs SET status = ?, attempts = attempts + 1, worker = ?, updated_at = ? WHERE id = ?",
+                        (JobStatus.RUNNING.value, worker, now, row[0])
+                    )
+                    row = ReportJobQueue.__select_job(connection, row[0])
+                    connection.execute("COMMIT")
+                    return ReportJobQueue.__to_job(row)
+            connection.execute("COMMIT")
+            return None
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.close()
+
+    def complete(self, job_id: int) -> NoReturn:
+        with closing(self.__connect()) as connection:
+            connection.execute("UPDATE jobs SET status = ?, error = NULL, updated_at = ? WHERE id = ?",
+                               (JobStatus.DONE.value, time.time(), job_id))
+
+    def fail(self, job_id: int, error: str, retry: bool = True) -> NoReturn:
+        """
+        Returns job to queue for a delayed retry or marks it failed if no attempts left or retry makes no sense
+        """
+        with closing(self.__connect()) as connection:
+            connection.execute(
+                "UPDATE jobs SET status = CASE WHEN ? AND attempts < max_attempts THEN ? ELSE ? END, "
+                f"error = ?, updated_at = ?, not_before = {ReportJobQueue.__RETRY_TIME} WHERE id = ?",
+                (retry, JobStatus.PENDING.value, JobStatus.FAILED.value, error, time.time(),
+                 time.time(), self.__retry_delay, job_id)
+            )
+
+    def requeue_stale(self, timeout_seconds: float) -> int:
+        """Returns jobs of workers that died while running them back to queue, retries are delayed as for failures"""
+        with closing(self.__connect()) as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts < max_attempts THEN ? ELSE ? END, "
+                f"error = 'worker timed out', updated_at = ?, not_before = {ReportJobQueue.__RETRY_TIME} "
+                "WHERE status = ? AND updated_at < ?",
+                (JobStatus.PENDING.value, JobStatus.FAILED.value, time.time(), time.time(), self.__retry_delay,
+                 JobStatus.RUNNING.value, time.time() - timeout_seconds)
+            )
+            return cursor.rowcount
+
+    @staticmethod
+    def __select_job(connection: sqlite3.Connection, job_id: int):
+        return connection.execute(
+            "SELECT id, student_id, report_type, output_dir, status, attempts, error, competitors_overlaps "
+            "FROM jobs WHERE id = ?",
+            (job_id,)
+        ).fetchone()
+
+    def __connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.__db_path, timeout=30, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    @staticmethod
+    def __to_job(row) -> ReportJob:
+        return ReportJob(row[0], StudentId(row[1]), ReportType[row[2]], row[3], JobStatus(row[4]), row[5], row[6],
+                         bool(row[7]))
+
+
+def run_report_worker(worker: str, queue_path: str, data_dir: str, cache_dir: Optional[str] = None,
+                      stop_when_idle: bool = False, poll_interval: float = 1.0,
+                      retry_delay: float = ReportJobQueue.DEFAULT_RETRY_DELAY) -> NoReturn:
+    """
+    Loads data once and generates reports for jobs from queue until no jobs are pending, including delayed ones
+    (if stop_when_idle)
+    """
+    logger: CustomLogger = CustomLogger(f"ReportWorker-{worker}")
+    queue: ReportJobQueue = ReportJobQueue(queue_path, retry_delay)
+
+    service: ApplicationService = ApplicationService()
+    DataLoader(service).load_data(data_dir)
+    visualizer: DataVisualizer = DataVisualizer(service, ReportCache(cache_dir) if cache_dir else None)
+    logger.info("Worker %s is ready.", worker)
+
+    preferred_types: List[ReportType] = list(ReportType)
+    while True:
+        job: Optional[ReportJob] = queue.acquire(worker, preferred_types)
+        if job is None:
+            # jobs delayed for retry are still waited for
+            if stop_when_idle and queue.count_by_status()[JobStatus.PENDING] == 0:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        # the other report type goes first next time
+        preferred_types = [t for t in preferred_types if t != job.report_type] + [job.report_type]
+        try:
+            os.makedirs(job.output_dir, exist_ok=True)
+            if visualizer.get_report_for(job.student_id, job.report_type, output_dir=job.output_dir,
+                                         competitors_overlaps=job.competitors_overlaps):
+                queue.complete(job.id)
+                logger.info("Job %s for student [id=%s] done.", job.id, job.student_id)
+            else:
+                queue.fail(job.id, "student not found", retry=False)
+                logger.warn("Job %s for student [id=%s] failed: student not found.", job.id, job.student_id)
+        except Exception as e:
+            queue.fail(job.id, str(e))
+            logger.error("Job %s for student [id=%s] failed at attempt %s: %s.", job.id, job.student_id,
+                         job.attempts, str(e))
+
+
+class ReportWorkerPool:
+    """Pool of long-lived worker processes, each of them loads data once and takes jobs from the shared queue"""
+
+    def __init__(self, queue_path: str, data_dir: str, n_workers: int, cache_dir: Optional[str] = None,
+                 retry_delay: float = ReportJobQueue.DEFAULT_RETRY_DELAY):
+        if n_workers <= 0:
+            raise Exception(f"Number of workers should be positive, but {n_workers} found")
+        self.__queue_path: str = queue_path
+        self.__data_dir: str = data_dir
+        self.__n_workers: int = n_workers
+        self.__cache_dir: Optional[str] = cache_dir
+        self.__retry_delay: float = retry_delay
+        self.__processes: List[Process] = []
+
+    def start(self, stop_when_idle: bool = False) -> NoReturn:
+        for i in range(self.__n_workers):
+            process = Process(
+                target=run_report_worker,
+                args=(f"{os.getpid()}-{i}", self.__queue_path, self.__data_dir, self.__cache_dir, stop_when_idle,
+                      1.0, self.__retry_delay),
+                daemon=True
+            )
+            process.start()
+            self.__processes.append(process)
+
+    def join(self) -> NoReturn:
+        for process in self.__processes:
+            process.join()
+        self.__processes = []
+
+    def stop(self) -> NoReturn:
+        for process in self.__processes:
+            process.terminate()
+        self.join()
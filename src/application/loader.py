@@ -1,60 +1,176 @@
 from os import listdir
-from os.path import isdir, isfile, join, abspath
+from os.path import isdir, isfile, join, abspath, getsize
 import inspect
 
 from src.core import Profile, StudentId, Student, University
-from src.parsers import Parser
+from src.parsers import Parser, ParserDetector
+from src.parsers.parser import FileExtension
+from src.application.formats import FormatCostModel
 from src.application.service import ApplicationService
-from src.utils.logger import CustomLogger
+from src.utils import CustomLogger, MemoryTracker, open_data_file, strip_compression_suffix
 
+from contextlib import nullcontext
 import csv
-from typing import Dict, List, Tuple
+from typing import ContextManager, Dict, List, Optional, Tuple
 
 
 class DataLoader:
 
     __logger: CustomLogger = CustomLogger('DataLoader')
 
-    def __init__(self, service: ApplicationService):
+    def __init__(self, service: ApplicationService, cost_model: Optional[FormatCostModel] = None,
+                 cross_validate_formats: bool = False, memory_tracker: Optional[MemoryTracker] = None,
+                 check_snils_checksum: bool = False):
+        """
+        If cost model is provided, profile given in several file formats is loaded from the format that is the cheapest
+        to parse, otherwise from the first of them supported by parser. If cross_validate_formats is set, all formats
+        of such profile are parsed and loading fails if they disagree.
+        If memory tracker is provided, memory retained and peak allocation of each loading stage are tracked.
+        If check_snils_checksum is set, applications with SNILS having wrong control number are skipped.
+        """
         self.__parsers = {}
         for parserClass in self.__all_subclasses(Parser):
             if not inspect.isabstract(parserClass):
-                parser = parserClass()
+                parser = parserClass(check_snils_checksum)
                 self.__register_parser(parser)
+        self.__detector: ParserDetector = ParserDetector(list(self.__parsers.values()))
         self.__service = service
-
-    def load_data(self, dir_path: str):
+        self.__cost_model: Optional[FormatCostModel] = cost_model
+        self.__cross_validate_formats: bool = cross_validate_formats
+        self.__memory_tracker: Optional[MemoryTracker] = memory_tracker
+
+    def load_data(self, dir_path: str, chunk_size: Optional[int] = None):
+        """
+        Loads all supported files from directory. If chunk_size is provided, files are parsed incrementally
+        and ingested by chunks of at most chunk_size students, which service keeps as compact columns.
+        Hidden files are never loaded. Profiles already uploaded to service are skipped, so changed files
+        of a loaded directory should be loaded with the whole directory into a new service.
+        """
         if not isdir(dir_path):
             raise Exception(f"Files directory should be provided, but {dir_path} found")
 
-        files: List[str] = [f for f in listdir(dir_path) if isfile(join(dir_path, f))]
+        files: List[str] = [f for f in listdir(dir_path) if isfile(join(dir_path, f)) and not f.startswith('.')]
+
+        listed_students_files: List[str] = [f for f in files if strip_compression_suffix(f) == 'ALREADY_LISTED.csv']
+        for listed_students_file in listed_students_files:
+            with self.__stage('listed students loading'):
+                listed_students: Dict[StudentId, Tuple[University, str]] = DataLoader.__load_listed_students(
+                    abspath(join(dir_path, listed_students_file))
+                )
+                self.__service.add_listed_students(listed_students)
+
+        with self.__stage('formats detection'):
+            profile_files: Dict[Tuple[University, Profile], Dict[FileExtension, str]] = \
+                self.__group_profile_files(dir_path, [f for f in files if f not in listed_students_files])
+        for (university, profile), files_by_format in profile_files.items():
+            if self.__service.is_profile_application_uploaded(university, profile):
+                DataLoader.__logger.warn(
+                    "Students for profile %s in university %s already uploaded: skipping files %s.",
+                    profile, university, list(files_by_format.values())
+                )
+                continue
 
-        if 'ALREADY_LISTED.csv' in files:
-            listed_students: Dict[StudentId, Tuple[University, str]] = DataLoader.__load_listed_students(
-                abspath(join(dir_path, 'ALREADY_LISTED.csv'))
-            )
-            self.__service.add_listed_students(listed_students)
+            parser: Parser = self.__parsers[university]
+            file_extension: FileExtension = self.__choose_format(parser, dir_path, files_by_format)
+            file: str = files_by_format[file_extension]
+            for other_file in [f for extension, f in files_by_format.items() if extension != file_extension]:
+                DataLoader.__logger.info(
+                    "Profile %s in university %s is loaded from file %s: skipping file %s.",
+                    profile, university, file, other_file
+                )
+
+            if self.__cross_validate_formats and len(files_by_format) > 1:
+                with self.__stage('formats validation'):
+                    self.__validate_formats_agree(university, profile, parser, dir_path, files_by_format)
+
+            with self.__stage(f"{file_extension.value} profiles loading"):
+                if chunk_size is not None:
+                    self.__service.add_profile_students_chunks(
+                        university, profile,
+                        parser.parse_in_chunks(university, abspath(join(dir_path, file)), chunk_size, file_extension)
+                    )
+                else:
+                    students: List[Student] = parser.parse(university, abspath(join(dir_path, file)),
+                                                           file_extension)
+                    self.__service.add_profile_students_data(university, profile, students)
+
+        with self.__stage('indexes building'):
+            self.__service.build_indexes()
+
+    def __group_profile_files(self, dir_path: str,
+                              files: List[str]) -> Dict[Tuple[University, Profile], Dict[FileExtension, str]]:
+        """
+        Groups files detected by headers by university and profile, keeping one file per format.
+        Profiles are ordered by university, then by format in order of support by parser, then by file order.
+        """
+        detected_files: Dict[University, List[Tuple[str, FileExtension]]] = {
+            university: [] for university in University
+        }
+        for file in files:
+            detected: Optional[Tuple[Parser, FileExtension]] = self.__detector.detect(abspath(join(dir_path, file)))
+            if detected is None:
+                DataLoader.__logger.warn("Format of file %s is not recognized: skipping file.", file)
+                continue
+            detected_files[detected[0].for_university()].append((file, detected[1]))
 
-        for university in University:
-            if university not in self.__parsers:
+        profile_files: Dict[Tuple[University, Profile], Dict[FileExtension, str]] = {}
+        for university, university_files in detected_files.items():
+            if not university_files:
                 continue
+            supported_extensions: List[FileExtension] = self.__parsers[university].supported_file_extensions()
+            university_files.sort(key=lambda detected_file: supported_extensions.index(detected_file[1]))
+            for file, file_extension in university_files:
+                profile: Profile = DataLoader.__extract_profile(file, university, file_extension)
+                files_by_format: Dict[FileExtension, str] = profile_files.setdefault((university, profile), {})
+                if file_extension in files_by_format:
+                    DataLoader.__logger.warn(
+                        "Students for profile %s in university %s already found in file %s: skipping file %s.",
+                        profile, university, files_by_format[file_extension], file
+                    )
+                else:
+                    files_by_format[file_extension] = file
+        return profile_files
 
-            parser: Parser = self.__parsers[university]
-            for file_extension in parser.supported_file_extensions():
-                for file in [f for f in files if f.startswith(university.name) and f.endswith(file_extension.value)]:
-                    file_parts: List[str] = file.split('_')
-                    profile = Profile(file_parts[1][: file_parts[1].index("." + file_extension.value)]) \
-                        if len(file_parts) == 2 \
-                        else Profile(file_parts[1], file_parts[2][: file_parts[2].index("." + file_extension.value)])
-
-                    if self.__service.is_profile_application_uploaded(university, profile):
-                        DataLoader.__logger.warn(
-                            "Students for profile %s in university %s already uploaded: skipping file %s.",
-                            profile, university, file
-                        )
-                    else:
-                        students: List[Student] = parser.parse(university, abspath(join(dir_path, file)))
-                        self.__service.add_profile_students_data(university, profile, students)
+    @staticmethod
+    def __extract_profile(file: str, university: University, file_extension: FileExtension) -> Profile:
+        suffix: str = "." + file_extension.value
+        uncompressed_file: str = strip_compression_suffix(file)
+        file_name: str = uncompressed_file[: -len(suffix)] if uncompressed_file.endswith(suffix) \
+            else uncompressed_file.rsplit('.', 1)[0]
+        file_parts: List[str] = file_name.split('_')
+        if file_parts[0] != university.name or len(file_parts) < 2:
+            DataLoader.__logger.warn("File %s doesn't follow naming convention: profile %s used.", file, file_name)
+            return Profile(file_name)
+        return Profile(file_parts[1]) if len(file_parts) == 2 else Profile(file_parts[1], file_parts[2])
+
+    def __choose_format(self, parser: Parser, dir_path: str,
+                        files_by_format: Dict[FileExtension, str]) -> FileExtension:
+        if self.__cost_model is not None:
+            return self.__cost_model.cheapest(
+                {extension: getsize(join(dir_path, f)) for extension, f in files_by_format.items()}
+            )
+        return next((extension for extension in parser.supported_file_extensions() if extension in files_by_format),
+                    next(iter(files_by_format.keys())))
+
+    def __validate_formats_agree(self, university: University, profile: Profile, parser: Parser, dir_path: str,
+                                 files_by_format: Dict[FileExtension, str]):
+        parsed: Dict[FileExtension, List[Tuple[str, int, bool]]] = {}
+        for extension, file in files_by_format.items():
+            parsed[extension] = sorted(
+                (student.id.id, student.score, student.agreement_submitted)
+                for student in parser.parse(university, abspath(join(dir_path, file)), extension)
+            )
+
+        reference_extension: FileExtension = next(iter(parsed.keys()))
+        for extension, students in parsed.items():
+            if students != parsed[reference_extension]:
+                mismatches: int = len(set(students).symmetric_difference(parsed[reference_extension]))
+                raise Exception(f"Files {files_by_format[reference_extension]} and {files_by_format[extension]} "
+                                f"for profile {profile} in university {university} disagree in {mismatches} "
+                                f"applications")
+
+    def __stage(self, name: str) -> ContextManager:
+        return self.__memory_tracker.stage(name) if self.__memory_tracker is not None else nullcontext()
 
     def __all_subclasses(self, cls):
         return set(cls.__subclasses__()).union(
@@ -68,7 +184,7 @@ class DataLoader:
     @staticmethod
     def __load_listed_students(file_path: str) -> Dict[StudentId, Tuple[University, str]]:
         listed_students: Dict[StudentId, Tuple[University, str]] = {}
-        with open(file_path, encoding='utf-8') as file:
+        with open_data_file(file_path, encoding='utf-8') as file:
             reader = csv.reader(file, delimiter=';')
             headers = next(reader)
 
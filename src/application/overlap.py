@@ -0,0 +1,70 @@
+from src.core import Profile, StudentId, University
+from src.application.service import ApplicationService
+from src.utils.logger import CustomLogger
+
+from itertools import combinations
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class CompetitorOverlap:
+    """
+    Shared competition between applications of a student. For each application the set of competitors
+    ahead of the student (counted in current position) is a packed bitset held in an integer, so overlap
+    of any two profiles is a single AND of two integers. Competitors are interned per student, bits cover
+    only competitors of that student, and applicability is read from service masks at the moment of the query,
+    so a single instance serves all reports over the service.
+    """
+
+    __logger: CustomLogger = CustomLogger('CompetitorOverlap')
+
+    def __init__(self, service: ApplicationService):
+        self.__service: ApplicationService = service
+
+    def get_overlaps_for(self, student_id: StudentId,
+                         applications_details: Optional[List[Tuple[University, Profile, int, int, int, int]]] = None) \
+            -> List[Tuple[University, Profile, University, Profile, int, int, int]]:
+        """
+        Pairwise overlaps for all applications of student where student is counted: both applications,
+        numbers of competitors ahead in each of them and number of competitors ahead in both.
+        Applications details of student already fetched from service can be passed to avoid computing them again.
+        """
+        if applications_details is None:
+            applications_details = self.__service.get_applications_details_for(student_id)
+        applications: List[Tuple[University, Profile]] = [(details[0], details[1]) for details in applications_details]
+        competitor_indexes: Dict[StudentId, int] = {}
+        ahead: Dict[Tuple[University, Profile], List[int]] = {
+            application: self.__get_competitors_ahead(student_id, *application, competitor_indexes)
+            for application in applications
+        }
+        bitsets: Dict[Tuple[University, Profile], int] = {
+            application: CompetitorOverlap.__pack(indexes, len(competitor_indexes))
+            for application, indexes in ahead.items()
+        }
+
+        overlaps: List[Tuple[University, Profile, University, Profile, int, int, int]] = []
+        for first, second in combinations(applications, 2):
+            overlaps.append((*first, *second, bitsets[first].bit_count(), bitsets[second].bit_count(),
+                             (bitsets[first] & bitsets[second]).bit_count()))
+        CompetitorOverlap.__logger.debug("%s overlaps computed for student id=%s.", len(overlaps), student_id)
+        return overlaps
+
+    def __get_competitors_ahead(self, student_id: StudentId, university: University, profile: Profile,
+                                competitor_indexes: Dict[StudentId, int]) -> List[int]:
+        """Interned indexes of competitors counted before student in profile, new competitors are interned"""
+        applicable, listed = self.__service.get_profile_flags(university, profile)
+        indexes: List[int] = []
+        for student, student_applicable, student_listed in \
+                zip(self.__service.get_profile_students(university, profile), applicable, listed):
+            if student.id == student_id:
+                break
+            if student_applicable and not student_listed:
+                indexes.append(competitor_indexes.setdefault(student.id, len(competitor_indexes)))
+        return indexes
+
+    @staticmethod
+    def __pack(indexes: List[int], width: int) -> int:
+        bits: np.ndarray = np.zeros(width, dtype=np.bool_)
+        bits[indexes] = True
+        return int.from_bytes(np.packbits(bits, bitorder='little').tobytes(), 'little')
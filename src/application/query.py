@@ -0,0 +1,144 @@
+from src.core import Profile, University
+from src.application.columns import ColumnarTables
+
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class ApplicationsFilter:
+    """
+    Conditions on applications, unset conditions match everything. Student-level conditions
+    (agreement, listed, applied_to_all) are checked against all applications of the student.
+    """
+    universities: Optional[FrozenSet[University]] = None
+    profiles: Optional[FrozenSet[Profile]] = None
+    min_score: Optional[int] = None
+    max_score: Optional[int] = None
+    # student has submitted agreement to any university
+    has_agreement: Optional[bool] = None
+    listed: Optional[bool] = None
+    # student is counted in this university: has no agreement or agreement is submitted to it
+    applicable: Optional[bool] = None
+    # student applied to each of these universities
+    applied_to_all: FrozenSet[University] = field(default_factory=frozenset)
+
+
+class ApplicationsQuery:
+    """
+    Ad-hoc queries over all applications. Tables are indexed once, each filter is compiled to a boolean mask
+    over flat application columns, so a query makes no per-application Python calls.
+    """
+
+    COLUMNS: List[str] = ['student_id', 'university', 'profile', 'position', 'score', 'agreement_submitted',
+                          'has_agreement', 'listed', 'applicable']
+
+    def __init__(self, tables: ColumnarTables):
+        applications: pd.DataFrame = tables.get_applications_frame()
+        self.__universities: List[str] = list(applications['university'].cat.categories)
+        self.__profiles: Dict[str, int] = {
+            profile: code for code, profile in enumerate(applications['profile'].cat.categories)
+        }
+
+        self.__student_ids: np.ndarray = applications['student_id'].to_numpy(dtype=object)
+        self.__university_codes: np.ndarray = applications['university'].cat.codes.to_numpy()
+        self.__profile_codes: np.ndarray = applications['profile'].cat.codes.to_numpy()
+        self.__positions: np.ndarray = applications['position'].to_numpy()
+        self.__scores: np.ndarray = applications['score'].to_numpy()
+        self.__agreement_submitted: np.ndarray = applications['agreement_submitted'].to_numpy()
+        self.__applicable: np.ndarray = applications['applicable'].to_numpy()
+
+        # students are interned, so student-level flags are looked up by index
+        self.__student_codes, students = pd.factorize(applications['student_id'])
+        self.__number_of_students: int = len(students)
+        has_agreement: np.ndarray = np.zeros(self.__number_of_students, dtype=np.bool_)
+        indexes: np.ndarray = students.get_indexer(tables.get_agreements_frame()['student_id'])
+        has_agreement[indexes[indexes >= 0]] = True
+        listed: np.ndarray = np.zeros(self.__number_of_students, dtype=np.bool_)
+        indexes = students.get_indexer(tables.get_listed_frame()['student_id'])
+        listed[indexes[indexes >= 0]] = True
+
+        self.__has_agreement: np.ndarray = has_agreement[self.__student_codes]
+        self.__listed: np.ndarray = listed[self.__student_codes]
+
+    def select(self, applications_filter: ApplicationsFilter = ApplicationsFilter(),
+               columns: Optional[List[str]] = None, order_by: Optional[str] = None, descending: bool = True,
+               limit: Optional[int] = None) -> pd.DataFrame:
+        """
+        Applications matching filter with chosen columns (all by default). If limit is set together
+        with order_by, only top rows are selected and sorted instead of the whole result.
+        """
+        columns = columns if columns is not None else ApplicationsQuery.COLUMNS
+        for column in columns + ([order_by] if order_by is not None else []):
+            if column not in ApplicationsQuery.COLUMNS:
+                raise Exception(f"Unknown column {column}, expected one of {ApplicationsQuery.COLUMNS}")
+
+        rows: np.ndarray = np.flatnonzero(self.__compile(applications_filter))
+        if order_by is not None:
+            keys: np.ndarray = self.__column(order_by, rows)
+            if order_by in ['student_id', 'university', 'profile']:
+                order: np.ndarray = np.argsort(keys, kind='stable')
+                order = order[::-1] if descending else order
+            else:
+                keys = -keys.astype(np.int64) if descending else keys
+                if limit is not None and 0 < limit < len(rows):
+                    # only rows up to the limit-th key are sorted, ties are kept in the original order
+                    threshold = np.partition(keys, limit - 1)[limit - 1]
+                    candidates: np.ndarray = np.flatnonzero(keys <= threshold)
+                    order = candidates[np.argsort(keys[candidates], kind='stable')]
+                else:
+                    order = np.argsort(keys, kind='stable')
+            rows = rows[order]
+        if limit is not None:
+            rows = rows[:limit]
+
+        result: pd.DataFrame = pd.DataFrame({column: self.__column(column, rows) for column in columns})
+        result.index += 1
+        return result
+
+    def count(self, applications_filter: ApplicationsFilter = ApplicationsFilter()) -> int:
+        return int(np.count_nonzero(self.__compile(applications_filter)))
+
+    def __compile(self, applications_filter: ApplicationsFilter) -> np.ndarray:
+        mask: np.ndarray = np.ones(len(self.__scores), dtype=np.bool_)
+        if applications_filter.universities is not None:
+            mask &= np.isin(self.__university_codes,
+                            [self.__universities.index(u.name) for u in applications_filter.universities])
+        if applications_filter.profiles is not None:
+            mask &= np.isin(self.__profile_codes, [self.__profiles[str(profile)]
+                                                   for profile in applications_filter.profiles
+                                                   if str(profile) in self.__profiles])
+        if applications_filter.min_score is not None:
+            mask &= self.__scores >= applications_filter.min_score
+        if applications_filter.max_score is not None:
+            mask &= self.__scores <= applications_filter.max_score
+        if applications_filter.has_agreement is not None:
+            mask &= self.__has_agreement == applications_filter.has_agreement
+        if applications_filter.listed is not None:
+            mask &= self.__listed == applications_filter.listed
+        if applications_filter.applicable is not None:
+            mask &= self.__applicable == applications_filter.applicable
+        for university in applications_filter.applied_to_all:
+            applied: np.ndarray = np.zeros(self.__number_of_students, dtype=np.bool_)
+            applied[self.__student_codes[self.__university_codes == self.__universities.index(university.name)]] = \
+                True
+            mask &= applied[self.__student_codes]
+        return mask
+
+    def __column(self, column: str, rows: np.ndarray) -> np.ndarray:
+        if column == 'university':
+            return np.array(self.__universities, dtype=object)[self.__university_codes[rows]]
+        if column == 'profile':
+            return np.array(list(self.__profiles.keys()), dtype=object)[self.__profile_codes[rows]]
+        return {
+            'student_id': self.__student_ids,
+            'position': self.__positions,
+            'score': self.__scores,
+            'agreement_submitted': self.__agreement_submitted,
+            'has_agreement': self.__has_agreement,
+            'listed': self.__listed,
+            'applicable': self.__applicable
+        }[column][rows]
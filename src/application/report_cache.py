@@ -0,0 +1,98 @@
+from src.utils.logger import CustomLogger
+
+import hashlib
+import json
+import os
+from os import listdir, makedirs
+from os.path import getmtime, join
+import shutil
+from typing import Any, Dict, List, NoReturn
+
+
+class ReportCache:
+    """
+    Content-addressed storage of generated PDF reports. Reports are keyed by digest of all render inputs,
+    so a report is regenerated only when its content changes. The least recently used reports are evicted
+    when number of cached reports exceeds the limit.
+    """
+
+    DEFAULT_MAX_ENTRIES: int = 1000
+
+    __logger: CustomLogger = CustomLogger('ReportCache')
+
+    def __init__(self, cache_dir: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        if max_entries <= 0:
+            raise Exception(f"Number of cached reports should be positive, but {max_entries} found")
+        makedirs(cache_dir, exist_ok=True)
+        self.__cache_dir: str = cache_dir
+        self.__max_entries: int = max_entries
+        self.__hits: int = 0
+        self.__misses: int = 0
+
+    @staticmethod
+    def digest(inputs: Dict[str, Any]) -> str:
+        """Stable digest of render inputs, enums and data classes are taken by their string values"""
+        serialized: str = json.dumps(ReportCache.__canonical(inputs), ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+    def fetch(self, digest: str, target_path: str) -> bool:
+        """Copies cached report to target path, returns False if not cached"""
+        cached_path: str = self.__path_of(digest)
+        try:
+            # access time is tracked by modification time of cached report, copies of it keep their own times
+            os.utime(cached_path)
+            shutil.copyfile(cached_path, target_path)
+        except FileNotFoundError:
+            # report may be evicted by another worker sharing the cache at any moment
+            self.__misses += 1
+            return False
+
+        self.__hits += 1
+        ReportCache.__logger.debug("Cached report %s reused for %s.", digest, target_path)
+        return True
+
+    def store(self, digest: str, report_path: str) -> NoReturn:
+        # report is copied next to its cached path and renamed, so other workers never see a partial file
+        temporary_path: str = f"{self.__path_of(digest)}.{os.getpid()}.tmp"
+        shutil.copyfile(report_path, temporary_path)
+        os.replace(temporary_path, self.__path_of(digest))
+        self.__evict()
+
+    def get_statistics(self) -> Dict[str, int]:
+        return {'hits': self.__hits, 'misses': self.__misses, 'entries': len(self.__cached_files())}
+
+    def __path_of(self, digest: str) -> str:
+        return join(self.__cache_dir, f"{digest}.pdf")
+
+    def __cached_files(self) -> List[str]:
+        return [f for f in listdir(self.__cache_dir) if f.endswith('.pdf')]
+
+    def __evict(self) -> NoReturn:
+        access_times: Dict[str, float] = {}
+        for file in self.__cached_files():
+            try:
+                access_times[file] = getmtime(join(self.__cache_dir, file))
+            except FileNotFoundError:
+                # already evicted by another worker
+                continue
+        if len(access_times) <= self.__max_entries:
+            return
+        cached_files: List[str] = sorted(access_times.keys(), key=lambda f: access_times[f])
+        for file in cached_files[: len(cached_files) - self.__max_entries]:
+            try:
+                os.remove(join(self.__cache_dir, file))
+                ReportCache.__logger.debug("Cached report %s evicted.", file)
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def __canonical(value: Any) -> Any:
+        if isinstance(value, dict):
+            # keys of students lists are tuples, so dictionaries are stored as sorted lists of pairs
+            return sorted(([ReportCache.__canonical(k), ReportCache.__canonical(v)] for k, v in value.items()),
+                          key=lambda pair: json.dumps(pair[0], ensure_ascii=False, default=str))
+        if isinstance(value, (list, tuple)):
+            return [ReportCache.__canonical(item) for item in value]
+        if isinstance(value, (str, int, float, bool)) or value is None:
+            return value
+        return str(value)
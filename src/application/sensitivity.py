@@ -0,0 +1,81 @@
+from src.core import Profile, StudentId, University
+from src.application.service import ApplicationService
+
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+class PlacesSensitivity:
+    """
+    Cut-offs of profiles for ranges of place counts. Scores of students counted in each profile are selected
+    from service score arrays once, so cut-offs for any number of place counts are looked up at once instead
+    of reloading places details. Selected scores are dropped when service data changes.
+    """
+
+    def __init__(self, service: ApplicationService):
+        self.__service: ApplicationService = service
+        self.__ranked_scores: Dict[Tuple[University, Profile], np.ndarray] = {}
+        self.__service_version: int = service.get_version()
+
+    def get_table(self, places: Union[Sequence[int], Dict[Tuple[University, Profile], Sequence[int]]],
+                  student_id: Optional[StudentId] = None) -> pd.DataFrame:
+        """
+        Cut-off for each profile and each place count, one row per pair. Place counts are either shared
+        by all profiles or given by profile. If student is provided, only profiles where student is counted
+        are evaluated, and student position and admission status are added; place counts given by profile
+        should then cover all of these profiles.
+        """
+        positions: Dict[Tuple[University, Profile], int] = {}
+        if student_id is not None:
+            for university, profile, position, _, _, _ in self.__service.get_applications_details_for(student_id):
+                positions[(university, profile)] = position
+            profiles: List[Tuple[University, Profile]] = list(positions.keys())
+            if isinstance(places, dict):
+                missing: List[str] = [f"{university.name} {profile}" for university, profile in profiles
+                                      if (university, profile) not in places]
+                if missing:
+                    raise Exception(f"Place counts for profiles {', '.join(missing)} where student "
+                                    f"[id={student_id}] is counted should be provided")
+        elif isinstance(places, dict):
+            profiles = list(places.keys())
+        else:
+            profiles = self.__service.get_loaded_profiles()
+
+        columns: Dict[str, List[np.ndarray]] = {'university': [], 'profile': [], 'places': [], 'min_score': []}
+        if student_id is not None:
+            columns.update({'position': [], 'admitted': []})
+        for key in profiles:
+            profile_places: np.ndarray = np.asarray(places[key] if isinstance(places, dict) else places,
+                                                    dtype=np.int64)
+            columns['university'].append(np.full(len(profile_places), key[0].name, dtype=object))
+            columns['profile'].append(np.full(len(profile_places), str(key[1]), dtype=object))
+            columns['places'].append(profile_places)
+            columns['min_score'].append(self.__get_min_scores(key, profile_places))
+            if student_id is not None:
+                columns['position'].append(np.full(len(profile_places), positions[key], dtype=np.int64))
+                columns['admitted'].append(positions[key] <= profile_places)
+
+        return pd.DataFrame({
+            name: np.concatenate(values) if values else np.empty(0) for name, values in columns.items()
+        })
+
+    def __get_min_scores(self, key: Tuple[University, Profile], places: np.ndarray) -> np.ndarray:
+        """Same cut-off rules as the service: 0 for no places, -1 for no students, last score for few students"""
+        scores: np.ndarray = self.__get_ranked_scores(key)
+        if len(scores) == 0:
+            return np.where(places == 0, 0, -1)
+        return np.where(places == 0, 0, scores[np.clip(places, 1, len(scores)) - 1])
+
+    def __get_ranked_scores(self, key: Tuple[University, Profile]) -> np.ndarray:
+        if self.__service.get_version() != self.__service_version:
+            self.__ranked_scores.clear()
+            self.__service_version = self.__service.get_version()
+        if key not in self.__ranked_scores:
+            university, profile = key
+            applicable, listed = self.__service.get_profile_flags(university, profile)
+            counted: np.ndarray = np.frombuffer(applicable, dtype=np.bool_) & ~np.frombuffer(listed, dtype=np.bool_)
+            scores: np.ndarray = np.frombuffer(self.__service.get_profile_scores(university, profile), dtype=np.int32)
+            self.__ranked_scores[key] = scores[counted].astype(np.int64)
+        return self.__ranked_scores[key]
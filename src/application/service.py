@@ -1,9 +1,15 @@
 from src.core import Profile, StudentId, Student, University
+from src.application.applications_index import ApplicationsIndex
+from src.application.compact_students import CompactStudents
+from src.application.id_index import StudentIdIndex
+from src.application.spill import SpillingStudentsStore
 from src.utils.logger import CustomLogger
+from src.utils.memory import deep_sizeof
 
+from array import array
 from dataclasses import dataclass
 from statistics import mean, median, quantiles
-from typing import Dict, List, NoReturn, Optional, Tuple
+from typing import Dict, Iterable, List, NoReturn, Optional, Sequence, Tuple
 
 
 @dataclass(eq=True, order=True)
@@ -14,60 +20,250 @@ class Agreement:
 
 class ApplicationService:
 
-    def __init__(self):
+    def __init__(self, max_resident_students: Optional[int] = None, spill_dir: Optional[str] = None):
+        """
+        If max_resident_students is provided, service works in memory-bounded mode: students lists of profiles
+        beyond this budget are spilled to spill_dir (temporary directory by default) and paged in on access.
+        Positions, cut-offs and statistics are computed from interned indexes and scores kept in memory,
+        so only queries returning students of a profile page its list in.
+        """
         self.__university_to_profiles: Dict[University, List[Profile]] = {}
+        # profiles in order of upload, later agreements override earlier ones
+        self.__loaded_profiles: List[Tuple[University, Profile]] = []
         self.__all_students_data: Dict[University, Dict[Profile, List[Student]]] = {}
+        self.__students_store: Optional[SpillingStudentsStore] = \
+            SpillingStudentsStore(max_resident_students, spill_dir) if max_resident_students is not None else None
         # if not found, no agreement submitted at the moment
         self.__student_to_agreement: Dict[StudentId, Agreement] = {}
         # if not found, student is still in process of admission
         self.__listed_students: Dict[StudentId, University] = {}
-        # all applications of each student with certain exam score
-        self.__student_applications: Dict[StudentId, Dict[University, Dict[Profile, int]]] = {}
+        self.__listed_students_reasons: Dict[StudentId, str] = {}
+        # all applications of each student with certain exam score, rows are indexed by interned index of student,
+        # universities by their number in University and profiles by their number in university_to_profiles
+        self.__student_applications: ApplicationsIndex = ApplicationsIndex()
+        self.__universities: List[University] = list(University)
+        self.__university_numbers: Dict[University, int] = {
+            university: number for number, university in enumerate(self.__universities)
+        }
+        # prefix index of ids of students with applications for partial lookup
+        self.__students_index: StudentIdIndex = StudentIdIndex()
         # number of places in university
         self.__university_places_details: Dict[University, Dict[Profile, int]] = {}
+        # interned index of each known student, masks below are indexed by it
+        self.__student_indexes: Dict[StudentId, int] = {}
+        # student id of each interned index
+        self.__interned_ids: List[StudentId] = []
+        # interned indexes of students in each profile, in the same order as students data
+        self.__profile_student_indexes: Dict[University, Dict[Profile, array]] = {}
+        # scores of students in each profile, in the same order as students data: positions, cut-offs and
+        # statistics are computed from indexes and scores, so they never page in spilled students lists
+        self.__profile_scores: Dict[University, Dict[Profile, array]] = {}
+        # 1 if student has no agreement or agreement is submitted to university, kept up to date with agreements
+        self.__applicable_masks: Dict[University, bytearray] = {}
+        # 1 if student is already listed
+        self.__listed_mask: bytearray = bytearray()
+        # 1 if student applied to at least one profile
+        self.__registered_mask: bytearray = bytearray()
+        # changed by every update of service data, so results derived from it can be checked for staleness
+        self.__version: int = 0
 
         for university in University:
             self.__university_to_profiles[university]: List[Profile] = []
-            self.__all_students_data[university]: Dict[Profile, List[Student]] = {}
+            self.__all_students_data[university]: Dict[Profile, List[Student]] = \
+                self.__students_store.profiles_of(university) if self.__students_store is not None else {}
             self.__university_places_details[university]: Dict[Profile, int] = {}
+            self.__profile_student_indexes[university]: Dict[Profile, array] = {}
+            self.__profile_scores[university]: Dict[Profile, array] = {}
+            self.__applicable_masks[university] = bytearray()
 
         self.__logger: CustomLogger = CustomLogger(self.__class__.__name__)
 
     def add_profile_students_data(self, university: University, profile: Profile, data: List[Student]) -> NoReturn:
+        self.__version += 1
         self.__university_to_profiles[university].append(profile)
+        self.__loaded_profiles.append((university, profile))
         self.__all_students_data[university][profile]: List[Student] = data
+        self.__profile_student_indexes[university][profile] = array('i')
+        self.__profile_scores[university][profile] = array('i')
         self.__university_places_details[university][profile]: int = 0
+        profile_number: int = self.__university_to_profiles[university].index(profile)
         for student in data:
-            if student.agreement_submitted:
-                self.__student_to_agreement[student.id] = Agreement(university, profile)
-            if student.id in self.__student_applications:
-                if university in self.__student_applications[student.id]:
-                    if profile in self.__student_applications[student.id][university]:
-                        self.__logger.debug(
-                            "Student id=%s is already registered for profile %s in university %s.",
-                            student.id, profile, university
-                        )
-                    else:
-                        self.__student_applications[student.id][university][profile] = student.score
-                else:
-                    self.__student_applications[student.id][university] = {profile: student.score}
-            else:
-                self.__student_applications[student.id] = {university: {profile: student.score}}
+            self.__register_student_application(university, profile, profile_number, student)
+
+    def add_profile_students_chunks(self, university: University, profile: Profile,
+                                    chunks: Iterable[List[Student]]) -> NoReturn:
+        """
+        Ingests students of profile chunk by chunk, as they are parsed. Students are not kept as objects:
+        each chunk is written to interned indexes, scores and flags arrays and dropped, students list
+        of profile is a view over these arrays. So memory retained per application is a few bytes on top
+        of interned ids of students, and parsing doesn't hold more than one chunk of students at once.
+        """
+        self.__version += 1
+        self.__university_to_profiles[university].append(profile)
+        self.__loaded_profiles.append((university, profile))
+        self.__profile_student_indexes[university][profile] = array('i')
+        self.__profile_scores[university][profile] = array('i')
+        self.__university_places_details[university][profile]: int = 0
+        students: CompactStudents = CompactStudents(self.__interned_ids,
+                                                    self.__profile_student_indexes[university][profile],
+                                                    self.__profile_scores[university][profile])
+        profile_number: int = self.__university_to_profiles[university].index(profile)
+        for chunk in chunks:
+            for student in chunk:
+                self.__register_student_application(university, profile, profile_number, student)
+                students.append(student)
+        self.__all_students_data[university][profile] = students
+
+    def __register_student_application(self, university: University, profile: Profile, profile_number: int,
+                                       student: Student) -> NoReturn:
+        index: int = self.__intern_student(student.id)
+        self.__profile_student_indexes[university][profile].append(index)
+        self.__profile_scores[university][profile].append(student.score)
+        if student.agreement_submitted:
+            self.__set_agreement(student.id, Agreement(university, profile))
+        self.__student_applications.add(index, self.__university_numbers[university], profile_number, student.score)
+        if not self.__registered_mask[index]:
+            self.__registered_mask[index] = 1
+            self.__students_index.add(student.id)
 
     def add_places_details(self, places_details: Dict[University, Dict[Profile, int]]) -> NoReturn:
+        self.__version += 1
         for university in places_details.keys():
             for profile, n_places in places_details[university].items():
                 self.__university_places_details[university][profile] = n_places
 
     def add_listed_students(self, data: Dict[StudentId, Tuple[University, str]]) -> NoReturn:
+        self.__version += 1
         for student_id, agreement in data.items():
             university: University = agreement[0]
-            self.__student_to_agreement[student_id] = Agreement(university, Profile(f"listed by {agreement[1]}"))
+            self.__set_agreement(student_id, Agreement(university, Profile(f"listed by {agreement[1]}")))
             self.__listed_students[student_id] = university
+            self.__listed_mask[self.__student_indexes[student_id]] = 1
+            self.__listed_students_reasons[student_id] = agreement[1]
+
+    def __intern_student(self, student_id: StudentId) -> int:
+        index: Optional[int] = self.__student_indexes.get(student_id)
+        if index is None:
+            index = len(self.__student_indexes)
+            self.__student_indexes[student_id] = index
+            self.__interned_ids.append(student_id)
+            for mask in self.__applicable_masks.values():
+                mask.append(1)
+            self.__listed_mask.append(0)
+            self.__registered_mask.append(0)
+        return index
+
+    def __set_agreement(self, student_id: StudentId, agreement: Agreement) -> NoReturn:
+        """Changes agreement of student and updates only masks of universities it was moved from and to"""
+        self.__version += 1
+        index: int = self.__intern_student(student_id)
+        previous: Optional[Agreement] = self.__student_to_agreement.get(student_id)
+        self.__student_to_agreement[student_id] = agreement
+        if previous is None:
+            for university, mask in self.__applicable_masks.items():
+                mask[index] = university == agreement.university
+        elif previous.university != agreement.university:
+            self.__applicable_masks[previous.university][index] = 0
+            self.__applicable_masks[agreement.university][index] = 1
 
     def is_profile_application_uploaded(self, university: University, profile: Profile) -> bool:
         return profile in self.__university_to_profiles[university]
 
+    def get_loaded_profiles(self) -> List[Tuple[University, Profile]]:
+        """All uploaded profiles in order of upload"""
+        return list(self.__loaded_profiles)
+
+    def get_profile_students(self, university: University, profile: Profile) -> Sequence[Student]:
+        """
+        Ordered list of applications uploaded for profile, should not be modified. Students of profiles
+        ingested by chunks are built on access
+        """
+        return self.__all_students_data[university].get(profile, [])
+
+    def get_profile_flags(self, university: University, profile: Profile) -> Tuple[bytearray, bytearray]:
+        """
+        Applicable and listed flags of applications of profile, in the same order as its students list.
+        Flags are read from service masks, so students lists are not accessed
+        """
+        indexes: array = self.__profile_student_indexes[university].get(profile, array('i'))
+        applicable: bytearray = self.__applicable_masks[university]
+        return bytearray(applicable[index] for index in indexes), \
+            bytearray(self.__listed_mask[index] for index in indexes)
+
+    def get_profile_scores(self, university: University, profile: Profile) -> array:
+        """Scores of applications of profile, in the same order as its students list, should not be modified"""
+        return self.__profile_scores[university].get(profile, array('i'))
+
+    def get_version(self) -> int:
+        """Number that changes with every update of students, places, agreements or listed students"""
+        return self.__version
+
+    def get_listed_students(self) -> Dict[StudentId, Tuple[University, str]]:
+        """Already listed students with university and reason as they were uploaded"""
+        return {
+            student_id: (university, self.__listed_students_reasons[student_id])
+            for student_id, university in self.__listed_students.items()
+        }
+
+    def get_memory_statistics(self) -> Optional[Dict[str, int]]:
+        """Page-ins, evictions and resident data in memory-bounded mode, None otherwise"""
+        return self.__students_store.get_statistics() if self.__students_store is not None else None
+
+    def get_memory_usage(self) -> Dict[str, int]:
+        """
+        Estimated memory in bytes retained by each service structure. Objects shared by several structures
+        (e.g. student ids) are attributed to the first one: students lists go first.
+        In memory-bounded mode only resident students lists are counted.
+        """
+        seen = set()
+        students_lists: List[List[Student]] = self.__students_store.get_resident_lists() \
+            if self.__students_store is not None else \
+            [students for profiles in self.__all_students_data.values() for students in profiles.values()]
+        return {
+            'students': deep_sizeof(students_lists, seen),
+            'student_applications': deep_sizeof(self.__student_applications, seen),
+            'agreements': deep_sizeof(self.__student_to_agreement, seen),
+            'listed_students': deep_sizeof([self.__listed_students, self.__listed_students_reasons], seen),
+            'indexes': deep_sizeof([self.__student_indexes, self.__interned_ids, self.__profile_student_indexes,
+                                    self.__profile_scores, self.__applicable_masks, self.__listed_mask,
+                                    self.__registered_mask], seen),
+            'places': deep_sizeof(self.__university_places_details, seen),
+            'students_index': deep_sizeof(self.__students_index, seen)
+        }
+
+    def get_places_details(self) -> Dict[University, Dict[Profile, int]]:
+        return {university: dict(places) for university, places in self.__university_places_details.items()}
+
+    def get_min_scores(self) -> Dict[University, Dict[Profile, int]]:
+        """Current minimal score to be admitted for each uploaded profile"""
+        return self.__get_current_min_scores()
+
+    def get_agreements(self) -> Dict[StudentId, Agreement]:
+        """Currently submitted agreement of each student who submitted one"""
+        return dict(self.__student_to_agreement)
+
+    def get_all_current_positions(self) -> Dict[University, Dict[Profile, Dict[StudentId, int]]]:
+        """
+        Current positions of all students who can apply to university in each of its profiles,
+        computed with a single pass over every profile
+        """
+        positions: Dict[University, Dict[Profile, Dict[StudentId, int]]] = {}
+        for university in self.__all_students_data.keys():
+            positions[university]: Dict[Profile, Dict[StudentId, int]] = {}
+            applicable: bytearray = self.__applicable_masks[university]
+            for profile, indexes in self.__profile_student_indexes[university].items():
+                profile_positions: Dict[StudentId, int] = {}
+                current_position: int = 0
+                for index in indexes:
+                    if applicable[index]:
+                        if not self.__listed_mask[index]:
+                            current_position += 1
+                        student_id: StudentId = self.__interned_ids[index]
+                        if student_id not in profile_positions:
+                            profile_positions[student_id] = current_position
+                positions[university][profile] = profile_positions
+        return positions
+
     def get_all_students_with_agreement_where_score_ge(
             self, university: University, profile: Profile, score: int) -> \
             List[Tuple[StudentId, int, University, Profile]]:
@@ -109,16 +305,17 @@ class ApplicationService:
 
     def get_universities_statistics(self) -> List[Tuple[University, int, int, float, float, float, float, float]]:
         """Returns statistics about number of agreements and places, score percentiles by universities"""
-        scores: Dict[University, Dict[StudentId, int]] = {}
+        # scores are keyed by interned index of student
+        scores: Dict[University, Dict[int, int]] = {}
         for university in self.__all_students_data.keys():
-            scores[university]: Dict[StudentId, int] = {}
+            scores[university]: Dict[int, int] = {}
 
         for university in self.__all_students_data.keys():
-            for students in self.__all_students_data[university].values():
-                for student in students:
-                    if self.__is_student_applicable_to_university(student.id, university) and \
-                            student.id not in self.__listed_students:
-                        scores[university][student.id] = student.score
+            applicable: bytearray = self.__applicable_masks[university]
+            for profile, indexes in self.__profile_student_indexes[university].items():
+                for index, score in zip(indexes, self.__profile_scores[university][profile]):
+                    if applicable[index] and not self.__listed_mask[index]:
+                        scores[university][index] = score
 
         result: List[Tuple[University, int, int, float, float, float, float, float]] = []
         for university, data in scores.items():
@@ -139,15 +336,16 @@ class ApplicationService:
         Returns statistics about number of agreements and places, current minimal score and agreements score percentiles
         by universities and profiles
         """
-        scores: Dict[University, Dict[Profile, Dict[StudentId, int]]] = {}
+        # scores are keyed by interned index of student
+        scores: Dict[University, Dict[Profile, Dict[int, int]]] = {}
         for university in self.__all_students_data.keys():
-            scores[university]: Dict[Profile, Dict[StudentId, int]] = {}
-            for profile, students in self.__all_students_data[university].items():
-                scores[university][profile]: Dict[StudentId, int] = {}
-                for student in students:
-                    if self.__is_student_applicable_to_university(student.id, university) and \
-                            student.id not in self.__listed_students:
-                        scores[university][profile][student.id] = student.score
+            scores[university]: Dict[Profile, Dict[int, int]] = {}
+            applicable: bytearray = self.__applicable_masks[university]
+            for profile, indexes in self.__profile_student_indexes[university].items():
+                scores[university][profile]: Dict[int, int] = {}
+                for index, score in zip(indexes, self.__profile_scores[university][profile]):
+                    if applicable[index] and not self.__listed_mask[index]:
+                        scores[university][profile][index] = score
 
         min_scores: Dict[University, Dict[Profile, int]] = self.__get_current_min_scores()
 
@@ -187,25 +385,38 @@ class ApplicationService:
         return counts
 
     def student_registered(self, student_id: StudentId) -> bool:
-        return student_id in self.__student_applications
+        index: Optional[int] = self.__student_indexes.get(student_id)
+        return index is not None and self.__registered_mask[index] == 1
+
+    def build_indexes(self) -> NoReturn:
+        """
+        Arranges applications and ids of students registered so far into indexes, otherwise it is done
+        by the first lookup
+        """
+        repeated: int = self.__student_applications.build()
+        if repeated:
+            self.__logger.debug("%s repeated applications of students to the same profile ignored.", repeated)
+        self.__students_index.build()
+
+    def find_students(self, prefix: str, limit: int = 10) -> List[StudentId]:
+        """
+        Up to limit registered students with id starting with prefix, ignoring separators and case,
+        or with digits of id starting with it: partial SNILS finds also ids like 'MIREA № ...'
+        """
+        return self.__students_index.complete(prefix, limit)
 
     def get_applications_details_for(self, student_id: StudentId) -> \
             List[Tuple[University, Profile, int, int, int, int]]:
         """Returns details for all applications of student at the moment"""
-        if student_id not in self.__student_applications:
+        if not self.student_registered(student_id):
             self.__logger.warn("Student id=%s not found.", student_id)
             return []
 
         positions: Dict[University, Dict[Profile, Tuple[int, int]]] = self.__get_current_positions(student_id)
         min_scores: Dict[University, Dict[Profile, int]] = self.__get_current_min_scores()
 
-        universities_and_profiles: List[Tuple[University, Profile]] = []
-        for university in self.__student_applications[student_id].keys():
-            for profile in self.__student_applications[student_id][university].keys():
-                universities_and_profiles.append((university, profile))
-
         data: List[Tuple[University, Profile, int, int, int, int]] = []
-        for university, profile in universities_and_profiles:
+        for university, profile, _ in self.__get_student_applications(student_id):
             if self.__is_student_applicable_to_university(student_id, university):
                 position_data: Tuple[int, int] = positions[university][profile]
                 min_score: int = min_scores[university][profile]
@@ -213,11 +424,42 @@ class ApplicationService:
                 data.append((university, profile, position_data[0], number_of_places, position_data[1], min_score))
         return data
 
+    def get_applications_details_if_agreement_moved(self, student_id: StudentId, university: Optional[University],
+                                                    profile: Optional[Profile]) -> \
+            List[Tuple[University, Profile, int, int, int, int]]:
+        """
+        What-if query: returns details for all applications of student as if the agreement was submitted
+        to provided profile in university (or withdrawn if university is None). Service state is not modified,
+        only profiles student applied to are recomputed.
+        """
+        if not self.student_registered(student_id):
+            self.__logger.warn("Student id=%s not found.", student_id)
+            return []
+        if university is not None and not self.__has_applied(student_id, university, profile):
+            self.__logger.warn("Student id=%s didn't apply for profile %s in university %s.",
+                               student_id, profile, university)
+            return []
+
+        overlay: Dict[StudentId, Optional[Agreement]] = {
+            student_id: Agreement(university, profile) if university is not None else None
+        }
+
+        data: List[Tuple[University, Profile, int, int, int, int]] = []
+        for applied_university, applied_profile, score in self.__get_student_applications(student_id):
+            if self.__is_student_applicable_to_university(student_id, applied_university, overlay):
+                position: int = self.__get_current_position(student_id, applied_university, applied_profile, overlay)
+                min_score: int = self.__get_current_min_score(applied_university, applied_profile, overlay)
+                number_of_places: int = self.__university_places_details[applied_university][applied_profile]
+                data.append((applied_university, applied_profile, position, number_of_places, score, min_score))
+        return data
+
     def __get_all_students_where_score_ge_and_admission_possible(self, university: University, profile: Profile,
                                                                  score: int) -> List[Student]:
         if profile in self.__university_to_profiles[university]:
-            return [student for student in self.__all_students_data[university][profile] if
-                    student.score >= score and self.__is_student_applicable_to_university(student.id, university)]
+            applicable: bytearray = self.__applicable_masks[university]
+            return [student for student, index in zip(self.__all_students_data[university][profile],
+                                                      self.__profile_student_indexes[university][profile])
+                    if student.score >= score and applicable[index]]
         else:
             self.__logger.warn("Profile %s not found for university %s.", profile, university)
             return []
@@ -234,57 +476,59 @@ class ApplicationService:
         for university in self.__all_students_data.keys():
             if university not in scores:
                 scores[university]: Dict[Profile, int] = {}
-            for profile in self.__all_students_data[university].keys():
+            for profile in self.__profile_student_indexes[university].keys():
                 min_score: int = self.__get_current_min_score(university, profile)
                 scores[university][profile] = min_score
         return scores
 
     def __get_current_positions(self, student_id: StudentId) -> Dict[University, Dict[Profile, Tuple[int, int]]]:
         positions: Dict[University, Dict[Profile, Tuple[int, int]]] = {}
-        if student_id in self.__student_applications:
-            for university, profiles in self.__student_applications[student_id].items():
+        if self.student_registered(student_id):
+            for university, profile, score in self.__get_student_applications(student_id):
                 if university not in positions:
                     positions[university]: Dict[Profile, Tuple[int, int]] = {}
                 if self.__is_student_applicable_to_university(student_id, university):
-                    for profile, score in profiles.items():
-                        current_position: int = self.__get_current_position(student_id, university, profile)
-                        positions[university][profile]: Tuple[int, int] = (current_position, score)
+                    current_position: int = self.__get_current_position(student_id, university, profile)
+                    positions[university][profile]: Tuple[int, int] = (current_position, score)
             return positions
         else:
             self.__logger.warn("Student id=%s not found.", student_id)
             return positions
 
-    def __get_current_min_score(self, university: University, profile: Profile) -> int:
+    def __get_current_min_score(self, university: University, profile: Profile,
+                                overlay: Optional[Dict[StudentId, Optional[Agreement]]] = None) -> int:
         n_places: int = self.__university_places_details[university][profile]
-        students: List[Student] = self.__all_students_data[university][profile]
+        applicable: bytearray = self.__get_applicable_mask(university, overlay)
 
-        applicable_students: List[Student] = [student for student in students if
-                                              self.__is_student_applicable_to_university(student.id, university) and
-                                              student.id not in self.__listed_students]
+        applicable_scores: List[int] = [score for index, score in
+                                        zip(self.__profile_student_indexes[university][profile],
+                                            self.__profile_scores[university][profile])
+                                        if applicable[index] and not self.__listed_mask[index]]
 
         if n_places == 0:
             return 0
-        elif not applicable_students:
+        elif not applicable_scores:
             self.__logger.error("Students for profile %s in university %s not found.", profile, university)
             return -1
-        elif len(applicable_students) < n_places:
+        elif len(applicable_scores) < n_places:
             self.__logger.warn("Found less students than places for profile %s in university %s.",
                                profile, university)
-            return applicable_students[-1].score
+            return applicable_scores[-1]
         else:
-            return applicable_students[n_places - 1].score
+            return applicable_scores[n_places - 1]
 
-    def __get_current_position(self, student_id: StudentId, university: University, profile: Profile) -> int:
+    def __get_current_position(self, student_id: StudentId, university: University, profile: Profile,
+                               overlay: Optional[Dict[StudentId, Optional[Agreement]]] = None) -> int:
         current_position: int = 0
         if profile in self.__university_to_profiles[university]:
-            if student_id in self.__student_applications and \
-                    university in self.__student_applications[student_id] and \
-                    profile in self.__student_applications[student_id][university]:
-                for student in self.__all_students_data[university][profile]:
-                    if self.__is_student_applicable_to_university(student.id, university):
-                        if student.id not in self.__listed_students:
+            if self.__has_applied(student_id, university, profile):
+                applicable: bytearray = self.__get_applicable_mask(university, overlay)
+                student_index: int = self.__student_indexes[student_id]
+                for index in self.__profile_student_indexes[university][profile]:
+                    if applicable[index]:
+                        if not self.__listed_mask[index]:
                             current_position += 1
-                        if student.id == student_id:
+                        if index == student_index:
                             return current_position
             else:
                 self.__logger.warn("Student id=%s didn't apply for profile %s in university %s.",
@@ -294,9 +538,42 @@ class ApplicationService:
             self.__logger.warn("Profile %s not found for university %s.", profile, university)
             return current_position
 
-    def __is_student_applicable_to_university(self, student_id: StudentId, university: University) -> bool:
-        university_chosen: Optional[University] = self.__get_chosen_university_for_student(student_id)
+    def __get_student_applications(self, student_id: StudentId) -> List[Tuple[University, Profile, int]]:
+        """All applications of registered student with scores, grouped by university in order of application"""
+        return [
+            (self.__universities[university], self.__university_to_profiles[self.__universities[university]][profile],
+             score)
+            for university, profile, score in self.__student_applications.get(self.__student_indexes[student_id])
+        ]
+
+    def __has_applied(self, student_id: StudentId, university: University, profile: Profile) -> bool:
+        index: Optional[int] = self.__student_indexes.get(student_id)
+        profiles: List[Profile] = self.__university_to_profiles[university]
+        return index is not None and profile in profiles and self.__student_applications.get_score(
+            index, self.__university_numbers[university], profiles.index(profile)
+        ) is not None
+
+    def __get_applicable_mask(self, university: University,
+                              overlay: Optional[Dict[StudentId, Optional[Agreement]]] = None) -> bytearray:
+        if not overlay:
+            return self.__applicable_masks[university]
+        # hypothetical agreements are applied to a copy, so the real mask is never modified
+        mask: bytearray = bytearray(self.__applicable_masks[university])
+        for student_id in overlay.keys():
+            if student_id in self.__student_indexes:
+                mask[self.__student_indexes[student_id]] = \
+                    self.__is_student_applicable_to_university(student_id, university, overlay)
+        return mask
+
+    def __is_student_applicable_to_university(self, student_id: StudentId, university: University,
+                                              overlay: Optional[Dict[StudentId, Optional[Agreement]]] = None) -> bool:
+        university_chosen: Optional[University] = self.__get_chosen_university_for_student(student_id, overlay)
         return university_chosen is None or university == university_chosen
 
-    def __get_chosen_university_for_student(self, student_id: StudentId) -> Optional[University]:
+    def __get_chosen_university_for_student(self, student_id: StudentId,
+                                            overlay: Optional[Dict[StudentId, Optional[Agreement]]] = None) -> \
+            Optional[University]:
+        if overlay is not None and student_id in overlay:
+            # hypothetical agreement overrides the real one, None means agreement withdrawn
+            return overlay[student_id].university if overlay[student_id] is not None else None
         return self.__student_to_agreement[student_id].university if student_id in self.__student_to_agreement else None
@@ -0,0 +1,238 @@
+from src.core import Profile, StudentId, University
+from src.application.service import ApplicationService
+from src.utils.logger import CustomLogger
+
+from bisect import bisect_left
+import json
+from multiprocessing.shared_memory import SharedMemory
+import struct
+from typing import Dict, List, NoReturn, Optional, Tuple
+
+# segment starts with the length of JSON header describing profiles and positions of all arrays
+_HEADER_SIZE_FORMAT: str = 'q'
+_ALIGNMENT: int = 8
+_UNIVERSITIES: List[University] = list(University)
+
+
+class SharedServiceStore:
+    """
+    Publishes core service tables into a single shared memory segment: sorted table of interned student ids,
+    students ids, scores and applicable flags (taken from service masks) of all profiles, listed flag
+    of each student and per-student index of applications. Child processes attach to it by name with SharedServiceView.
+    The store owns the segment, so it should be closed only when all views are closed.
+    """
+
+    __logger: CustomLogger = CustomLogger('SharedServiceStore')
+
+    def __init__(self, service: ApplicationService, name: Optional[str] = None):
+        listed_students: Dict[StudentId, Tuple[University, str]] = service.get_listed_students()
+        loaded_profiles: List[Tuple[University, Profile]] = service.get_loaded_profiles()
+        places: Dict[University, Dict[Profile, int]] = service.get_places_details()
+
+        student_ids = set(listed_students.keys())
+        for university, profile in loaded_profiles:
+            student_ids.update(student.id for student in service.get_profile_students(university, profile))
+        encoded_ids: List[bytes] = sorted(student_id.id.encode('utf-8') for student_id in student_ids)
+        index_of: Dict[bytes, int] = {encoded_id: i for i, encoded_id in enumerate(encoded_ids)}
+
+        id_offsets: List[int] = [0]
+        for encoded_id in encoded_ids:
+            id_offsets.append(id_offsets[-1] + len(encoded_id))
+
+        listed: List[int] = [0] * len(encoded_ids)
+        for student_id in listed_students.keys():
+            listed[index_of[student_id.id.encode('utf-8')]] = 1
+
+        profiles: List[List] = []
+        rows_students: List[int] = []
+        rows_scores: List[int] = []
+        rows_applicable: bytearray = bytearray()
+        # applications of each student grouped by university in order of first application, as in service
+        student_applications: List[Dict[int, List[Tuple[int, int]]]] = [{} for _ in encoded_ids]
+        for profile_index, (university, profile) in enumerate(loaded_profiles):
+            row_start: int = len(rows_students)
+            rows_applicable.extend(service.get_profile_flags(university, profile)[0])
+            for student in service.get_profile_students(university, profile):
+                student_index: int = index_of[student.id.id.encode('utf-8')]
+                applications: List[Tuple[int, int]] = student_applications[student_index].setdefault(
+                    _UNIVERSITIES.index(university), []
+                )
+                if all(applied_profile != profile_index for applied_profile, _ in applications):
+                    applications.append((profile_index, len(rows_students)))
+                rows_students.append(student_index)
+                rows_scores.append(student.score)
+            profiles.append([university.name, profile.id, profile.sub_field, row_start, len(rows_students),
+                             places[university][profile]])
+
+        applications_offsets: List[int] = [0]
+        applications_profiles: List[int] = []
+        applications_rows: List[int] = []
+        for applications_by_university in student_applications:
+            for applications in applications_by_university.values():
+                for profile_index, row in applications:
+                    applications_profiles.append(profile_index)
+                    applications_rows.append(row)
+            applications_offsets.append(len(applications_profiles))
+
+        arrays: List[Tuple[str, str, bytes]] = [
+            ('id_offsets', 'q', struct.pack(f"{len(id_offsets)}q", *id_offsets)),
+            ('ids', 'B', b''.join(encoded_ids)),
+            ('listed', 'b', struct.pack(f"{len(listed)}b", *listed)),
+            ('rows_students', 'i', struct.pack(f"{len(rows_students)}i", *rows_students)),
+            ('rows_scores', 'i', struct.pack(f"{len(rows_scores)}i", *rows_scores)),
+            ('rows_applicable', 'B', bytes(rows_applicable)),
+            ('applications_offsets', 'i', struct.pack(f"{len(applications_offsets)}i", *applications_offsets)),
+            ('applications_profiles', 'i', struct.pack(f"{len(applications_profiles)}i", *applications_profiles)),
+            ('applications_rows', 'i', struct.pack(f"{len(applications_rows)}i", *applications_rows))
+        ]
+
+        # positions of arrays are relative to the aligned end of header, so header can describe its own layout
+        layout: Dict[str, List] = {}
+        position: int = 0
+        for array_name, array_format, data in arrays:
+            layout[array_name] = [array_format, position, len(data)]
+            position += SharedServiceStore.__aligned(len(data))
+        header: bytes = json.dumps({'profiles': profiles, 'layout': layout}, ensure_ascii=False).encode('utf-8')
+        data_start: int = SharedServiceStore.__aligned(struct.calcsize(_HEADER_SIZE_FORMAT) + len(header))
+
+        self.__segment: SharedMemory = SharedMemory(name=name, create=True, size=max(data_start + position, 1))
+        struct.pack_into(_HEADER_SIZE_FORMAT, self.__segment.buf, 0, len(header))
+        self.__segment.buf[struct.calcsize(_HEADER_SIZE_FORMAT): struct.calcsize(_HEADER_SIZE_FORMAT) + len(header)] = \
+            header
+        for array_name, _, data in arrays:
+            array_start: int = data_start + layout[array_name][1]
+            self.__segment.buf[array_start: array_start + len(data)] = data
+
+        SharedServiceStore.__logger.info("Service with %s students and %s applications published to %s (%s bytes).",
+                                         len(encoded_ids), len(rows_students), self.__segment.name,
+                                         self.__segment.size)
+
+    @property
+    def name(self) -> str:
+        return self.__segment.name
+
+    def close(self) -> NoReturn:
+        """Releases and removes the segment"""
+        self.__segment.close()
+        self.__segment.unlink()
+
+    @staticmethod
+    def __aligned(size: int) -> int:
+        return (size + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+class SharedServiceView:
+    """
+    Read-only service view over tables published by SharedServiceStore. Data is read in place from
+    shared memory, so all views in all processes share a single copy of it.
+    """
+
+    def __init__(self, name: str):
+        try:
+            self.__segment: SharedMemory = SharedMemory(name=name, track=False)
+        except TypeError:
+            # before python 3.13 attached segments are always tracked, which is harmless for child processes
+            # sharing resource tracker with the owner of the segment
+            self.__segment: SharedMemory = SharedMemory(name=name)
+
+        header_size: int = struct.unpack_from(_HEADER_SIZE_FORMAT, self.__segment.buf, 0)[0]
+        header_start: int = struct.calcsize(_HEADER_SIZE_FORMAT)
+        header: Dict = json.loads(bytes(self.__segment.buf[header_start: header_start + header_size]).decode('utf-8'))
+        data_start: int = (header_start + header_size + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+        self.__views: List[memoryview] = []
+        arrays: Dict[str, memoryview] = {}
+        for array_name, (array_format, position, size) in header['layout'].items():
+            view: memoryview = self.__segment.buf[data_start + position: data_start + position + size]
+            self.__views.append(view)
+            arrays[array_name] = view.cast(array_format) if array_format != 'B' else view
+            self.__views.append(arrays[array_name])
+
+        self.__id_offsets: memoryview = arrays['id_offsets']
+        self.__ids: memoryview = arrays['ids']
+        self.__listed: memoryview = arrays['listed']
+        self.__rows_students: memoryview = arrays['rows_students']
+        self.__rows_scores: memoryview = arrays['rows_scores']
+        self.__rows_applicable: memoryview = arrays['rows_applicable']
+        self.__applications_offsets: memoryview = arrays['applications_offsets']
+        self.__applications_profiles: memoryview = arrays['applications_profiles']
+        self.__applications_rows: memoryview = arrays['applications_rows']
+
+        self.__profiles: List[Tuple[University, Profile, int, int, int]] = [
+            (University[university], Profile(profile_id, sub_field), row_start, row_end, n_places)
+            for university, profile_id, sub_field, row_start, row_end, n_places in header['profiles']
+        ]
+        self.__number_of_students: int = len(self.__id_offsets) - 1
+
+    def close(self) -> NoReturn:
+        for view in reversed(self.__views):
+            view.release()
+        self.__segment.close()
+
+    def student_registered(self, student_id: StudentId) -> bool:
+        student_index: Optional[int] = self.__index_of(student_id)
+        return student_index is not None and \
+            self.__applications_offsets[student_index] < self.__applications_offsets[student_index + 1]
+
+    def get_min_scores(self) -> Dict[University, Dict[Profile, int]]:
+        scores: Dict[University, Dict[Profile, int]] = {university: {} for university in University}
+        for profile_index, (university, profile, _, _, _) in enumerate(self.__profiles):
+            scores[university][profile] = self.__get_min_score(profile_index)
+        return scores
+
+    def get_applications_details_for(self, student_id: StudentId) -> \
+            List[Tuple[University, Profile, int, int, int, int]]:
+        """Same details as ApplicationService.get_applications_details_for, computed over shared tables"""
+        student_index: Optional[int] = self.__index_of(student_id)
+        if student_index is None:
+            return []
+
+        data: List[Tuple[University, Profile, int, int, int, int]] = []
+        for i in range(self.__applications_offsets[student_index], self.__applications_offsets[student_index + 1]):
+            profile_index: int = self.__applications_profiles[i]
+            university, profile, _, _, n_places = self.__profiles[profile_index]
+            if not self.__rows_applicable[self.__applications_rows[i]]:
+                continue
+            data.append((
+                university, profile, self.__get_position(student_index, profile_index), n_places,
+                self.__rows_scores[self.__applications_rows[i]], self.__get_min_score(profile_index)
+            ))
+        return data
+
+    def __index_of(self, student_id: StudentId) -> Optional[int]:
+        encoded_id: bytes = student_id.id.encode('utf-8')
+        student_index: int = bisect_left(range(self.__number_of_students), encoded_id, key=self.__encoded_id)
+        if student_index < self.__number_of_students and self.__encoded_id(student_index) == encoded_id:
+            return student_index
+        return None
+
+    def __encoded_id(self, student_index: int) -> bytes:
+        return bytes(self.__ids[self.__id_offsets[student_index]: self.__id_offsets[student_index + 1]])
+
+    def __get_position(self, student_index: int, profile_index: int) -> int:
+        _, _, row_start, row_end, _ = self.__profiles[profile_index]
+        current_position: int = 0
+        for row in range(row_start, row_end):
+            row_student: int = self.__rows_students[row]
+            if self.__rows_applicable[row]:
+                if not self.__listed[row_student]:
+                    current_position += 1
+                if row_student == student_index:
+                    return current_position
+        return current_position
+
+    def __get_min_score(self, profile_index: int) -> int:
+        _, _, row_start, row_end, n_places = self.__profiles[profile_index]
+        if n_places == 0:
+            return 0
+
+        number_of_applicable: int = 0
+        last_score: int = -1
+        for row in range(row_start, row_end):
+            row_student: int = self.__rows_students[row]
+            if self.__rows_applicable[row] and not self.__listed[row_student]:
+                number_of_applicable += 1
+                last_score = self.__rows_scores[row]
+                if number_of_applicable == n_places:
+                    break
+        return last_score
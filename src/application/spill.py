@@ -0,0 +1,177 @@
+from src.core import Profile, StudentId, Student, University
+from src.application.compact_students import CompactStudents
+from src.utils.logger import CustomLogger
+
+from collections import OrderedDict
+from collections.abc import MutableMapping
+import mmap
+import os
+from os.path import join
+import shutil
+import struct
+import tempfile
+from typing import Dict, Iterator, List, NoReturn, Optional, Set, Tuple
+import weakref
+
+# number of students, then for each student: id length, id, score, agreement flag, dormitory flag (-1 if unknown)
+_COUNT_FORMAT: str = '<i'
+_ID_LENGTH_FORMAT: str = '<H'
+_FIELDS_FORMAT: str = '<ibb'
+
+
+class SpillingStudentsStore:
+    """
+    Students lists of all profiles under a memory budget, counted in students. Least recently used lists
+    beyond the budget are spilled to files on disk and paged back in through memory map on the next access.
+    Lists are written to disk once, as uploaded lists are never modified afterwards. Compact lists hold
+    no Student objects, so they are kept in memory outside of the budget and never spilled.
+    """
+
+    __logger: CustomLogger = CustomLogger('SpillingStudentsStore')
+
+    def __init__(self, max_resident_students: int, spill_dir: Optional[str] = None):
+        if max_resident_students <= 0:
+            raise Exception(f"Memory budget should be positive, but {max_resident_students} found")
+        self.__max_resident_students: int = max_resident_students
+        if spill_dir is None:
+            spill_dir = tempfile.mkdtemp(prefix='students-')
+            # temporary spill files are removed together with the store
+            weakref.finalize(self, shutil.rmtree, spill_dir, True)
+        else:
+            os.makedirs(spill_dir, exist_ok=True)
+        self.__spill_dir: str = spill_dir
+
+        self.__resident: OrderedDict[Tuple[University, Profile], List[Student]] = OrderedDict()
+        self.__resident_students: int = 0
+        self.__compact: Dict[Tuple[University, Profile], CompactStudents] = {}
+        self.__spilled: Set[Tuple[University, Profile]] = set()
+        self.__file_names: Dict[Tuple[University, Profile], str] = {}
+        self.__page_ins: int = 0
+        self.__evictions: int = 0
+
+    def profiles_of(self, university: University) -> 'SpilledProfiles':
+        """Mapping of profiles of university to students lists backed by this store"""
+        return SpilledProfiles(self, university)
+
+    def get(self, key: Tuple[University, Profile]) -> List[Student]:
+        if key in self.__compact:
+            return self.__compact[key]
+        if key in self.__resident:
+            self.__resident.move_to_end(key)
+            return self.__resident[key]
+        students: List[Student] = self.__page_in(key)
+        self.__make_resident(key, students)
+        return students
+
+    def put(self, key: Tuple[University, Profile], students: List[Student]) -> NoReturn:
+        self.remove(key)
+        if isinstance(students, CompactStudents):
+            self.__compact[key] = students
+        else:
+            self.__make_resident(key, students)
+
+    def remove(self, key: Tuple[University, Profile]) -> NoReturn:
+        self.__compact.pop(key, None)
+        if key in self.__resident:
+            self.__resident_students -= len(self.__resident.pop(key))
+        if key in self.__spilled:
+            self.__spilled.remove(key)
+            os.remove(self.__path_of(key))
+
+    def get_resident_lists(self) -> List[List[Student]]:
+        """Students lists currently held in memory, without paging in spilled ones"""
+        return list(self.__compact.values()) + list(self.__resident.values())
+
+    def get_statistics(self) -> Dict[str, int]:
+        return {
+            'page_ins': self.__page_ins,
+            'evictions': self.__evictions,
+            'resident_profiles': len(self.__resident),
+            'resident_students': self.__resident_students,
+            'spilled_profiles': len(self.__spilled),
+            'compact_profiles': len(self.__compact)
+        }
+
+    def __make_resident(self, key: Tuple[University, Profile], students: List[Student]) -> NoReturn:
+        self.__resident[key] = students
+        self.__resident_students += len(students)
+        # the last accessed list stays resident even if it exceeds the budget alone
+        while self.__resident_students > self.__max_resident_students and len(self.__resident) > 1:
+            evicted_key, evicted_students = self.__resident.popitem(last=False)
+            self.__resident_students -= len(evicted_students)
+            if evicted_key not in self.__spilled:
+                self.__spill(evicted_key, evicted_students)
+            self.__evictions += 1
+
+    def __spill(self, key: Tuple[University, Profile], students: List[Student]) -> NoReturn:
+        records: List[bytes] = [struct.pack(_COUNT_FORMAT, len(students))]
+        for student in students:
+            encoded_id: bytes = student.id.id.encode('utf-8')
+            records.append(struct.pack(_ID_LENGTH_FORMAT, len(encoded_id)))
+            records.append(encoded_id)
+            records.append(struct.pack(
+                _FIELDS_FORMAT, student.score, student.agreement_submitted,
+                -1 if student.dormitory_requirement is None else student.dormitory_requirement
+            ))
+        with open(self.__path_of(key), 'wb') as file:
+            file.write(b''.join(records))
+        self.__spilled.add(key)
+        SpillingStudentsStore.__logger.debug("Profile %s in university %s spilled to disk.", key[1], key[0])
+
+    def __page_in(self, key: Tuple[University, Profile]) -> List[Student]:
+        if key not in self.__spilled:
+            raise KeyError(key)
+        with open(self.__path_of(key), 'rb') as file, \
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            number_of_students: int = struct.unpack_from(_COUNT_FORMAT, data, 0)[0]
+            position: int = struct.calcsize(_COUNT_FORMAT)
+            students: List[Student] = []
+            for _ in range(number_of_students):
+                id_length: int = struct.unpack_from(_ID_LENGTH_FORMAT, data, position)[0]
+                position += struct.calcsize(_ID_LENGTH_FORMAT)
+                student_id: str = data[position: position + id_length].decode('utf-8')
+                position += id_length
+                score, agreement_submitted, dormitory_requirement = struct.unpack_from(_FIELDS_FORMAT, data, position)
+                position += struct.calcsize(_FIELDS_FORMAT)
+                students.append(Student(StudentId(student_id), score, bool(agreement_submitted),
+                                        None if dormitory_requirement < 0 else bool(dormitory_requirement)))
+        self.__page_ins += 1
+        SpillingStudentsStore.__logger.debug("Profile %s in university %s paged in.", key[1], key[0])
+        return students
+
+    def __path_of(self, key: Tuple[University, Profile]) -> str:
+        # profiles names may contain characters not allowed in file names, so files are numbered
+        if key not in self.__file_names:
+            self.__file_names[key] = f"{key[0].name}_{len(self.__file_names)}.students"
+        return join(self.__spill_dir, self.__file_names[key])
+
+
+class SpilledProfiles(MutableMapping):
+    """Profiles of one university in the order of upload, students lists are paged in by the store on access"""
+
+    def __init__(self, store: SpillingStudentsStore, university: University):
+        self.__store: SpillingStudentsStore = store
+        self.__university: University = university
+        self.__profiles: Dict[Profile, None] = {}
+
+    def __getitem__(self, profile: Profile) -> List[Student]:
+        if profile not in self.__profiles:
+            raise KeyError(profile)
+        return self.__store.get((self.__university, profile))
+
+    def __setitem__(self, profile: Profile, students: List[Student]) -> NoReturn:
+        self.__profiles[profile] = None
+        self.__store.put((self.__university, profile), students)
+
+    def __delitem__(self, profile: Profile) -> NoReturn:
+        del self.__profiles[profile]
+        self.__store.remove((self.__university, profile))
+
+    def __contains__(self, profile: object) -> bool:
+        return profile in self.__profiles
+
+    def __iter__(self) -> Iterator[Profile]:
+        return iter(list(self.__profiles.keys()))
+
+    def __len__(self) -> int:
+        return len(self.__profiles)
@@ -0,0 +1,148 @@
+from src.core import Profile, University
+from src.application.service import ApplicationService
+from src.application.loader import DataLoader
+from src.utils.logger import CustomLogger
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, NoReturn, Optional, Sequence, Tuple
+
+
+class _LinearTrend:
+    """Least squares line over points added one by one, kept as running sums"""
+
+    def __init__(self):
+        self.n: int = 0
+        self.sum_x: float = 0.0
+        self.sum_y: float = 0.0
+        self.sum_xx: float = 0.0
+        self.sum_xy: float = 0.0
+
+    def add(self, x: float, y: float) -> NoReturn:
+        self.n += 1
+        self.sum_x += x
+        self.sum_y += y
+        self.sum_xx += x * x
+        self.sum_xy += x * y
+
+    def slope(self) -> float:
+        """Change per unit of x, 0 until there are points at two different x"""
+        denominator: float = self.n * self.sum_xx - self.sum_x * self.sum_x
+        return (self.n * self.sum_xy - self.sum_x * self.sum_y) / denominator if denominator > 1e-9 else 0.0
+
+    def value_at(self, x: float) -> float:
+        return (self.sum_y - self.slope() * self.sum_x) / self.n + self.slope() * x
+
+
+@dataclass(frozen=True)
+class CutoffProjection:
+    university: University
+    profile: Profile
+    # number of drops where profile was present
+    drops: int
+    places: int
+    min_score: int
+    # trend change per day
+    min_score_slope: float
+    projected_min_score: float
+    agreements: int
+    agreements_slope: float
+    projected_agreements: float
+
+
+class CutoffTrajectories:
+    """
+    Cut-off and agreements count trajectories of profiles over an ordered series of data drops, with a linear
+    trend of each fitted by least squares to project values to a later date. Each drop updates running sums
+    of trends, so adding a drop costs one pass over its profiles and earlier drops are never processed again.
+    Cut-offs of drops where profile had no students counted (-1) are kept in trajectory but not fitted.
+    """
+
+    __logger: CustomLogger = CustomLogger('CutoffTrajectories')
+
+    def __init__(self):
+        self.__timestamps: List[datetime] = []
+        # places, cut-off and number of agreements of profile at each drop where profile was present
+        self.__trajectories: Dict[Tuple[University, Profile], List[Tuple[datetime, int, int, int]]] = {}
+        self.__min_score_trends: Dict[Tuple[University, Profile], _LinearTrend] = {}
+        self.__agreements_trends: Dict[Tuple[University, Profile], _LinearTrend] = {}
+
+    @staticmethod
+    def load(dir_paths: Sequence[str], timestamps: Optional[Sequence[datetime]] = None,
+             chunk_size: Optional[int] = None) -> 'CutoffTrajectories':
+        """
+        Trajectories over data directories in order of drops. Without timestamps drops are taken
+        one day apart, so that trends are measured per drop.
+        """
+        if timestamps is not None and len(timestamps) != len(dir_paths):
+            raise Exception(f"Timestamp should be provided for each of {len(dir_paths)} drops, "
+                            f"but {len(timestamps)} found")
+        trajectories: CutoffTrajectories = CutoffTrajectories()
+        for i, dir_path in enumerate(dir_paths):
+            service: ApplicationService = ApplicationService()
+            DataLoader(service).load_data(dir_path, chunk_size=chunk_size)
+            trajectories.add_drop(service, timestamps[i] if timestamps is not None
+                                else datetime(1970, 1, 1) + timedelta(days=i))
+        return trajectories
+
+    def add_drop(self, service: ApplicationService, timestamp: datetime) -> NoReturn:
+        """Adds state of service as the next drop and updates trends of its profiles"""
+        if self.__timestamps and timestamp <= self.__timestamps[-1]:
+            raise Exception(f"Drop time should be after {self.__timestamps[-1]}, but {timestamp} found")
+        self.__timestamps.append(timestamp)
+        days: float = self.__days_since_first_drop(timestamp)
+
+        places: Dict[University, Dict[Profile, int]] = service.get_places_details()
+        min_scores: Dict[University, Dict[Profile, int]] = service.get_min_scores()
+        agreements: Dict[Tuple[University, Profile], int] = {}
+        for agreement in service.get_agreements().values():
+            key: Tuple[University, Profile] = (agreement.university, agreement.profile)
+            agreements[key] = agreements.get(key, 0) + 1
+
+        for key in service.get_loaded_profiles():
+            university, profile = key
+            min_score: int = min_scores[university][profile]
+            number_of_agreements: int = agreements.get(key, 0)
+            self.__trajectories.setdefault(key, []).append(
+                (timestamp, places[university][profile], min_score, number_of_agreements)
+            )
+            if min_score >= 0:
+                self.__min_score_trends.setdefault(key, _LinearTrend()).add(days, min_score)
+            self.__agreements_trends.setdefault(key, _LinearTrend()).add(days, number_of_agreements)
+        CutoffTrajectories.__logger.info("Drop %s added: %s profiles updated.", timestamp,
+                                         len(service.get_loaded_profiles()))
+
+    def get_timestamps(self) -> List[datetime]:
+        return list(self.__timestamps)
+
+    def get_trajectory(self, university: University, profile: Profile) -> List[Tuple[datetime, int, int, int]]:
+        """Places, cut-off and number of agreements of profile at each drop where profile was present"""
+        return list(self.__trajectories.get((university, profile), []))
+
+    def get_projections(self, at: Optional[datetime] = None) -> List[CutoffProjection]:
+        """
+        Latest values and trends of profiles present in the last drop, projected to the given time
+        (the last drop by default). Projected number of agreements is not less than zero.
+        """
+        if not self.__timestamps:
+            return []
+        last_drop: datetime = self.__timestamps[-1]
+        days: float = self.__days_since_first_drop(at if at is not None else last_drop)
+
+        projections: List[CutoffProjection] = []
+        for (university, profile), trajectory in self.__trajectories.items():
+            timestamp, places, min_score, agreements = trajectory[-1]
+            if timestamp != last_drop:
+                continue
+            min_score_trend: Optional[_LinearTrend] = self.__min_score_trends.get((university, profile))
+            agreements_trend: _LinearTrend = self.__agreements_trends[(university, profile)]
+            projections.append(CutoffProjection(
+                university, profile, len(trajectory), places, min_score,
+                round(min_score_trend.slope(), 3) if min_score_trend is not None else 0.0,
+                round(min_score_trend.value_at(days), 1) if min_score_trend is not None else float(min_score),
+                agreements, round(agreements_trend.slope(), 3), round(max(0.0, agreements_trend.value_at(days)), 1)
+            ))
+        return projections
+
+    def __days_since_first_drop(self, timestamp: datetime) -> float:
+        return (timestamp - self.__timestamps[0]) / timedelta(days=1)
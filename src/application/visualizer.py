@@ -2,11 +2,20 @@ from enum import Enum
 
 from src.core import Profile, StudentId, University
 from src.application import ApplicationService
+from src.application.columns import ColumnarTables
+from src.application.overlap import CompetitorOverlap
+from src.application.report_cache import ReportCache
+from src.utils import MemoryTracker
 
-from typing import Dict, List, NoReturn, Tuple
+from typing import ContextManager, Dict, List, NoReturn, Optional, Tuple
 
+from contextlib import nullcontext
+
+import hashlib
 import os
 import sys
+import tempfile
+import numpy as np
 import pandas as pd
 import pdfkit
 from IPython.display import display
@@ -24,54 +33,100 @@ class ReportType(Enum):
 
 class DataVisualizer:
 
-    def __init__(self, service: ApplicationService):
+    def __init__(self, service: ApplicationService, report_cache: Optional[ReportCache] = None,
+                 memory_tracker: Optional[MemoryTracker] = None):
         self.__service = service
+        self.__report_cache: Optional[ReportCache] = report_cache
+        self.__memory_tracker: Optional[MemoryTracker] = memory_tracker
+        # built by the first report showing overlaps, reads applicability from service at the moment of each query,
+        # so it serves all reports
+        self.__competitor_overlap: Optional[CompetitorOverlap] = None
+        # columnar snapshot of service data shown by notebook helpers, rebuilt when service data changes
+        self.__tables: Optional[ColumnarTables] = None
+        self.__tables_version: int = -1
 
     def show_all_students_and_agreement_where_score_ge(self,
                                                        university: University,
                                                        profile: Profile,
                                                        score: int) -> NoReturn:
-        data = self.__service.get_all_students_with_agreement_where_score_ge(
-            university, profile, score
-        )
+        tables: ColumnarTables = self.__get_tables()
+        applications: pd.DataFrame = DataVisualizer.__profile_applications(tables, university, profile)
+        applications = applications[applications['score'].to_numpy() >= score]
+        agreements: pd.DataFrame = tables.get_agreements_frame().set_index('student_id')
 
-        df = self.__build_dataframe(data, ['Id', 'Score', "Chosen University", "Chosen Profile"])
+        df = self.__build_frame([
+            applications['student_id'], applications['score'],
+            DataVisualizer.__agreements_of(applications, agreements['university']),
+            DataVisualizer.__agreements_of(applications, agreements['profile'])
+        ], ['Id', 'Score', "Chosen University", "Chosen Profile"])
         display(df)
 
     def show_all_students_and_chosen_profile_where_score_ge_and_admission_possible(self,
                                                                                    university: University,
                                                                                    profile: Profile,
                                                                                    score: int) -> NoReturn:
-        data = self.__service.get_all_students_with_chosen_profile_where_score_ge_and_admission_possible(
-            university, profile, score
-        )
+        tables: ColumnarTables = self.__get_tables()
+        applications: pd.DataFrame = DataVisualizer.__profile_applications(tables, university, profile)
+        applications = applications[(applications['score'].to_numpy() >= score) &
+                                    applications['applicable'].to_numpy()]
+        agreements: pd.DataFrame = tables.get_agreements_frame().set_index('student_id')
 
-        df = self.__build_dataframe(data, ['Id', 'Score', f"Chosen Profile in {university}"])
+        df = self.__build_frame([
+            applications['student_id'], applications['score'],
+            DataVisualizer.__agreements_of(applications, agreements['profile'])
+        ], ['Id', 'Score', f"Chosen Profile in {university}"])
         display(df)
 
     def show_agreements_distribution(self) -> NoReturn:
-        data = [(university, n_agreements) for university, n_agreements
-                in self.__service.get_number_of_agreements_by_university().items()]
+        counts: pd.Series = self.__get_tables().get_agreements_frame()['university'].value_counts(sort=False)
 
-        df = self.__build_dataframe(data, ['University', 'Agreements'])
+        df = self.__build_frame([counts.index, counts], ['University', 'Agreements'])
         display(df)
 
     def show_pending_agreements_distribution(self) -> NoReturn:
-        data = [(university, n_agreements) for university, n_agreements
-                in self.__service.get_number_of_pending_agreements_by_university().items()]
+        tables: ColumnarTables = self.__get_tables()
+        agreements: pd.DataFrame = tables.get_agreements_frame()
+        pending: np.ndarray = ~agreements['student_id'].isin(tables.get_listed_frame()['student_id']).to_numpy()
+        counts: pd.Series = agreements['university'][pending].value_counts(sort=False)
 
-        df = self.__build_dataframe(data, ['University', 'Agreements'])
+        df = self.__build_frame([counts.index, counts], ['University', 'Agreements'])
         display(df)
 
     def show_universities_statistics(self) -> NoReturn:
-        data = self.__service.get_universities_statistics()
+        tables: ColumnarTables = self.__get_tables()
+        # student is counted once in university, with the score of the last profile
+        counted: pd.DataFrame = self.__counted_applications(tables) \
+            .drop_duplicates(['university', 'student_id'], keep='last')
+        places: pd.Series = tables.get_profiles_frame().groupby('university', observed=True)['places'].sum()
+
+        data = []
+        for university, scores in counted.groupby('university', observed=True)['score']:
+            if len(scores) < 2:
+                continue
+            data.append((university, len(scores), int(places[university]),
+                         *DataVisualizer.__scores_statistics(scores.to_numpy())))
 
         df = self.__build_dataframe(data, ['University', 'N of Agreements', 'N of Places', 'Average score',
                                            'Median score', 'Top 20% score', 'Top 10% score', 'Top 5% score'])
         display(df)
 
     def show_universities_and_profiles_statistics(self) -> NoReturn:
-        data = self.__service.get_profiles_statistics()
+        tables: ColumnarTables = self.__get_tables()
+        counted: pd.DataFrame = self.__counted_applications(tables) \
+            .drop_duplicates(['university', 'profile', 'student_id'], keep='last')
+        profiles: pd.DataFrame = tables.get_profiles_frame().set_index(['university', 'profile'])
+        universities: List[str] = [university.name for university in University]
+
+        data = []
+        # profiles of each university are shown in order of upload
+        for (university, profile), scores in sorted(
+                counted.groupby(['university', 'profile'], observed=True, sort=False)['score'],
+                key=lambda group: universities.index(group[0][0])):
+            if len(scores) < 2:
+                continue
+            details: pd.Series = profiles.loc[(university, profile)]
+            data.append((university, profile, len(scores), int(details['places']), int(details['min_score']),
+                         *DataVisualizer.__scores_statistics(scores.to_numpy())))
 
         df = self.__build_dataframe(data, ['University', 'Profile', 'N of Agreements', 'N of Places',
                                            'Min Score', 'Average score', 'Median score',
@@ -84,44 +139,179 @@ class DataVisualizer:
                                            'N of Places', 'Score', 'Min Score'])
         display(df)
 
-    def get_report_for(self, student_id: StudentId, report_type: ReportType = ReportType.BRIEF, output_dir: str = './') -> bool:
+    def get_report_for(self, student_id: StudentId, report_type: ReportType = ReportType.BRIEF, output_dir: str = './',
+                       streaming: bool = False, students_window: Optional[int] = None,
+                       competitors_overlaps: bool = False) -> bool:
+        """
+        Generates PDF report. In streaming mode HTML is rendered chunk by chunk to a temporary file instead of
+        a single string. If students window is set, students lists of FULL report are truncated to that many
+        students before and after the student. If competitors_overlaps is set, FULL report also shows
+        competitors shared by each pair of applications.
+        """
         if not self.__service.student_registered(student_id):
             print(f"No data found for student [id={student_id}].")
             return False
 
-        applications_details = self.__service.get_applications_details_for(student_id)
-        universities_details = self.__service.get_universities_statistics()
-        profiles_details = self.__service.get_profiles_statistics()
-        students_lists = self.__fetch_students_lists(applications_details) if report_type == ReportType.FULL else {}
+        with self.__stage('report data collection'):
+            applications_details = self.__service.get_applications_details_for(student_id)
+            universities_details = self.__service.get_universities_statistics()
+            profiles_details = self.__service.get_profiles_statistics()
+            students_lists = self.__fetch_students_lists(applications_details) \
+                if report_type == ReportType.FULL else {}
+            students_windows = DataVisualizer.__truncate_students_lists(student_id, students_lists, students_window) \
+                if students_window is not None else {}
+            overlaps = self.__get_competitor_overlap().get_overlaps_for(student_id, applications_details) \
+                if report_type == ReportType.FULL and competitors_overlaps else None
 
         env = Environment(loader=PackageLoader('src.application', 'report'))
         template = env.get_template(report_type.value + '_report_template.html')
-        pdf_data = template.render(
+        cssPath = os.path.dirname(template.filename) + '/report_template.css'
+        reportFileName = f"{output_dir}/student_{student_id.id.replace(' ', '-')}_{report_type.value}.pdf"
+
+        # generation time is not a part of the digest: reused report shows when its content was rendered
+        report_digest: Optional[str] = None
+        if self.__report_cache is not None:
+            report_digest = ReportCache.digest({
+                'id': student_id.id,
+                'report_type': report_type.value,
+                'template_version': DataVisualizer.__template_version(template.filename, cssPath),
+                'applications_details': applications_details,
+                'universities_details': universities_details,
+                'profiles_details': profiles_details,
+                'students_lists': students_lists,
+                'students_windows': students_windows,
+                'competitors_overlaps': overlaps
+            })
+            if self.__report_cache.fetch(report_digest, reportFileName):
+                return True
+
+        template_data = dict(
             id=student_id.id,
             generated_at=strftime("%d/%b/%Y %H:%M:%S", localtime()),
             applications_details=applications_details,
             universities_details=universities_details,
             profiles_details=profiles_details,
-            students_lists=students_lists
+            students_lists=students_lists,
+            students_windows=students_windows,
+            competitors_overlaps=overlaps
         )
 
-        cssPath = os.path.dirname(template.filename) + '/report_template.css'
-        reportFileName = f"{output_dir}/student_{student_id.id.replace(' ', '-')}_{report_type.value}.pdf"
-
+        options = {}
         if sys.platform.startswith('win'):
             path_wkthmltopdf = b'C:\Program Files\wkhtmltopdf\\bin\wkhtmltopdf.exe'
-            config = pdfkit.configuration(wkhtmltopdf=path_wkthmltopdf)
-            pdfkit.from_string(pdf_data, reportFileName, css=cssPath, configuration=config)
+            options['configuration'] = pdfkit.configuration(wkhtmltopdf=path_wkthmltopdf)
+
+        if streaming:
+            # styles are written into the page head before the rows: passing them as a separate file
+            # makes pdfkit read the whole page into memory to prepend them
+            with open(cssPath, encoding='utf-8') as cssFile:
+                template_data['inline_css'] = cssFile.read()
+            with self.__stage('report rendering'), \
+                    tempfile.NamedTemporaryFile('w', suffix='.html', encoding='utf-8', delete=False) as htmlFile:
+                for chunk in template.generate(**template_data):
+                    htmlFile.write(chunk)
+            try:
+                with self.__stage('pdf conversion'):
+                    pdfkit.from_file(htmlFile.name, reportFileName, **options)
+            finally:
+                os.remove(htmlFile.name)
         else:
-            pdfkit.from_string(pdf_data, reportFileName, css=cssPath)
+            with self.__stage('report rendering'):
+                pdf_data = template.render(**template_data)
+            with self.__stage('pdf conversion'):
+                pdfkit.from_string(pdf_data, reportFileName, css=cssPath, **options)
+
+        if self.__report_cache is not None:
+            self.__report_cache.store(report_digest, reportFileName)
 
         return True
 
+    def __get_tables(self) -> ColumnarTables:
+        if self.__tables is None or self.__tables_version != self.__service.get_version():
+            self.__tables_version = self.__service.get_version()
+            self.__tables = ColumnarTables(self.__service)
+        return self.__tables
+
+    def __counted_applications(self, tables: ColumnarTables) -> pd.DataFrame:
+        """Applications of students who are counted in university: applicable and not listed yet"""
+        applications: pd.DataFrame = tables.get_applications_frame()
+        listed: np.ndarray = applications['student_id'].isin(tables.get_listed_frame()['student_id']).to_numpy()
+        return applications[applications['applicable'].to_numpy() & ~listed]
+
+    @staticmethod
+    def __profile_applications(tables: ColumnarTables, university: University, profile: Profile) -> pd.DataFrame:
+        applications: pd.DataFrame = tables.get_applications_frame()
+        return applications[(applications['university'] == university.name).to_numpy() &
+                            (applications['profile'] == str(profile)).to_numpy()]
+
+    @staticmethod
+    def __agreements_of(applications: pd.DataFrame, agreements: pd.Series) -> np.ndarray:
+        """Column of agreements of students who applied, empty for students without agreement"""
+        chosen: np.ndarray = agreements.astype(object).reindex(applications['student_id']).to_numpy(copy=True)
+        chosen[pd.isna(chosen)] = ""
+        return chosen
+
+    @staticmethod
+    def __scores_statistics(scores: np.ndarray) -> Tuple[float, float, float, float, float]:
+        """
+        Average, median and top 20%, 10% and 5% scores rounded as by service: percentiles follow
+        statistics.quantiles with the default exclusive method
+        """
+        scores = np.sort(scores.astype(np.int64))
+        length: int = len(scores)
+        middle: int = length // 2
+        median: float = scores[middle] if length % 2 else (scores[middle - 1] + scores[middle]) / 2
+        points: np.ndarray = np.array([80, 90, 95]) * (length + 1)
+        lower: np.ndarray = np.clip(points // 100, 1, length - 1)
+        delta: np.ndarray = points - lower * 100
+        percentiles: np.ndarray = (scores[lower - 1] * (100 - delta) + scores[lower] * delta) / 100
+        return (round(int(scores.sum()) / length, 1), round(float(median), 1),
+                *[round(float(percentile), 1) for percentile in percentiles])
+
+    def __get_competitor_overlap(self) -> CompetitorOverlap:
+        if self.__competitor_overlap is None:
+            self.__competitor_overlap = CompetitorOverlap(self.__service)
+        return self.__competitor_overlap
+
+    def __stage(self, name: str) -> ContextManager:
+        return self.__memory_tracker.stage(name) if self.__memory_tracker is not None else nullcontext()
+
+    @staticmethod
+    def __template_version(template_path: str, css_path: str) -> str:
+        digest = hashlib.sha256()
+        for path in [template_path, css_path]:
+            with open(path, 'rb') as file:
+                digest.update(file.read())
+        return digest.hexdigest()
+
+    @staticmethod
+    def __truncate_students_lists(student_id: StudentId,
+                                  students_lists: Dict[Tuple[University, Profile],
+                                                       List[Tuple[StudentId, int, Profile]]],
+                                  window: int) -> Dict[Tuple[University, Profile], Tuple[int, int]]:
+        """Truncates lists in place around the student, returns offset of kept part and full size of each list"""
+        windows: Dict[Tuple[University, Profile], Tuple[int, int]] = {}
+        for key, students in students_lists.items():
+            position: int = next((i for i, student in enumerate(students) if student[0] == student_id),
+                                 len(students) - 1)
+            start: int = max(0, position - window)
+            end: int = position + window + 1
+            if start > 0 or end < len(students):
+                windows[key] = (start, len(students))
+                students_lists[key] = students[start: end]
+        return windows
+
     def __build_dataframe(self, data: List[Tuple], headers: List[str]) -> pd.DataFrame:
         dataframe = pd.DataFrame(data, columns=headers)
         dataframe.index += 1
         return dataframe
 
+    def __build_frame(self, columns: List, headers: List[str]) -> pd.DataFrame:
+        """Same as __build_dataframe for data given by columns"""
+        dataframe = pd.DataFrame({header: np.asarray(column) for header, column in zip(headers, columns)})
+        dataframe.index += 1
+        return dataframe
+
     def __fetch_students_lists(self, applications: List[Tuple[University, Profile, int, int, int, int]]) -> \
             Dict[Tuple[University, Profile], List[Tuple[StudentId, int, Profile]]]:
         lists = {}
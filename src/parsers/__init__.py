@@ -1,4 +1,6 @@
 from src.parsers.parser import Parser
+from src.parsers.detector import ParserDetector
+from src.parsers.student_id import IdRule, StudentIdNormalizer
 
 from src.parsers.universities.BMSTU import BmstuParser
 from src.parsers.universities.ITMO import ItmoParser
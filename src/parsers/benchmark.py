@@ -0,0 +1,152 @@
+from src.parsers.detector import ParserDetector
+from src.parsers.parser import CsvParser, FileExtension, Parser
+from src.utils import CustomLogger, open_data_file, strip_compression_suffix
+
+import inspect
+import json
+from os import listdir, remove
+from os.path import getsize, isfile, join
+import re
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List, NoReturn, Optional, Tuple
+
+
+class ParsersBenchmark:
+    """
+    Micro-benchmarks of university parsers on sample data files and their synthetic variants,
+    where the data rows of each file are repeated scale times. Measures parsing speed in rows per second
+    (best of several runs) and peak memory allocated by a single run.
+    """
+
+    DEFAULT_SCALES: List[int] = [1, 4]
+    DEFAULT_REPEATS: int = 3
+
+    __logger: CustomLogger = CustomLogger('ParsersBenchmark')
+
+    def __init__(self, data_dir: str, scales: Optional[List[int]] = None, repeats: int = DEFAULT_REPEATS):
+        if repeats <= 0:
+            raise Exception(f"Number of repeats should be positive, but {repeats} found")
+        self.__data_dir: str = data_dir
+        self.__scales: List[int] = scales if scales is not None else ParsersBenchmark.DEFAULT_SCALES
+        self.__repeats: int = repeats
+        self.__parsers: List[Parser] = [
+            parser_class() for parser_class in ParsersBenchmark.__all_subclasses(Parser)
+            if not inspect.isabstract(parser_class)
+        ]
+
+    def run(self) -> Dict[str, Dict]:
+        """Results by benchmark name '<parser>:<file>:x<scale>'"""
+        detector: ParserDetector = ParserDetector(self.__parsers)
+        results: Dict[str, Dict] = {}
+        for file in sorted(listdir(self.__data_dir)):
+            file_path: str = join(self.__data_dir, file)
+            if not isfile(file_path):
+                continue
+            detected: Optional[Tuple[Parser, FileExtension]] = detector.detect(file_path)
+            if detected is None:
+                continue
+            parser, extension = detected
+            for scale in self.__scales:
+                name: str = f"{parser.__class__.__name__}:{file}:x{scale}"
+                results[name] = self.__measure(parser, file_path, extension, scale)
+                ParsersBenchmark.__logger.info("%s: %s rows/s, peak memory %s KiB.", name,
+                                               results[name]['rows_per_second'],
+                                               results[name]['peak_memory'] // 1024)
+        return results
+
+    @staticmethod
+    def save(results: Dict[str, Dict], file_path: str) -> NoReturn:
+        with open(file_path, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+
+    @staticmethod
+    def load(file_path: str) -> Dict[str, Dict]:
+        with open(file_path, encoding='utf-8') as file:
+            return json.load(file)
+
+    @staticmethod
+    def compare(baseline: Dict[str, Dict], current: Dict[str, Dict], threshold: float) -> \
+            List[Tuple[str, float, float]]:
+        """Benchmarks that got slower than baseline by more than threshold (0.2 is 20%), with both speeds"""
+        regressions: List[Tuple[str, float, float]] = []
+        for name, result in current.items():
+            if name not in baseline:
+                continue
+            baseline_speed: float = baseline[name]['rows_per_second']
+            if result['rows_per_second'] < baseline_speed * (1 - threshold):
+                regressions.append((name, baseline_speed, result['rows_per_second']))
+        return regressions
+
+    @staticmethod
+    def get_format_costs(results: Dict[str, Dict]) -> Dict[FileExtension, float]:
+        """Measured parsing cost of each format in seconds per megabyte, as used by the loader cost model"""
+        seconds: Dict[FileExtension, float] = {}
+        sizes: Dict[FileExtension, int] = {}
+        for result in results.values():
+            extension: FileExtension = FileExtension(result['format'])
+            seconds[extension] = seconds.get(extension, 0) + result['seconds']
+            sizes[extension] = sizes.get(extension, 0) + result['bytes']
+        return {extension: seconds[extension] / (sizes[extension] / (1024 * 1024))
+                for extension in seconds.keys() if sizes[extension] > 0}
+
+    def __measure(self, parser: Parser, file_path: str, extension: FileExtension, scale: int) -> Dict:
+        path: str = file_path if scale == 1 else ParsersBenchmark.__scaled_copy(parser, file_path, extension, scale)
+        try:
+            university = parser.for_university()
+            best_time: float = float('inf')
+            rows: int = 0
+            for _ in range(self.__repeats):
+                started_at: float = time.perf_counter()
+                rows = len(parser.parse(university, path, extension))
+                best_time = min(best_time, time.perf_counter() - started_at)
+
+            # memory is traced in a separate run, as tracing slows parsing down
+            tracemalloc.start()
+            parser.parse(university, path, extension)
+            peak_memory: int = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            return {
+                'format': extension.value,
+                'scale': scale,
+                'bytes': getsize(path),
+                'rows': rows,
+                'seconds': round(best_time, 6),
+                'rows_per_second': round(rows / best_time, 1) if best_time > 0 else 0.0,
+                'peak_memory': peak_memory
+            }
+        finally:
+            if path != file_path:
+                remove(path)
+
+    @staticmethod
+    def __scaled_copy(parser: Parser, file_path: str, extension: FileExtension, scale: int) -> str:
+        with open_data_file(file_path) as file:
+            content: str = file.read()
+
+        if extension == FileExtension.CSV:
+            # header and sub-header lines skipped by parser stay the same, only data rows are repeated
+            number_of_header_lines: int = 1 + parser._number_of_skipped_header_lines() \
+                if isinstance(parser, CsvParser) else 1
+            lines: List[str] = content.split('\n', number_of_header_lines)
+            body: str = lines[number_of_header_lines] if len(lines) > number_of_header_lines else ''
+            body = body if body.endswith('\n') else body + '\n'
+            content = '\n'.join(lines[:number_of_header_lines]) + '\n' + body * scale
+        else:
+            # rows of each table body are repeated, headers of tables stay the same
+            content = re.sub(r'(<tbody[^>]*>)(.*?)(</tbody>)',
+                             lambda found: found.group(1) + found.group(2) * scale + found.group(3),
+                             content, flags=re.DOTALL | re.IGNORECASE)
+
+        suffix: str = '.' + strip_compression_suffix(file_path).split('.')[-1]
+        with tempfile.NamedTemporaryFile('w', suffix=suffix, encoding='utf-8', delete=False) as scaled_file:
+            scaled_file.write(content)
+        return scaled_file.name
+
+    @staticmethod
+    def __all_subclasses(cls) -> List[type]:
+        subclasses = set(cls.__subclasses__()).union(
+            [s for c in cls.__subclasses__() for s in ParsersBenchmark.__all_subclasses(c)])
+        return sorted(subclasses, key=lambda subclass: subclass.__name__)
@@ -0,0 +1,95 @@
+from src.parsers.parser import CsvParser, FileExtension, HeadersMapping, Parser
+from src.utils import CustomLogger, open_data_file, strip_compression_suffix
+
+import csv
+import html
+from os.path import basename
+import re
+from typing import Dict, List, Optional, Pattern, Set, Tuple
+
+
+class ParserDetector:
+    """
+    Detects parser and format of data file by its headers instead of file name.
+    Index of all parsers headers is built once, so each file is matched by a single lookup of its header row.
+    """
+
+    # applications table headers of all known sources are located within this prefix of html page
+    HTML_PREFIX_SIZE: int = 512 * 1024
+
+    __logger: CustomLogger = CustomLogger('ParserDetector')
+
+    def __init__(self, parsers: List[Parser]):
+        self.__index: Dict[FileExtension, Dict[str, List[Tuple[Parser, HeadersMapping]]]] = {
+            extension: {} for extension in FileExtension
+        }
+        self.__csv_delimiters: List[str] = []
+        for parser in parsers:
+            for extension, headers_mapping in parser.headers_signatures().items():
+                self.__index[extension].setdefault(headers_mapping.id, []).append((parser, headers_mapping))
+            if isinstance(parser, CsvParser) and parser._delimiter() not in self.__csv_delimiters:
+                self.__csv_delimiters.append(parser._delimiter())
+
+        html_ids: List[str] = sorted(self.__index[FileExtension.HTML].keys(), key=len, reverse=True)
+        self.__html_ids_pattern: Optional[Pattern] = re.compile('|'.join(re.escape(name) for name in html_ids)) \
+            if html_ids else None
+        self.__csv_signatures: Dict[Tuple[str, ...], List[Parser]] = {}
+
+    def detect(self, file_path: str) -> Optional[Tuple[Parser, FileExtension]]:
+        """Returns parser and format of file, or None if file is not text or its headers are unknown or ambiguous"""
+        try:
+            with open_data_file(file_path) as file:
+                prefix: str = file.read(ParserDetector.HTML_PREFIX_SIZE)
+        except Exception as e:
+            # e.g. binary files or compressed files without installed decompressor
+            ParserDetector.__logger.warn("File %s can't be read as text: %s.", file_path, e)
+            return None
+
+        if prefix.lstrip().startswith('<'):
+            extension: FileExtension = FileExtension.HTML
+            candidates: List[Parser] = self.__detect_html(prefix)
+        else:
+            extension: FileExtension = FileExtension.CSV
+            candidates: List[Parser] = self.__detect_csv(prefix.split('\n', 1)[0])
+
+        if len(candidates) > 1:
+            # the same headers are used by several universities, so file name is the only hint left
+            file_name: str = strip_compression_suffix(basename(file_path))
+            candidates = [parser for parser in candidates if file_name.startswith(parser.for_university().name)]
+
+        if not candidates:
+            return None
+        elif len(candidates) > 1:
+            ParserDetector.__logger.warn("Several parsers %s match %s file %s.",
+                                         [parser.for_university() for parser in candidates], extension.value,
+                                         file_path)
+            return None
+        return candidates[0], extension
+
+    def __detect_csv(self, header_line: str) -> List[Parser]:
+        for delimiter in self.__csv_delimiters:
+            headers: Tuple[str, ...] = tuple(next(csv.reader([header_line], delimiter=delimiter), []))
+            if headers not in self.__csv_signatures:
+                self.__csv_signatures[headers] = self.__match(FileExtension.CSV, headers, set(headers))
+            if self.__csv_signatures[headers]:
+                return self.__csv_signatures[headers]
+        return []
+
+    def __detect_html(self, prefix: str) -> List[Parser]:
+        if self.__html_ids_pattern is None:
+            return []
+        text: str = html.unescape(re.sub(r'<[^>]*>', '', prefix))
+        found = self.__html_ids_pattern.search(text)
+        if found is None:
+            return []
+        return [parser for parser, headers_mapping in self.__index[FileExtension.HTML][found.group(0)]
+                if headers_mapping.score in text and headers_mapping.agreement_submitted in text]
+
+    def __match(self, extension: FileExtension, headers: Tuple[str, ...], headers_set: Set[str]) -> List[Parser]:
+        candidates: List[Parser] = []
+        for header in headers:
+            for parser, headers_mapping in self.__index[extension].get(header, []):
+                if headers_mapping.score in headers_set and headers_mapping.agreement_submitted in headers_set and \
+                        parser not in candidates:
+                    candidates.append(parser)
+        return candidates
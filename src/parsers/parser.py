@@ -2,13 +2,16 @@ from abc import ABCMeta, abstractmethod
 from enum import Enum
 
 from src.core import StudentId, Student, University
-from src.utils import CustomLogger
+from src.parsers.student_id import IdRule, StudentIdNormalizer
+from src.utils import CustomLogger, open_data_file, strip_compression_suffix
 
-from bs4 import BeautifulSoup
-from bs4.element import ResultSet, Tag
 import csv
 from dataclasses import dataclass, field
-from typing import Callable, Dict, Optional, List, TextIO, Tuple
+from html.parser import HTMLParser
+from lxml import etree
+from lxml.html import HtmlElement
+import lxml.html
+from typing import Any, Callable, Dict, FrozenSet, Iterator, NoReturn, Optional, List, TextIO, Tuple
 
 
 class FileExtension(Enum):
@@ -29,28 +32,91 @@ class HeadersMapping:
 
 class Parser(metaclass=ABCMeta):
 
-    def __init__(self):
+    DEFAULT_CHUNK_SIZE: int = 10000
+
+    # positions of named columns by (headers, names) signature, shared by all parsers
+    __header_positions_cache: Dict[Tuple[Tuple[str, ...], Tuple[str, ...]], List[int]] = {}
+
+    def __init__(self, check_snils_checksum: bool = False):
+        """If check_snils_checksum is set, rows with SNILS having wrong control number are rejected"""
         self._logger: CustomLogger = CustomLogger(self.__class__.__name__)
+        self.__student_id_normalizer: StudentIdNormalizer = StudentIdNormalizer(self._student_id_rules(),
+                                                                                check_snils_checksum)
 
-    def parse(self, university: University, file_path: str) -> List[Student]:
+    def parse(self, university: University, file_path: str,
+              file_extension: Optional[FileExtension] = None) -> List[Student]:
         students: List[Student] = []
 
-        with open(file_path, 'r', encoding='utf-8-sig') as file:
+        with open_data_file(file_path) as file:
             self._logger.info("University %s file %s read started.", university, file_path)
-            file_extension: FileExtension = FileExtension(file_path.split('.')[-1])
-            for parser in Parser.__subclasses__():
-                if isinstance(self, parser) and file_extension in parser.supported_file_extensions(self):
-                    students = parser._parse_data(self, file, file_extension)
-                    break
+            if file_extension is None:
+                file_extension = FileExtension(strip_compression_suffix(file_path).split('.')[-1])
+            parser = self.__find_format_parser(file_extension)
+            if parser is not None:
+                students = parser._parse_data(self, file, file_extension)
             self._logger.info("%s student applications uploaded from file %s.", len(students), file_path)
             self._logger.info("University %s file %s read finished.", university, file_path)
 
         return students
 
+    def parse_in_chunks(self, university: University, file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                        file_extension: Optional[FileExtension] = None) -> Iterator[List[Student]]:
+        """
+        Lazily reads student applications from file and yields them in chunks of at most chunk_size students,
+        so the whole file is never materialized as a single list. CSV rows are read one by one, HTML page
+        is parsed incrementally and each table row is dropped as soon as its student is parsed.
+        """
+        if chunk_size <= 0:
+            raise Exception(f"Chunk size should be positive, but {chunk_size} found")
+
+        with open_data_file(file_path) as file:
+            self._logger.info("University %s file %s streaming read started.", university, file_path)
+            if file_extension is None:
+                file_extension = FileExtension(strip_compression_suffix(file_path).split('.')[-1])
+            parser = self.__find_format_parser(file_extension)
+
+            number_of_students: int = 0
+            if parser is not None:
+                chunk: List[Student] = []
+                for student in parser._iterate_data(self, file, file_extension):
+                    chunk.append(student)
+                    if len(chunk) >= chunk_size:
+                        number_of_students += len(chunk)
+                        yield chunk
+                        chunk = []
+                if chunk:
+                    number_of_students += len(chunk)
+                    yield chunk
+            self._logger.info("%s student applications streamed from file %s.", number_of_students, file_path)
+            self._logger.info("University %s file %s streaming read finished.", university, file_path)
+
+    def headers_signatures(self) -> Dict[FileExtension, HeadersMapping]:
+        """Headers mapping for each supported file format, used to detect parser by file headers"""
+        return {extension: self._headers_mapping(extension) for extension in self.supported_file_extensions()}
+
+    def _header_positions(self, headers: List[str], names: List[str]) -> List[int]:
+        """Positions of named columns in headers, looked up once per headers signature"""
+        signature: Tuple[Tuple[str, ...], Tuple[str, ...]] = (tuple(headers), tuple(names))
+        positions: Optional[List[int]] = Parser.__header_positions_cache.get(signature)
+        if positions is None:
+            positions = [headers.index(name) for name in names]
+            Parser.__header_positions_cache[signature] = positions
+        return positions
+
+    def __find_format_parser(self, file_extension: FileExtension) -> Optional[type]:
+        for parser in Parser.__subclasses__():
+            if isinstance(self, parser) and file_extension in parser.supported_file_extensions(self):
+                return parser
+        return None
+
     @abstractmethod
     def _parse_data(self, file: TextIO, extension: FileExtension) -> List[Student]:
         raise NotImplementedError("Please Implement this method")
 
+    @abstractmethod
+    def _iterate_data(self, file: TextIO, extension: FileExtension) -> Iterator[Student]:
+        raise NotImplementedError("Please Implement this method")
+
     @abstractmethod
     def for_university(self) -> University:
         raise NotImplementedError("Please Implement this method")
@@ -64,9 +130,13 @@ class Parser(metaclass=ABCMeta):
         raise NotImplementedError("Please Implement this method")
 
     @abstractmethod
-    def _parse_student_id(self, raw_id: str) -> StudentId:
+    def _student_id_rules(self) -> List[IdRule]:
+        """Rules of student id normalization in order of precedence"""
         raise NotImplementedError("Please Implement this method")
 
+    def _parse_student_id(self, raw_id: str) -> StudentId:
+        return self.__student_id_normalizer.normalize(raw_id)
+
     @abstractmethod
     def _parse_dormitory_requirement(self, raw_value) -> bool:
         raise NotImplementedError("Please Implement this method")
@@ -78,13 +148,40 @@ class Parser(metaclass=ABCMeta):
     def _excluding_conditions(self) -> Dict[str, Callable[[str], bool]]:
         return {}
 
+    def _compile_excluding_filter(self, headers: List[str], value_of: Optional[Callable[[Any], str]] = None) -> \
+            Optional[Callable[[List[Any]], bool]]:
+        """
+        Compiles all excluding conditions into a single short-circuit predicate over row values,
+        so rows are rejected before any of their fields are parsed. Returns None if nothing to exclude.
+        """
+        excluding_conditions: Dict[str, Callable[[str], bool]] = self._excluding_conditions()
+        if not excluding_conditions:
+            return None
+
+        checks: List[Tuple[int, Callable[[str], bool]]] = list(zip(
+            self._header_positions(headers, list(excluding_conditions.keys())), excluding_conditions.values()
+        ))
+        if value_of is None:
+            if len(checks) == 1:
+                position, condition = checks[0]
+                return lambda values: condition(values[position])
+            return lambda values: any(condition(values[position]) for position, condition in checks)
+        else:
+            if len(checks) == 1:
+                position, condition = checks[0]
+                return lambda values: condition(value_of(values[position]))
+            return lambda values: any(condition(value_of(values[position])) for position, condition in checks)
+
 
 class CsvParser(Parser, metaclass=ABCMeta):
 
     def _parse_data(self, file: TextIO, extension: FileExtension) -> List[Student]:
+        return list(CsvParser._iterate_data(self, file, extension))
+
+    def _iterate_data(self, file: TextIO, extension: FileExtension) -> Iterator[Student]:
         if extension != FileExtension.CSV:
             raise Exception('Incompatible file extension')
-        return self.__read_csv(file)
+        return self.__iterate_csv(file)
 
     def supported_file_extensions(self) -> List[FileExtension]:
         return [FileExtension.CSV]
@@ -95,20 +192,15 @@ class CsvParser(Parser, metaclass=ABCMeta):
     def _delimiter(self) -> chr:
         return ';'
 
-    def __read_csv(self, file: TextIO) -> List[Student]:
-        students: List[Student] = []
-
+    def __iterate_csv(self, file: TextIO) -> Iterator[Student]:
         reader = csv.reader(file, delimiter=self._delimiter())
         headers = next(reader)
 
-        conditions_to_filter_out: Dict[int, Callable[[str], bool]] = {}
-        for header_name, condition in self._excluding_conditions().items():
-            condition_value_position: int = headers.index(header_name)
-            conditions_to_filter_out[condition_value_position] = condition
+        should_skip_row: Optional[Callable[[List[str]], bool]] = self._compile_excluding_filter(headers)
 
         headers_mapping: HeadersMapping = self._headers_mapping(FileExtension.CSV)
-        data_positions: List[int] = [headers.index(name) for name in [headers_mapping.id, headers_mapping.score,
-                                                                      headers_mapping.agreement_submitted]]
+        data_positions: List[int] = self._header_positions(headers, [headers_mapping.id, headers_mapping.score,
+                                                                     headers_mapping.agreement_submitted])
 
         skip_header_lines: int = self._number_of_skipped_header_lines()
         for i in range(skip_header_lines):
@@ -119,80 +211,203 @@ class CsvParser(Parser, metaclass=ABCMeta):
             try:
                 line_number += 1
 
-                # filter out if any excluding condition met
-                should_skip_student: bool = False
-                for position, condition in conditions_to_filter_out.items():
-                    if condition(row[position]):
-                        should_skip_student = True
+                # filter out if any excluding condition met before parsing anything
+                if should_skip_row is not None and should_skip_row(row):
+                    continue
 
                 student_id: StudentId = self._parse_student_id(row[data_positions[0]])
                 score: int = int(row[data_positions[1]])
                 agreement_submitted: bool = self._parse_agreement_submission(row[data_positions[2]])
 
-                if not should_skip_student:
-                    students.append(Student(student_id, score, agreement_submitted))
+                yield Student(student_id, score, agreement_submitted)
             except Exception as e:
                 self._logger.error("An exception occurred in line %s: %s.", line_number, str(e))
 
-        return students
-
 
 class HtmlParser(Parser, metaclass=ABCMeta):
 
+    # number of characters of page fed to parser at once
+    __READ_SIZE: int = 1 << 16
+
     def _parse_data(self, file: TextIO, extension: FileExtension) -> List[Student]:
+        return list(HtmlParser._iterate_data(self, file, extension))
+
+    def _iterate_data(self, file: TextIO, extension: FileExtension) -> Iterator[Student]:
         if extension != FileExtension.HTML:
             raise Exception('Incompatible file extension')
-        return self.__read_html(file)
+        return self.__iterate_html(file)
 
     def supported_file_extensions(self) -> List[FileExtension]:
         return [FileExtension.HTML]
 
     @abstractmethod
-    def _find_applications_table_data(self, data: BeautifulSoup) -> Tuple[List[str], ResultSet[Tag]]:
+    def _is_applications_table(self, table: HtmlElement) -> bool:
+        """
+        Checked when table starts, so only its attributes, ancestors and preceding siblings are parsed.
+        The first matching table is read
+        """
         raise NotImplementedError("Please Implement this method")
 
+    def _number_of_header_rows(self) -> int:
+        """Rows of applications table before rows of applications"""
+        return 1
+
     @abstractmethod
-    def _parse_student_from_html_row(self, row: Tag, positions: List[int]) -> Student:
+    def _parse_headers(self, rows: List[HtmlElement]) -> List[str]:
         raise NotImplementedError("Please Implement this method")
 
-    def __read_html(self, file: TextIO) -> List[Student]:
-        students: List[Student] = []
+    @abstractmethod
+    def _parse_student_from_html_row(self, row: HtmlElement, positions: List[int]) -> Student:
+        raise NotImplementedError("Please Implement this method")
 
-        data = BeautifulSoup(file.read(), 'lxml')
+    def __iterate_html(self, file: TextIO) -> Iterator[Student]:
+        # page is parsed incrementally, each row is parsed as soon as it ends and dropped from the tree,
+        # so only header rows and the rest of the page outside of tables are kept
+        html_parser: _HtmlTreeBuilder = _HtmlTreeBuilder()
 
-        general_contest: Tuple[List[str], ResultSet[Tag]] = self._find_applications_table_data(data)
+        table: Optional[HtmlElement] = None
+        header_rows: List[HtmlElement] = []
+        data_positions: List[int] = []
+        should_skip_row: Optional[Callable[[List[HtmlElement]], bool]] = None
 
-        headers: List[str] = general_contest[0]
+        line_number: int = 0
+        data: str = file.read(HtmlParser.__READ_SIZE)
+        while True:
+            if data:
+                html_parser.feed(data)
+            else:
+                html_parser.close()
+            for event, element in html_parser.read_events():
+                if event == 'start':
+                    if table is None and element.tag == 'table' and self._is_applications_table(element):
+                        table = element
+                    continue
+                if element.tag != 'tr':
+                    continue
+                if table is None or next(element.iterancestors('table'), None) is not table:
+                    # rows of tables nested into applications table are kept as a part of application rows
+                    if table is None or all(ancestor is not table for ancestor in element.iterancestors()):
+                        HtmlParser.__drop(element)
+                    continue
+
+                if len(header_rows) < self._number_of_header_rows():
+                    header_rows.append(element)
+                    if len(header_rows) == self._number_of_header_rows():
+                        data_positions, should_skip_row = self.__read_headers(header_rows)
+                    continue
+
+                try:
+                    line_number += 1
+
+                    # filter out if any excluding condition met, row cells are looked up only once
+                    if should_skip_row is not None and should_skip_row(element.findall('td')):
+                        continue
+
+                    yield self._parse_student_from_html_row(element, data_positions)
+                except Exception as e:
+                    self._logger.error("An exception occurred in line %s: %s.", line_number, str(e))
+                finally:
+                    HtmlParser.__drop(element)
+            if not data:
+                break
+            data = file.read(HtmlParser.__READ_SIZE)
+
+        if table is None:
+            raise Exception("Applications table not found")
+
+    def __read_headers(self, header_rows: List[HtmlElement]) -> \
+            Tuple[List[int], Optional[Callable[[List[HtmlElement]], bool]]]:
+        headers: List[str] = self._parse_headers(header_rows)
         headers_mapping: HeadersMapping = self._headers_mapping(FileExtension.HTML)
-        data_positions: List[int] = [headers.index(name) for name in [headers_mapping.id,
-                                                                      headers_mapping.score,
-                                                                      headers_mapping.agreement_submitted,
-                                                                      headers_mapping.dormitory_requirement]]
+        data_positions: List[int] = self._header_positions(headers, [headers_mapping.id,
+                                                                     headers_mapping.score,
+                                                                     headers_mapping.agreement_submitted,
+                                                                     headers_mapping.dormitory_requirement])
 
         if len(data_positions) > 4:
             raise Exception("Only 4 values can be read from table rows")
 
-        conditions_to_filter_out: Dict[int, Callable[[str], bool]] = {}
-        for header_name, condition in self._excluding_conditions().items():
-            condition_value_position: int = headers.index(header_name)
-            conditions_to_filter_out[condition_value_position] = condition
-
-        line_number: int = 0
-        applications_data: ResultSet[Tag] = general_contest[1]
-        for application in applications_data:
-            try:
-                line_number += 1
-
-                # filter out if any excluding condition met
-                should_skip_student: bool = False
-                for position, condition in conditions_to_filter_out.items():
-                    values: List[Tag] = application.findAll('td', recursive=False)
-                    if condition(values[position].text):
-                        should_skip_student = True
-
-                if not should_skip_student:
-                    students.append(self._parse_student_from_html_row(application, data_positions))
-            except Exception as e:
-                self._logger.error("An exception occurred in line %s: %s.", line_number, str(e))
+        return data_positions, self._compile_excluding_filter(headers, lambda cell: cell.text_content())
+
+    @staticmethod
+    def __drop(row: HtmlElement) -> NoReturn:
+        row.clear(keep_tail=True)
+        while row.getprevious() is not None:
+            del row.getparent()[0]
+
+
+class _HtmlTreeBuilder(HTMLParser):
+    """
+    Builds lxml tree of page fed by parts and collects start and end events of its elements, like lxml pull parser
+    does. Unlike libxml2 parser, it doesn't keep the whole fed page in its input buffer. Only end tags implied
+    by table structure are inserted: open cells are closed by the next cell or row, open rows by the next row
+    or table section, unmatched end tags are ignored.
+    """
+
+    __VOID_TAGS: FrozenSet[str] = frozenset(['area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+                                             'meta', 'param', 'source', 'track', 'wbr'])
+    # start tag closes the nearest open element with one of the first tags, unless one of the second ones is nearer
+    __IMPLIED_ENDS: Dict[str, Tuple[FrozenSet[str], FrozenSet[str]]] = {
+        'td': (frozenset(['td', 'th']), frozenset(['tr', 'table'])),
+        'th': (frozenset(['td', 'th']), frozenset(['tr', 'table'])),
+        'tr': (frozenset(['tr']), frozenset(['thead', 'tbody', 'tfoot', 'table'])),
+        'thead': (frozenset(['thead', 'tbody', 'tfoot']), frozenset(['table'])),
+        'tbody': (frozenset(['thead', 'tbody', 'tfoot']), frozenset(['table'])),
+        'tfoot': (frozenset(['thead', 'tbody', 'tfoot']), frozenset(['table']))
+    }
 
-        return students
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.__builder: etree.TreeBuilder = etree.TreeBuilder(parser=lxml.html.HTMLParser())
+        # tags of open elements, the synthetic root keeps everything before and after the html element
+        self.__open_tags: List[str] = ['document']
+        self.__events: List[Tuple[str, HtmlElement]] = []
+        self.__builder.start('document', {})
+
+    def read_events(self) -> List[Tuple[str, HtmlElement]]:
+        events: List[Tuple[str, HtmlElement]] = self.__events
+        self.__events = []
+        return events
+
+    def close(self) -> NoReturn:
+        super().close()
+        while len(self.__open_tags) > 1:
+            self.__end()
+        self.__builder.end('document')
+        self.__builder.close()
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> NoReturn:
+        if tag in _HtmlTreeBuilder.__IMPLIED_ENDS:
+            closed_tags, boundary_tags = _HtmlTreeBuilder.__IMPLIED_ENDS[tag]
+            for depth in range(len(self.__open_tags) - 1, 0, -1):
+                if self.__open_tags[depth] in boundary_tags:
+                    break
+                if self.__open_tags[depth] in closed_tags:
+                    self.__end_to(depth)
+                    break
+        element: HtmlElement = self.__builder.start(tag, {name: value or '' for name, value in attrs})
+        self.__events.append(('start', element))
+        self.__open_tags.append(tag)
+        if tag in _HtmlTreeBuilder.__VOID_TAGS:
+            self.__end()
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> NoReturn:
+        self.handle_starttag(tag, attrs)
+        if tag not in _HtmlTreeBuilder.__VOID_TAGS:
+            self.__end()
+
+    def handle_endtag(self, tag: str) -> NoReturn:
+        for depth in range(len(self.__open_tags) - 1, 0, -1):
+            if self.__open_tags[depth] == tag:
+                self.__end_to(depth)
+                break
+
+    def handle_data(self, data: str) -> NoReturn:
+        self.__builder.data(data)
+
+    def __end_to(self, depth: int) -> NoReturn:
+        while len(self.__open_tags) > depth:
+            self.__end()
+
+    def __end(self) -> NoReturn:
+        self.__events.append(('end', self.__builder.end(self.__open_tags.pop())))
@@ -0,0 +1,88 @@
+from src.core import StudentId
+
+from dataclasses import dataclass, field
+import re
+from typing import Dict, List, Optional, Pattern, Sequence
+
+
+@dataclass(frozen=True)
+class IdRule:
+    """
+    Rule of student id normalization: if pattern matches the beginning of raw id, id is formatted by template,
+    where {0} is the whole raw id and {1}, {2}, ... are groups of pattern
+    """
+    pattern: str
+    template: str = field(default='{0}')
+
+
+# canonical SNILS 'xxx-xxx-xxx yy' kept as it is, some universities allow leading zero
+SNILS: IdRule = IdRule('[1-9][0-9]{2}-[0-9]{3}-[0-9]{3} [0-9]{2}')
+SNILS_WITH_LEADING_ZERO: IdRule = IdRule('[0-9]{3}-[0-9]{3}-[0-9]{3} [0-9]{2}')
+
+# SNILS numbers not greater than this one have no control number
+_MAX_NUMBER_WITHOUT_CHECKSUM: int = 1001998
+
+
+def _is_canonical_snils(value: str, leading_zero_allowed: bool) -> bool:
+    if len(value) != 14 or value[3] != '-' or value[7] != '-' or value[11] != ' ':
+        return False
+    digits: str = value[0:3] + value[4:7] + value[8:11] + value[12:14]
+    return digits.isascii() and digits.isdigit() and (leading_zero_allowed or value[0] != '0')
+
+
+def is_snils_checksum_valid(value: str) -> bool:
+    """Checks control number of canonical SNILS 'xxx-xxx-xxx yy', values of other form are not checked"""
+    if not _is_canonical_snils(value, True):
+        return True
+    digits: str = value[0:3] + value[4:7] + value[8:11]
+    if int(digits) <= _MAX_NUMBER_WITHOUT_CHECKSUM:
+        return True
+    total: int = sum(int(digit) * (9 - i) for i, digit in enumerate(digits))
+    return total % 101 % 100 == int(value[12:14])
+
+
+class StudentIdNormalizer:
+    """
+    Table-driven normalization of raw student ids: rules are tried in order, the first matching one formats the id.
+    Raw ids already in canonical SNILS form skip pattern matching, when rules include SNILS kept as it is.
+    Normalized ids are cached by raw value, as the same students appear in many lists.
+    """
+
+    MAX_CACHE_SIZE: int = 200000
+
+    def __init__(self, rules: Sequence[IdRule], check_snils_checksum: bool = False):
+        """If check_snils_checksum is set, ids normalized to SNILS with wrong control number are rejected"""
+        self.__rules: List[IdRule] = list(rules)
+        self.__patterns: List[Pattern] = [re.compile(rule.pattern, re.DOTALL) for rule in self.__rules]
+        self.__check_snils_checksum: bool = check_snils_checksum
+        self.__cache: Dict[str, StudentId] = {}
+
+        # rules before SNILS are still tried for canonical SNILS, as they take precedence
+        self.__snils_position: Optional[int] = next(
+            (i for i, rule in enumerate(self.__rules) if rule in (SNILS, SNILS_WITH_LEADING_ZERO)), None
+        )
+        self.__leading_zero_allowed: bool = self.__snils_position is not None and \
+            self.__rules[self.__snils_position] == SNILS_WITH_LEADING_ZERO
+
+    def normalize(self, raw_id: str) -> StudentId:
+        student_id: Optional[StudentId] = self.__cache.get(raw_id)
+        if student_id is None:
+            student_id = StudentId(self.__format(raw_id))
+            if self.__check_snils_checksum and not is_snils_checksum_valid(student_id.id):
+                raise Exception("found invalid SNILS checksum", raw_id)
+            if len(self.__cache) >= StudentIdNormalizer.MAX_CACHE_SIZE:
+                self.__cache.clear()
+            self.__cache[raw_id] = student_id
+        return student_id
+
+    def __format(self, raw_id: str) -> str:
+        last_rule: int = len(self.__rules)
+        if self.__snils_position is not None and _is_canonical_snils(raw_id, self.__leading_zero_allowed):
+            last_rule = self.__snils_position
+        for rule, pattern in zip(self.__rules[:last_rule], self.__patterns[:last_rule]):
+            found = pattern.match(raw_id)
+            if found is not None:
+                return rule.template.format(raw_id, *found.groups())
+        if last_rule < len(self.__rules):
+            return raw_id
+        raise Exception("found incompatible id", raw_id)
@@ -1,10 +1,9 @@
-from src.core import StudentId, Student, University
+from src.core import Student, University
 from src.parsers.parser import FileExtension, HeadersMapping, HtmlParser
+from src.parsers.student_id import IdRule, SNILS
 
-from bs4 import BeautifulSoup
-from bs4.element import ResultSet, Tag
-from re import match
-from typing import List, Tuple
+from lxml.html import HtmlElement
+from typing import List
 
 
 class MaiParser(HtmlParser):
@@ -16,13 +15,11 @@ class MaiParser(HtmlParser):
         return HeadersMapping('СНИЛС/УКП', 'Сумма конкурсных баллов', 'Согласие на\xa0зачисление',
                               'Нуждаемость в\xa0общежитии')
 
-    def _parse_student_id(self, raw_id: str) -> StudentId:
-        if match('[1-9][0-9]{2}-[0-9]{3}-[0-9]{3} [0-9]{2}', raw_id):
-            return StudentId(raw_id)
-        elif match('[0-9]{9}', raw_id):
-            return StudentId(f"MAI № {raw_id}")
-        else:
-            raise Exception("found incompatible id", raw_id)
+    def _student_id_rules(self) -> List[IdRule]:
+        return [
+            SNILS,
+            IdRule('[0-9]{9}', 'MAI № {0}')
+        ]
 
     def _parse_dormitory_requirement(self, raw_value: str) -> bool:
         if raw_value == '✓':
@@ -40,25 +37,24 @@ class MaiParser(HtmlParser):
         else:
             raise Exception("found incompatible agreement", raw_value)
 
-    def _find_applications_table_data(self, data: BeautifulSoup) -> Tuple[List[str], ResultSet[Tag]]:
-        tables = data.find('div', attrs={'id': 'tab'})
-        should_use_next = False
-        for child in tables.findChildren():
-            if should_use_next:
-                return [el.text for el in child.tbody.find('tr', recursive=False).findAll('th', recursive=False)],\
-                       child.tbody.findAll('tr', recursive=False)[1:]
-            if child.text == 'Лица, поступающие по общему конкурсу':
-                should_use_next = True
-        raise Exception("WARNING: incorrect data structure")
+    def _is_applications_table(self, table: HtmlElement) -> bool:
+        title: HtmlElement = table.getprevious()
+        return title is not None and title.text_content() == 'Лица, поступающие по общему конкурсу' and \
+            any(ancestor.tag == 'div' and ancestor.get('id') == 'tab' for ancestor in table.iterancestors())
+
+    def _parse_headers(self, rows: List[HtmlElement]) -> List[str]:
+        return [el.text_content() for el in rows[0].findall('th')]
 
-    def _parse_student_from_html_row(self, row: Tag, positions: List[int]) -> Student:
-        values = row.findAll('td', recursive=False)
+    def _parse_student_from_html_row(self, row: HtmlElement, positions: List[int]) -> Student:
+        values = row.findall('td')
 
-        student_id = self._parse_student_id(values[positions[0]].nobr.text)
-        score = int(values[positions[1]].text)
+        student_id = self._parse_student_id(values[positions[0]].find('.//nobr').text_content())
+        score = int(values[positions[1]].text_content())
+        agreement = values[positions[2]].find('.//span')
         agreement_found = self._parse_agreement_submission(
-            values[positions[2]].span.text if values[positions[2]].find('span') else 'No')
+            agreement.text_content() if agreement is not None else 'No')
+        dormitory = values[positions[3]].find('.//span')
         dormitory_required = self._parse_dormitory_requirement(
-            values[positions[3]].span.text if values[positions[3]].find('span') else 'No')
+            dormitory.text_content() if dormitory is not None else 'No')
 
         return Student(student_id, score, agreement_found)
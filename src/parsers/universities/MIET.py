@@ -1,10 +1,9 @@
-from src.core import StudentId, Student, University
+from src.core import Student, University
 from src.parsers.parser import CsvParser, FileExtension, HeadersMapping, HtmlParser
+from src.parsers.student_id import IdRule, SNILS_WITH_LEADING_ZERO
 
-from bs4 import BeautifulSoup
-from bs4.element import ResultSet, Tag
-from re import match
-from typing import List, Tuple
+from lxml.html import HtmlElement
+from typing import List
 
 
 class MietParser(CsvParser, HtmlParser):
@@ -18,13 +17,11 @@ class MietParser(CsvParser, HtmlParser):
     def _headers_mapping(self, file_extension: FileExtension) -> HeadersMapping:
         return HeadersMapping('Рег. Номер', 'Сумма', 'Согласие', 'Общежитие')
 
-    def _parse_student_id(self, raw_id: str) -> StudentId:
-        if match('[0-9]{3}-[0-9]{3}-[0-9]{3} [0-9]{2}', raw_id):
-            return StudentId(raw_id)
-        elif match('[1-9][0-9]{4}', raw_id):
-            return StudentId(f"MIET № {raw_id}")
-        else:
-            raise Exception("found incompatible id", raw_id)
+    def _student_id_rules(self) -> List[IdRule]:
+        return [
+            SNILS_WITH_LEADING_ZERO,
+            IdRule('[1-9][0-9]{4}', 'MIET № {0}')
+        ]
 
     def _parse_dormitory_requirement(self, raw_value: str) -> bool:
         if raw_value == '+':
@@ -45,17 +42,19 @@ class MietParser(CsvParser, HtmlParser):
     def _number_of_skipped_header_lines(self) -> int:
         return 1
 
-    def _find_applications_table_data(self, data: BeautifulSoup) -> Tuple[List[str], ResultSet[Tag]]:
-        table = data.find('table', attrs={'id': 'dataTable'})
-        return [el.text for el in table.thead.find('tr').findAll('th', recursive=False)], table.tbody.findAll('tr')
+    def _is_applications_table(self, table: HtmlElement) -> bool:
+        return table.get('id') == 'dataTable'
+
+    def _parse_headers(self, rows: List[HtmlElement]) -> List[str]:
+        return [el.text_content() for el in rows[0].findall('th')]
 
-    def _parse_student_from_html_row(self, row: Tag, positions: List[int]) -> Student:
-        values = row.findAll('td', recursive=False)
+    def _parse_student_from_html_row(self, row: HtmlElement, positions: List[int]) -> Student:
+        values = row.findall('td')
 
-        student_id = self._parse_student_id(values[positions[0]].text)
-        score = int(values[positions[1]].text)
-        agreement_found = self._parse_agreement_submission(values[positions[2]].text)
-        dormitory_required = self._parse_dormitory_requirement(values[positions[3]].text)
+        student_id = self._parse_student_id(values[positions[0]].text_content())
+        score = int(values[positions[1]].text_content())
+        agreement_found = self._parse_agreement_submission(values[positions[2]].text_content())
+        dormitory_required = self._parse_dormitory_requirement(values[positions[3]].text_content())
 
         return Student(student_id, score, agreement_found)
 
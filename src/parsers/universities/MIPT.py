@@ -1,7 +1,8 @@
-from src.core import StudentId, University
+from src.core import University
 from src.parsers.parser import CsvParser, FileExtension, HeadersMapping
+from src.parsers.student_id import IdRule, SNILS
 
-from re import match
+from typing import List
 
 
 class MiptParser(CsvParser):
@@ -12,13 +13,11 @@ class MiptParser(CsvParser):
     def _headers_mapping(self, file_extension: FileExtension) -> HeadersMapping:
         return HeadersMapping('СНИЛС / ИНД №', 'С-ма с ИД', 'СЗ', 'Общежитие')
 
-    def _parse_student_id(self, raw_id: str) -> StudentId:
-        if match('[1-9][0-9]{2}-[0-9]{3}-[0-9]{3} [0-9]{2}', raw_id):
-            return StudentId(raw_id)
-        elif match('[1-9][0-9]{4}', raw_id):
-            return StudentId(f"MTUCI № {raw_id}")
-        else:
-            raise Exception("found incompatible id", raw_id)
+    def _student_id_rules(self) -> List[IdRule]:
+        return [
+            SNILS,
+            IdRule('[1-9][0-9]{4}', 'MTUCI № {0}')
+        ]
 
     def _parse_dormitory_requirement(self, raw_value: str) -> bool:
         if raw_value == 'Yes':
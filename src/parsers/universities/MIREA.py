@@ -1,10 +1,9 @@
-from src.core import StudentId, Student, University
+from src.core import Student, University
 from src.parsers.parser import CsvParser, FileExtension, HtmlParser, HeadersMapping
+from src.parsers.student_id import IdRule, SNILS
 
-from bs4 import BeautifulSoup
-from bs4.element import ResultSet, Tag
-from re import match
-from typing import List, TextIO, Tuple
+from lxml.html import HtmlElement
+from typing import List, TextIO
 
 
 class MireaParser(CsvParser, HtmlParser):
@@ -19,16 +18,12 @@ class MireaParser(CsvParser, HtmlParser):
         return HeadersMapping('СНИЛС/уникальный номер', 'Сумма баллов', 'Согласие на зачисление',
                               'Потребность в\xa0общежитии')
 
-    def _parse_student_id(self, raw_id: str) -> StudentId:
-        if match('[1-9][0-9]{2}-[0-9]{3}-[0-9]{3}-[0-9]{2}', raw_id):
-            parts = raw_id.split('-')
-            return StudentId(f"{parts[0]}-{parts[1]}-{parts[2]} {parts[3]}")
-        elif match('[1-9][0-9]{2}-[0-9]{3}-[0-9]{3} [0-9]{2}', raw_id):
-            return StudentId(raw_id)
-        elif match('[1-9][0-9]{6}', raw_id):
-            return StudentId(f"MIREA № {raw_id}")
-        else:
-            raise Exception("found incompatible id", raw_id)
+    def _student_id_rules(self) -> List[IdRule]:
+        return [
+            IdRule('([1-9][0-9]{2})-([0-9]{3})-([0-9]{3})-([0-9]{2}[^-]*)', '{1}-{2}-{3} {4}'),
+            SNILS,
+            IdRule('[1-9][0-9]{6}', 'MIREA № {0}')
+        ]
 
     def _parse_dormitory_requirement(self, raw_value: str) -> bool:
         if raw_value == 'требуется':
@@ -52,16 +47,18 @@ class MireaParser(CsvParser, HtmlParser):
     def _delimiter(self) -> chr:
         return ','
 
-    def _find_applications_table_data(self, data: BeautifulSoup) -> Tuple[List[str], ResultSet[Tag]]:
-        table = data.find('table', attrs={'class': 'namesTable'})
-        return [el.text for el in table.thead.find('tr').findAll('td', recursive=False)], table.tbody.findAll('tr')
+    def _is_applications_table(self, table: HtmlElement) -> bool:
+        return 'namesTable' in table.get('class', '').split()
+
+    def _parse_headers(self, rows: List[HtmlElement]) -> List[str]:
+        return [el.text_content() for el in rows[0].findall('td')]
 
-    def _parse_student_from_html_row(self, row: Tag, positions: List[int]) -> Student:
-        values = row.findAll('td', recursive=False)
+    def _parse_student_from_html_row(self, row: HtmlElement, positions: List[int]) -> Student:
+        values = row.findall('td')
 
-        student_id = self._parse_student_id(values[positions[0]].text)
-        score = int(values[positions[1]].text)
-        agreement_found = self._parse_agreement_submission(values[positions[2]].text)
-        dormitory_required = self._parse_dormitory_requirement(values[positions[3]].text)
+        student_id = self._parse_student_id(values[positions[0]].text_content())
+        score = int(values[positions[1]].text_content())
+        agreement_found = self._parse_agreement_submission(values[positions[2]].text_content())
+        dormitory_required = self._parse_dormitory_requirement(values[positions[3]].text_content())
 
         return Student(student_id, score, agreement_found)
@@ -1,8 +1,9 @@
-from src.core import StudentId, Student, University
+from src.core import Student, University
 from src.parsers.parser import CsvParser, FileExtension, HeadersMapping, HtmlParser
+from src.parsers.student_id import IdRule
 
-from bs4 import BeautifulSoup, ResultSet, Tag
-from typing import Tuple, List
+from lxml.html import HtmlElement
+from typing import List
 
 
 class MpeiParser(CsvParser, HtmlParser):
@@ -16,14 +17,11 @@ class MpeiParser(CsvParser, HtmlParser):
     def _headers_mapping(self, file_extension: FileExtension) -> HeadersMapping:
         return HeadersMapping('СНИЛС или Рег.номер', 'Сумма', 'Согласие', 'Общ.')
 
-    def _parse_student_id(self, raw_id: str) -> StudentId:
-        if raw_id.startswith('СНИЛС: '):
-            extracted_id = raw_id[7:]
-            return StudentId(f"{extracted_id[:3]}-{extracted_id[3:6]}-{extracted_id[6:9]} {extracted_id[9:]}")
-        elif raw_id.startswith('Рег.номер: '):
-            return StudentId(f"MPEI № {raw_id[11:]}")
-        else:
-            raise Exception("found incompatible id", raw_id)
+    def _student_id_rules(self) -> List[IdRule]:
+        return [
+            IdRule('СНИЛС: (.{0,3})(.{0,3})(.{0,3})(.*)', '{1}-{2}-{3} {4}'),
+            IdRule(r'Рег\.номер: (.*)', 'MPEI № {1}')
+        ]
 
     def _parse_dormitory_requirement(self, raw_value: str) -> bool:
         if raw_value == 'с/о':
@@ -47,24 +45,33 @@ class MpeiParser(CsvParser, HtmlParser):
     def _delimiter(self) -> chr:
         return ','
 
-    def _find_applications_table_data(self, data: BeautifulSoup) -> Tuple[List[str], ResultSet[Tag]]:
-        table: Tag = data.find('div', attrs={'id': 'd2103', 'class': 'c2101c'}).find('table', recursive=False).tbody
-        main_headers: Tag = table.find('tr', recursive=False)
+    def _is_applications_table(self, table: HtmlElement) -> bool:
+        container: HtmlElement = table.getparent()
+        return container.tag == 'div' and container.get('id') == 'd2103' and \
+            'c2101c' in container.get('class', '').split() and \
+            next(table.itersiblings('table', preceding=True), None) is None
+
+    def _number_of_header_rows(self) -> int:
+        # scores header is split into columns of exams in the second row
+        return 2
+
+    def _parse_headers(self, rows: List[HtmlElement]) -> List[str]:
+        main_headers: HtmlElement = rows[0]
 
         headers: List[str] = []
-        for header_column in main_headers.findAll('td', recursive=False):
-            if header_column.text == 'Баллы*':
-                headers.extend([el.text for el in main_headers.find_next_sibling().findAll('td', recursive=False)])
+        for header_column in main_headers.findall('td'):
+            if header_column.text_content() == 'Баллы*':
+                headers.extend([el.text_content() for el in rows[1].findall('td')])
             else:
-                headers.append(header_column.text)
-        return headers, table.find_all('tr', recursive=False)[2:]
+                headers.append(header_column.text_content())
+        return headers
 
-    def _parse_student_from_html_row(self, row: Tag, positions: List[int]) -> Student:
-        values = row.find_all('td', recursive=False)
+    def _parse_student_from_html_row(self, row: HtmlElement, positions: List[int]) -> Student:
+        values = row.findall('td')
 
-        student_id = self._parse_student_id(values[positions[0]].text)
-        score = int(values[positions[1]].text)
-        agreement_found = self._parse_agreement_submission(values[positions[2]].text)
-        dormitory_required = self._parse_dormitory_requirement(values[positions[3]].text)
+        student_id = self._parse_student_id(values[positions[0]].text_content())
+        score = int(values[positions[1]].text_content())
+        agreement_found = self._parse_agreement_submission(values[positions[2]].text_content())
+        dormitory_required = self._parse_dormitory_requirement(values[positions[3]].text_content())
 
         return Student(student_id, score, agreement_found)
@@ -1,10 +1,9 @@
-from src.core import StudentId, Student, University
+from src.core import Student, University
 from src.parsers.parser import CsvParser, FileExtension, HeadersMapping, HtmlParser
+from src.parsers.student_id import IdRule, SNILS
 
-from bs4 import BeautifulSoup
-from bs4.element import ResultSet, Tag
-from re import match
-from typing import Callable, Dict, List, Tuple
+from lxml.html import HtmlElement
+from typing import Callable, Dict, List
 
 
 class MpolitechParser(CsvParser, HtmlParser):
@@ -27,13 +26,11 @@ class MpolitechParser(CsvParser, HtmlParser):
         # common rights for applications where benefit field is equal to 0
         return {'\xa0Льгота\xa0': lambda x: int(x) != 0}
 
-    def _parse_student_id(self, raw_id: str) -> StudentId:
-        if match('[1-9][0-9]{2}-[0-9]{3}-[0-9]{3} [0-9]{2}', raw_id):
-            return StudentId(raw_id)
-        elif match('[1-9][0-9]{4}', raw_id):
-            return StudentId(f"MPOLITECH № {raw_id}")
-        else:
-            raise Exception("found incompatible id", raw_id)
+    def _student_id_rules(self) -> List[IdRule]:
+        return [
+            SNILS,
+            IdRule('[1-9][0-9]{4}', 'MPOLITECH № {0}')
+        ]
 
     def _parse_dormitory_requirement(self, raw_value: str) -> bool:
         if 'не нужд.' in raw_value:
@@ -62,16 +59,20 @@ class MpolitechParser(CsvParser, HtmlParser):
     def _delimiter(self):
         return ','
 
-    def _find_applications_table_data(self, data: BeautifulSoup) -> Tuple[List[str], ResultSet[Tag]]:
-        table = data.find('div', attrs={'id': 'div4'}).find('table', recursive=False).tbody
-        return [el.text for el in table.find('tr').findAll('td', recursive=False)], table.findAll('tr')[1:]
+    def _is_applications_table(self, table: HtmlElement) -> bool:
+        container: HtmlElement = table.getparent()
+        return container.tag == 'div' and container.get('id') == 'div4' and \
+            next(table.itersiblings('table', preceding=True), None) is None
+
+    def _parse_headers(self, rows: List[HtmlElement]) -> List[str]:
+        return [el.text_content() for el in rows[0].findall('td')]
 
-    def _parse_student_from_html_row(self, row: Tag, positions: List[int]) -> Student:
-        values = row.findAll('td', recursive=False)
+    def _parse_student_from_html_row(self, row: HtmlElement, positions: List[int]) -> Student:
+        values = row.findall('td')
 
-        student_id = self._parse_student_id(values[positions[0]].text)
-        score = int(values[positions[1]].text)
-        agreement_found = self._parse_agreement_submission(values[positions[2]].text)
-        dormitory_required = self._parse_dormitory_requirement(values[positions[3]].text)
+        student_id = self._parse_student_id(values[positions[0]].text_content())
+        score = int(values[positions[1]].text_content())
+        agreement_found = self._parse_agreement_submission(values[positions[2]].text_content())
+        dormitory_required = self._parse_dormitory_requirement(values[positions[3]].text_content())
 
         return Student(student_id, score, agreement_found)
@@ -1,10 +1,9 @@
-from src.core import StudentId, Student, University
+from src.core import Student, University
 from src.parsers.parser import CsvParser, FileExtension, HeadersMapping, HtmlParser
+from src.parsers.student_id import IdRule, SNILS_WITH_LEADING_ZERO
 
-from bs4 import BeautifulSoup
-from bs4.element import ResultSet, Tag
-from re import match
-from typing import List, Tuple
+from lxml.html import HtmlElement
+from typing import List
 
 
 class MtuciParser(CsvParser, HtmlParser):
@@ -18,13 +17,11 @@ class MtuciParser(CsvParser, HtmlParser):
     def _headers_mapping(self, file_extension: FileExtension):
         return HeadersMapping('СНИЛС/Код физ.лица', 'Сумма баллов', 'Согласие на зачисление', 'Нуждаемость в общежитии')
 
-    def _parse_student_id(self, raw_id: str) -> StudentId:
-        if match('[0-9]{3}-[0-9]{3}-[0-9]{3} [0-9]{2}', raw_id):
-            return StudentId(raw_id)
-        elif match('[1-9][0-9]{4}', raw_id):
-            return StudentId(f"MTUCI № {raw_id}")
-        else:
-            raise Exception("found incompatible id", raw_id)
+    def _student_id_rules(self) -> List[IdRule]:
+        return [
+            SNILS_WITH_LEADING_ZERO,
+            IdRule('[1-9][0-9]{4}', 'MTUCI № {0}')
+        ]
 
     def _parse_dormitory_requirement(self, raw_value: str) -> bool:
         if raw_value == 'Да':
@@ -42,17 +39,25 @@ class MtuciParser(CsvParser, HtmlParser):
         else:
             raise Exception("found incompatible agreement", raw_value)
 
-    def _find_applications_table_data(self, data: BeautifulSoup) -> Tuple[List[str], ResultSet[Tag]]:
-        table = data.find('label', attrs={'id': 'showFullTable'}).find_next_sibling('table')
-        return [el.text for el in table.thead.find('tr').findAll('th', recursive=False)], table.tbody.findAll('tr')
+    def _is_applications_table(self, table: HtmlElement) -> bool:
+        # the first table following the label
+        for sibling in table.itersiblings(preceding=True):
+            if sibling.tag == 'table':
+                return False
+            if sibling.tag == 'label' and sibling.get('id') == 'showFullTable':
+                return True
+        return False
+
+    def _parse_headers(self, rows: List[HtmlElement]) -> List[str]:
+        return [el.text_content() for el in rows[0].findall('th')]
 
-    def _parse_student_from_html_row(self, row: Tag, positions: List[int]) -> Student:
-        values = row.findAll('td', recursive=False)
+    def _parse_student_from_html_row(self, row: HtmlElement, positions: List[int]) -> Student:
+        values = row.findall('td')
 
-        student_id = self._parse_student_id(values[positions[0]].text)
-        score_text = values[positions[1]].find('b').text
+        student_id = self._parse_student_id(values[positions[0]].text_content())
+        score_text = values[positions[1]].find('.//b').text_content()
         score = int(score_text) if score_text else 0
-        agreement_found = self._parse_agreement_submission(values[positions[2]].text)
-        dormitory_required = self._parse_dormitory_requirement(values[positions[3]].text)
+        agreement_found = self._parse_agreement_submission(values[positions[2]].text_content())
+        dormitory_required = self._parse_dormitory_requirement(values[positions[3]].text_content())
 
         return Student(student_id, score, agreement_found)
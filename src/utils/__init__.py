@@ -1 +1,3 @@
 from src.utils.logger import CustomLogger
+from src.utils.files import open_data_file, strip_compression_suffix
+from src.utils.memory import MemoryTracker, deep_sizeof
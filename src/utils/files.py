@@ -0,0 +1,38 @@
+import gzip
+import io
+import lzma
+from typing import BinaryIO, Callable, Dict, TextIO
+
+
+def _open_zstd(file_path: str) -> BinaryIO:
+    try:
+        import zstandard
+    except ImportError:
+        raise Exception(f"Package 'zstandard' should be installed to read {file_path}")
+    return zstandard.ZstdDecompressor().stream_reader(open(file_path, 'rb'), closefd=True)
+
+
+COMPRESSION_SUFFIXES: Dict[str, Callable[[str], BinaryIO]] = {
+    '.gz': lambda file_path: gzip.open(file_path, 'rb'),
+    '.xz': lambda file_path: lzma.open(file_path, 'rb'),
+    '.zst': _open_zstd
+}
+
+
+def strip_compression_suffix(file_name: str) -> str:
+    """Returns file name without compression suffix, e.g. 'MIREA_09.03.04.csv' for 'MIREA_09.03.04.csv.gz'"""
+    for suffix in COMPRESSION_SUFFIXES.keys():
+        if file_name.endswith(suffix):
+            return file_name[: -len(suffix)]
+    return file_name
+
+
+def open_data_file(file_path: str, encoding: str = 'utf-8-sig') -> TextIO:
+    """
+    Opens data file for reading as text. Compressed files are decompressed on the fly, uncompressed ones
+    are read through the usual file buffer, so neither of them is copied into memory as a whole.
+    """
+    for suffix, open_compressed in COMPRESSION_SUFFIXES.items():
+        if file_path.endswith(suffix):
+            return io.TextIOWrapper(io.BufferedReader(open_compressed(file_path)), encoding=encoding)
+    return open(file_path, 'r', encoding=encoding)
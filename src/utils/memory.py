@@ -0,0 +1,64 @@
+from contextlib import contextmanager
+from enum import Enum
+import sys
+import tracemalloc
+from typing import Any, Dict, Iterator, List, NoReturn, Set
+
+
+def deep_sizeof(value: Any, seen: Set[int]) -> int:
+    """
+    Size of value with all objects it references, objects already in seen are not counted again,
+    so shared objects are attributed to the structure measured first. Enum members are not counted.
+    """
+    size: int = 0
+    stack: List[Any] = [value]
+    while stack:
+        current: Any = stack.pop()
+        if id(current) in seen or isinstance(current, (Enum, type)):
+            continue
+        seen.add(id(current))
+        size += sys.getsizeof(current)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        elif hasattr(current, '__dict__'):
+            stack.append(current.__dict__)
+    return size
+
+
+class MemoryTracker:
+    """
+    Memory accounting of processing stages with tracemalloc: memory retained by each stage (net change, negative
+    if stage frees memory allocated earlier) and peak allocation during it. Stages with the same name are
+    aggregated: retained memory is summed, peak is maximal.
+    Tracing is started by the first stage and stopped by close(), if it wasn't started before.
+    """
+
+    def __init__(self):
+        self.__stages: Dict[str, List[int]] = {}
+        self.__started_tracing: bool = False
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[NoReturn]:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.__started_tracing = True
+        tracemalloc.reset_peak()
+        memory_before: int = tracemalloc.get_traced_memory()[0]
+        try:
+            yield
+        finally:
+            current_memory, peak_memory = tracemalloc.get_traced_memory()
+            retained, peak = self.__stages.setdefault(name, [0, 0])
+            self.__stages[name] = [retained + current_memory - memory_before, max(peak, peak_memory - memory_before)]
+
+    def get_stages(self) -> Dict[str, Dict[str, int]]:
+        """Retained and peak memory in bytes by stage, in order of first run"""
+        return {name: {'retained': retained, 'peak': peak} for name, (retained, peak) in self.__stages.items()}
+
+    def close(self) -> NoReturn:
+        if self.__started_tracing:
+            tracemalloc.stop()
+            self.__started_tracing = False